@@ -3,6 +3,7 @@
 
 from pathlib import Path
 from backend.app import create_app
+from backend.src.utils.naming import parse_filename
 
 # Create Flask app using the application factory pattern
 app = create_app()
@@ -15,72 +16,6 @@ PROCESSED_DIR = OUTPUT_DIR / "processed"
 ICONS_DIR = OUTPUT_DIR / "icons"
 LOGS_DIR = PROJECT_ROOT / "logs"
 
-def parse_filename(filename):
-    """Parse generated image filename to extract metadata"""
-    # Pattern: {prompt_id}_{model}_{timestamp}.{ext}
-    # Example: circuit_orb_dalle3_20250619_172354.png
-    
-    stem = Path(filename).stem
-    ext = Path(filename).suffix[1:]  # Remove the dot
-    
-    # Try to match the pattern
-    # Split by underscore and look for timestamp pattern
-    parts = stem.split('_')
-    
-    # Find timestamp (pattern: YYYYMMDD_HHMMSS)
-    timestamp_idx = -1
-    for i, part in enumerate(parts):
-        if len(part) == 8 and part.isdigit():  # YYYYMMDD
-            if i + 1 < len(parts) and len(parts[i + 1]) == 6 and parts[i + 1].isdigit():  # HHMMSS
-                timestamp_idx = i
-                break
-    
-    if timestamp_idx > 0:
-        prompt_parts = parts[:timestamp_idx-1]  # Everything before model
-        model_part = parts[timestamp_idx-1]     # Model name
-        timestamp_parts = parts[timestamp_idx:timestamp_idx+2]  # Date and time
-        
-        prompt_id = '_'.join(prompt_parts) if prompt_parts else 'unknown'
-        model = model_part
-        timestamp = '_'.join(timestamp_parts)
-        
-        # Try to parse timestamp
-        try:
-            dt = datetime.strptime(timestamp, '%Y%m%d_%H%M%S')
-            created_at = dt.strftime('%Y-%m-%d %H:%M:%S')
-        except:
-            created_at = timestamp
-    else:
-        # Fallback parsing
-        prompt_id = parts[0] if parts else 'unknown'
-        model = parts[1] if len(parts) > 1 else 'unknown'
-        created_at = 'unknown'
-    
-    # Determine provider from model name
-    provider = 'unknown'
-    if 'dalle' in model.lower():
-        provider = 'openai'
-    elif 'flux' in model.lower():
-        if 'dev' in model.lower() or 'schnell' in model.lower() or 'lora' in model.lower():
-            provider = 'together_ai'
-        else:
-            provider = 'fal_ai'
-    elif 'galleri5' in model.lower():
-        provider = 'replicate'
-    elif 'ideogram' in model.lower():
-        provider = 'replicate'
-    elif 'recraft' in model.lower():
-        provider = 'replicate'
-    
-    return {
-        'prompt_id': prompt_id,
-        'model': model,
-        'provider': provider,
-        'created_at': created_at,
-        'extension': ext,
-        'filename': filename
-    }
-
 def get_file_size(filepath):
     """Get file size in MB"""
     try:
@@ -3,16 +3,21 @@ Refactored from monolithic app.py to proper modular structure.
 Includes comprehensive API endpoints, error handling, and logging.
 """
 
+import multiprocessing
 from pathlib import Path
+from typing import Optional
+
 from flask import Flask, jsonify
 from flask_cors import CORS
 
 # Import utilities
+from ..src.core.config import Config
 from ..src.utils.logging_config import setup_logging
 from ..src.utils.error_handling import OmnimageError, handle_api_error
+from ..src.services.container import ServiceContainer
 
 
-def create_app() -> Flask:
+def create_app(project_root: Optional[Path] = None, testing: bool = False) -> Flask:
     """Application factory used by *backend/run.py*.
 
     The app exposes only the API surface required for Phase 2:
@@ -20,13 +25,26 @@ def create_app() -> Flask:
     - /api/images/upload     → upload a new image
     - /api/image/<filename>  → retrieve an image file
     - DELETE /api/image/<filename> → delete an image
+
+    *project_root* is the omnimage root (default: the checkout this package
+    lives in). With *testing*, background threads such as the catalog
+    watcher are not started.
     """
 
     app = Flask(__name__)
+    app.testing = testing
+
+    # Job pool workers are spawned, so they re-import the main module, and
+    # with it any module-level ``app = create_app()``. They only run tasks:
+    # hand them a bare app instead of a second catalog, watcher and pool.
+    # (The process name is set before that import; parent_process() isn't.)
+    if multiprocessing.current_process().name != "MainProcess":
+        return app
+
     CORS(app)  # Open CORS for local development (frontend dev server runs on a different port)
     
     # Setup logging
-    project_root = Path(__file__).resolve().parent.parent.parent  # omnimage root
+    project_root = project_root or Path(__file__).resolve().parent.parent.parent  # omnimage root
     setup_logging(project_root)
     
     # Register error handlers
@@ -45,7 +63,7 @@ def create_app() -> Flask:
     # ---------------------------------------------------------------------
     # Folders
     # ---------------------------------------------------------------------
-    project_root = Path(__file__).resolve().parent.parent  # backend/
+    project_root = project_root / "backend"
     upload_dir = project_root / "uploads"
     thumbnail_dir = project_root / "thumbnails"
     static_dir = project_root / "static"
@@ -59,8 +77,17 @@ def create_app() -> Flask:
         UPLOAD_FOLDER=str(upload_dir),
         THUMBNAIL_FOLDER=str(thumbnail_dir),
         STATIC_FOLDER=str(static_dir),
+        USE_X_SENDFILE=Config.SENDFILE_MODE == "x-sendfile",
     )
 
+    # ---------------------------------------------------------------------
+    # Services: built once per app and shared by all request threads
+    # ---------------------------------------------------------------------
+    services = ServiceContainer(project_root.parent, thumbnail_dir)
+    app.extensions["omnimage"] = services
+    if Config.CATALOG_WATCHER and not app.testing:
+        services.start_catalog_watcher(poll_interval=Config.CATALOG_POLL_INTERVAL)
+
     # Register blueprints
     from .routes.images import bp as images_bp
     app.register_blueprint(images_bp)
@@ -7,25 +7,45 @@ Includes all functionality: CRUD, workflows, processing, stats, and logging.
 from __future__ import annotations
 
 import json
+import logging
+import mimetypes
+import queue
+import re
 import shutil
-import zipfile
-from datetime import datetime
+import zlib
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 
-from flask import Blueprint, current_app, jsonify, request, send_file, Response, stream_with_context
+from flask import Blueprint, current_app, jsonify, redirect, request, send_file, url_for, Response, stream_with_context
+from werkzeug.exceptions import HTTPException
 
 # Import services
+from ...src.core.config import Config
+from ...src.services.catalog_index import file_version
 from ...src.services.image_service import ImageService
 from ...src.services.workflow_service import WorkflowService
-from ...src.utils.progress_utils import read_progress
-from ...src.processors.background_remover import BackgroundRemover
-from ...src.processors.ico_converter import IcoConverter
+from ...src.services.container import ServiceContainer
+from ...src.utils.progress_utils import read_progress, get_progress_version
+from ...src.utils.zip_stream import stream_zip
+from ...src.utils.error_handling import NotFoundError, ProcessingError, ValidationError
+from ...src.processors.background_remover import remove_background_batch_task, remove_background_task
+from ...src.processors.session_registry import read_session_reports
+from ...src.processors.image_optimizer import DERIVATIVE_FORMATS, derivative_format_available
+from ...src.processors.ico_converter import convert_ico_task
 
 bp = Blueprint("images", __name__, url_prefix="/api/v1")
 
+logger = logging.getLogger("omnimage.routes.images")
+
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "svg"}
 
+# Archive cache keys are sha256 hex digests
+ARCHIVE_KEY_RE = re.compile(r"[0-9a-f]{64}")
+
+# Source suffixes serve_image can re-encode, mapped to their derivative format
+SOURCE_FORMATS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".webp": "webp"}
+
 
 # ---------------------------------------------------------------------------
 # Helper functions
@@ -35,68 +55,116 @@ def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def parse_filename(filename: str):
-    """Very light metadata extraction copied from original code."""
-    from datetime import datetime
+def conditional_json(etag: str, last_modified: Optional[float], build: Callable[[], object]) -> Response:
+    """Answer with 304 when the client's validators match, else ``jsonify(build())``.
 
-    stem = Path(filename).stem
-    ext = Path(filename).suffix[1:]
+    *build* is only invoked on a miss, so unchanged polls never rebuild the
+    payload. Responses carry ``Cache-Control: no-cache`` so browsers always
+    revalidate with the ETag instead of serving stale data.
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = int(last_modified) <= request.if_modified_since.timestamp()
+    else:
+        fresh = False
 
-    parts = stem.split("_")
+    response = Response(status=304) if fresh else jsonify(build())
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(int(last_modified), timezone.utc)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
-    timestamp_idx = -1
-    for i, part in enumerate(parts):
-        if len(part) == 8 and part.isdigit():
-            if i + 1 < len(parts) and len(parts[i + 1]) == 6 and parts[i + 1].isdigit():
-                timestamp_idx = i
-                break
 
-    if timestamp_idx > 0:
-        prompt_parts = parts[: timestamp_idx - 1]
-        model_part = parts[timestamp_idx - 1]
-        timestamp_parts = parts[timestamp_idx : timestamp_idx + 2]
-        prompt_id = "_".join(prompt_parts) if prompt_parts else "unknown"
-        model = model_part
-        timestamp = "_".join(timestamp_parts)
+def optional_int_arg(name: str) -> Optional[int]:
+    """Integer query parameter, None when absent"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError(f"{name} must be an integer")
+
+
+def negotiate_image_format() -> Optional[str]:
+    """First of Config.DERIVATIVE_PREFERENCE the client's Accept header names explicitly
+
+    Wildcards don't count: ``*/*`` from fetch() or a download tool gets the
+    original file, while browsers' image requests list avif/webp by name.
+    """
+    if not Config.IMAGE_NEGOTIATION:
+        return None
+    accepted = {value for value, quality in request.accept_mimetypes if quality > 0}
+    for fmt in Config.DERIVATIVE_PREFERENCE:
+        if DERIVATIVE_FORMATS[fmt][1] in accepted and derivative_format_available(fmt):
+            return fmt
+    return None
+
+
+def send_image_file(file_path: Path, source: Path, etag: str, mimetype: Optional[str] = None) -> Response:
+    """Send an image (or a derivative of *source*) with strong validators and Range support.
+
+    The body goes out through the WSGI server's file wrapper (sendfile), or is
+    offloaded to the proxy with X-Sendfile / X-Accel-Redirect per
+    Config.SENDFILE_MODE. When the request's ``v`` matches the source's
+    current version the URL can never change content, so it is marked
+    immutable; otherwise clients revalidate with the ETag.
+    """
+    st = source.stat()
+    versioned = request.args.get("v") == f"{file_version(st.st_mtime_ns, st.st_size):08x}"
+
+    response = None
+    if Config.SENDFILE_MODE == "x-accel":
         try:
-            dt = datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
-            created_at = dt.strftime("%Y-%m-%d %H:%M:%S")
-        except Exception:
-            created_at = timestamp
+            relative = file_path.resolve().relative_to(get_image_service().project_root.resolve())
+        except ValueError:
+            relative = None
+        if relative is not None:
+            response = current_app.response_class(
+                mimetype=mimetype or mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+            )
+            response.headers["X-Accel-Redirect"] = f"{Config.X_ACCEL_PREFIX.rstrip('/')}/{relative.as_posix()}"
+            response.set_etag(etag)
+            response.last_modified = datetime.fromtimestamp(file_path.stat().st_mtime, timezone.utc)
+            response.make_conditional(request)
+    if response is None:
+        response = send_file(file_path, mimetype=mimetype, etag=etag, conditional=True)
+
+    if versioned:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
     else:
-        prompt_id = parts[0] if parts else "unknown"
-        model = parts[1] if len(parts) > 1 else "unknown"
-        created_at = "unknown"
-
-    provider = "unknown"
-    if "dalle" in model.lower():
-        provider = "openai"
-    elif "flux" in model.lower():
-        provider = "fal_ai"
-
-    return {
-        "prompt_id": prompt_id,
-        "model": model,
-        "provider": provider,
-        "created_at": created_at,
-        "extension": ext,
-        "filename": filename,
-    }
+        response.cache_control.no_cache = True
+    return response
+
+
+def catalog_validators(image_service: ImageService, prefix: str):
+    """(ETag, Last-Modified) from the catalog database's instance id and generation
+    plus the request's query string"""
+    generation, updated_at = image_service.get_catalog_version()
+    instance_id = image_service.catalog.instance_id
+    return f"{prefix}-{instance_id}-{generation}-{zlib.crc32(request.query_string):08x}", updated_at
 
 
 # ---------------------------------------------------------------------------
 # Initialize Services
 # ---------------------------------------------------------------------------
 
-def get_image_service():
-    """Get image service instance"""
-    project_root = Path(current_app.config.get('PROJECT_ROOT', Path.cwd()))
-    return ImageService(project_root)
+def get_services() -> ServiceContainer:
+    """Application-scoped service container built in create_app"""
+    return current_app.extensions["omnimage"]
 
-def get_workflow_service():
-    """Get workflow service instance"""
-    project_root = Path(current_app.config.get('PROJECT_ROOT', Path.cwd()))
-    return WorkflowService(project_root)
+def get_image_service() -> ImageService:
+    """Get the shared image service instance"""
+    return get_services().image_service
+
+def get_workflow_service() -> WorkflowService:
+    """Get the shared workflow service instance"""
+    return get_services().workflow_service
 
 # ---------------------------------------------------------------------------
 # Image Management Routes
@@ -107,38 +175,189 @@ def index():
     """Serve the main UI"""
     return jsonify({"message": "Omnimage API v1.0", "status": "active"})
 
+IMAGE_QUERY_FILTERS = ("provider", "model", "prompt_id", "type", "date_from", "date_to")
+
+
 @bp.get("/images")
 def api_images():
-    """Get all generated images with metadata"""
+    """Get generated images with metadata.
+
+    Without query parameters the full catalog is returned as a JSON array
+    (legacy behaviour). Any of ``limit``, ``after``, ``sort`` or a filter
+    switches to a cursor-paginated page: ``{"images", "next_cursor", "count"}``.
+    ICO outputs are only listed when requested with ``type=icon``.
+    """
     try:
         image_service = get_image_service()
-        images = image_service.get_all_images()
-        return jsonify(images)
+        etag, updated_at = catalog_validators(image_service, "images")
+        if not request.args:
+            return conditional_json(etag, updated_at, image_service.get_all_images)
+
+        try:
+            limit = int(request.args.get("limit", 100))
+        except ValueError:
+            raise ValidationError("limit must be an integer")
+
+        filters = {name: request.args[name] for name in IMAGE_QUERY_FILTERS if request.args.get(name)}
+        return conditional_json(etag, updated_at, lambda: image_service.query_images(
+            limit=limit,
+            after=request.args.get("after") or None,
+            sort=request.args.get("sort", "newest"),
+            **filters,
+        ))
+    except ValidationError as e:
+        return jsonify({"error": e.message, "details": e.details}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@bp.get("/images/search")
+def search_images():
+    """Search images by prompt id, model, provider and prompt text.
+
+    ``q`` is split into tokens that must all match (each as a prefix). Paging
+    and filters work as on ``/images``; the response adds ``query``.
+    """
+    try:
+        try:
+            limit = int(request.args.get("limit", 100))
+        except ValueError:
+            raise ValidationError("limit must be an integer")
+
+        filters = {name: request.args[name] for name in IMAGE_QUERY_FILTERS if request.args.get(name)}
+        return jsonify(get_image_service().search_images(
+            request.args.get("q", ""),
+            limit=limit,
+            after=request.args.get("after") or None,
+            sort=request.args.get("sort", "newest"),
+            **filters,
+        ))
+    except ValidationError as e:
+        return jsonify({"error": e.message, "details": e.details}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.get("/images/stream")
+def stream_images():
+    """Server-Sent Events feed of catalog changes.
+
+    Each event is ``add``, ``modify`` or ``remove`` with the image metadata as
+    JSON data, or ``resync`` when the client fell behind and should refetch.
+    """
+    bus = get_services().catalog_events
+    events = bus.subscribe()
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = events.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            bus.unsubscribe(events)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @bp.get("/image/<path:filename>")
 def serve_image(filename):
-    """Serve individual image files"""
+    """Serve individual image files.
+
+    ``w``/``h`` (with ``fit=contain|cover``) resize and ``format`` (avif, webp,
+    jpeg, png or ``original``) re-encodes. Without ``format`` the smallest type
+    the client's ``Accept`` header lists explicitly is chosen. Derivatives are
+    served from a content-addressed cache, encoded once.
+
+    Responses support Range requests and carry content-hash ETags; URLs with a
+    current ``?v=`` (as listed in image metadata) are cacheable forever.
+    """
     try:
         image_service = get_image_service()
-        # Look for file in raw and processed directories
-        for directory in [image_service.raw_dir, image_service.processed_dir]:
-            file_path = directory / filename
-            if file_path.exists():
-                return send_file(file_path)
-        
-        return jsonify({"error": "Image not found"}), 404
+        file_path = image_service.resolve_image(filename)
+
+        source_format = SOURCE_FORMATS.get(file_path.suffix.lower())
+        if source_format is None:
+            return send_image_file(file_path, file_path, etag=image_service.get_content_hash(file_path))
+
+        width = optional_int_arg("w")
+        height = optional_int_arg("h")
+        fmt = request.args.get("format")
+        negotiated = fmt is None
+        if negotiated:
+            fmt = negotiate_image_format() or source_format
+        elif fmt == "original":
+            fmt = source_format
+
+        if fmt == source_format and width is None and height is None:
+            response = send_image_file(file_path, file_path, etag=image_service.get_content_hash(file_path))
+        else:
+            derivative = image_service.get_derivative(
+                file_path, fmt, width, height, request.args.get("fit", "contain")
+            )
+            # Derivative names embed the source content hash, so they are the ETag
+            response = send_image_file(derivative, file_path, mimetype=DERIVATIVE_FORMATS[fmt][1],
+                                       etag=derivative.name)
+        if negotiated:
+            response.vary.add("Accept")
+        return response
+    except (ValidationError, NotFoundError, ProcessingError) as e:
+        return jsonify({"error": e.message, "details": e.details}), e.status_code
+    except HTTPException as e:
+        # e.g. 416 from send_file for an unsatisfiable Range
+        return e
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.get("/image/<path:filename>/thumb")
+def serve_thumbnail(filename):
+    """Serve a thumbnail ``?w=`` pixels wide (default 256), rendered on first request"""
+    try:
+        try:
+            width = int(request.args.get("w", 256))
+        except ValueError:
+            raise ValidationError("w must be an integer")
+
+        image_service = get_image_service()
+        source = image_service.resolve_image(filename)
+        thumb = image_service.get_thumbnail(source, width)
+        return send_image_file(thumb, source, mimetype="image/png", etag=thumb.name)
+    except (ValidationError, NotFoundError, ProcessingError) as e:
+        return jsonify({"error": e.message, "details": e.details}), e.status_code
+    except HTTPException as e:
+        # e.g. 416 from send_file for an unsatisfiable Range
+        return e
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @bp.get("/stats")
 def api_stats():
-    """Get generation statistics"""
+    """Get generation statistics (ICO outputs are not counted)"""
     try:
         image_service = get_image_service()
-        stats = image_service.get_image_stats()
-        return jsonify(stats)
+        etag, updated_at = catalog_validators(image_service, "stats")
+        return conditional_json(etag, updated_at, image_service.get_image_stats)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.get("/stats/timeline")
+def api_stats_timeline():
+    """Get hourly/daily generation counts, optionally bounded by ?from=&to="""
+    try:
+        image_service = get_image_service()
+        etag, updated_at = catalog_validators(image_service, "timeline")
+        return conditional_json(etag, updated_at, lambda: image_service.get_stats_timeline(
+            granularity=request.args.get("granularity", "day"),
+            start=request.args.get("from") or None,
+            end=request.args.get("to") or None,
+        ))
+    except ValidationError as e:
+        return jsonify({"error": e.message, "details": e.details}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -146,8 +365,11 @@ def api_stats():
 def api_progress():
     """Return current generation progress"""
     try:
-        progress = read_progress()
-        return jsonify(progress)
+        version = get_progress_version()
+        if version is None:
+            return conditional_json("progress-default", None, read_progress)
+        mtime_ns, size = version
+        return conditional_json(f"progress-{mtime_ns}-{size}", mtime_ns / 1e9, read_progress)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -234,7 +456,18 @@ def start_workflow():
 
 @bp.post("/download/selected")
 def download_selected_images():
-    """Create and download a ZIP file containing selected images"""
+    """Stream a ZIP file containing selected images.
+
+    The archive is built while it is sent (PNG/JPEG/WebP entries are stored
+    without recompression), so the first bytes go out immediately. A
+    completed archive is kept in the archive cache: requesting the same
+    unchanged selection again redirects (303) to ``/download/archive/<key>``,
+    which serves that file with Range support.
+
+    Selected names that aren't in the catalog are skipped and listed as a
+    JSON array in the ``X-Missing-Files`` header; if none are found the
+    response is a 404 with a ``missing`` list, as for the processing routes.
+    """
     try:
         data = request.get_json()
         if not data or 'filenames' not in data:
@@ -246,35 +479,71 @@ def download_selected_images():
         
         image_service = get_image_service()
         
-        # Create temporary ZIP file
-        import tempfile
-        import os
-        
-        temp_dir = tempfile.mkdtemp()
-        zip_path = os.path.join(temp_dir, 'selected_images.zip')
+        entries, missing = [], []
+        for filename in dict.fromkeys(filenames):
+            file_path = image_service.find_image(filename)
+            if file_path is None:
+                missing.append(filename)
+                continue
+            entries.append((file_path, filename))
+        if missing:
+            logger.warning(f"Download skipped files not in the catalog: {', '.join(missing)}")
+        if not entries:
+            return jsonify({"error": "None of the selected files were found", "missing": missing}), 404
+        missing_header = {"X-Missing-Files": json.dumps(missing)} if missing else {}
         
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for filename in filenames:
-                # Look for file in raw and processed directories
-                file_found = False
-                for directory in [image_service.raw_dir, image_service.processed_dir]:
-                    file_path = directory / filename
-                    if file_path.exists():
-                        zipf.write(file_path, filename)
-                        file_found = True
-                        break
-                
-                if not file_found:
-                    print(f"Warning: File {filename} not found")
+        # Same selection + unchanged files -> same key; repeat downloads are plain file sends
+        entries.sort(key=lambda entry: entry[1])
+        key = image_service.archives.key_for(entries)
+        archive_url = url_for("images.download_archive", key=key)
+        if image_service.archives.lookup(key) is not None:
+            # 303 turns the POST into a GET, which is what Range/resume works on
+            response = redirect(archive_url, code=303)
+            response.headers.update(missing_header)
+            return response
         
-        return send_file(zip_path, as_attachment=True, download_name='selected_images.zip')
+        response = Response(
+            stream_with_context(image_service.archives.store(key, stream_zip(entries))),
+            mimetype="application/zip",
+            headers={
+                "Content-Disposition": "attachment; filename=selected_images.zip",
+                "X-Accel-Buffering": "no",
+                **missing_header,
+            },
+        )
+        response.set_etag(key)
+        response.headers["Content-Location"] = archive_url
+        return response
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@bp.get("/download/archive/<key>")
+def download_archive(key):
+    """Serve a cached selection archive (supports Range for resumed downloads)"""
+    try:
+        if not ARCHIVE_KEY_RE.fullmatch(key):
+            return jsonify({"error": "Invalid archive key"}), 400
+        
+        archive = get_image_service().archives.lookup(key)
+        if archive is None:
+            return jsonify({"error": "Archive not found"}), 404
+        
+        return send_file(archive, mimetype="application/zip", as_attachment=True,
+                         download_name="selected_images.zip", etag=key, conditional=True)
+    except HTTPException as e:
+        # e.g. 416 from send_file for an unsatisfiable Range
+        return e
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @bp.post("/process/remove-background")
 def remove_background_selected():
-    """Remove background from selected images"""
+    """Start a background-removal job for selected images.
+
+    Returns 202 with a job id immediately; poll ``/jobs/<id>`` for progress
+    and ``/jobs/<id>/result`` for the output files.
+    """
     try:
         data = request.get_json()
         if not data or 'filenames' not in data:
@@ -284,21 +553,64 @@ def remove_background_selected():
         if not filenames:
             return jsonify({"error": "No files selected"}), 400
         
-        # TODO: Implement background removal processing
-        # This would use the BackgroundRemover class
+        services = get_services()
+        image_service = services.image_service
+        model_name = data.get('model') or Config.BACKGROUND_MODEL
+        
+        items, missing = [], []
+        for filename in dict.fromkeys(filenames):
+            source = image_service.find_image(filename)
+            if source is None:
+                missing.append(filename)
+                continue
+            output = image_service.processed_dir / f"{source.stem}_nobg.png"
+            items.append((str(source), str(output)))
+        if not items:
+            return jsonify({"error": "None of the selected files were found", "missing": missing}), 404
         
+        masks = image_service.masks
+        options = {
+            'mask_cache': (str(masks.cache_dir), masks.budget_bytes),
+            'flat_tolerance': Config.FLAT_BACKGROUND_TOLERANCE,
+            'lowres_size': Config.BACKGROUND_LOWRES_SIZE,
+        }
+        
+        # Batch images per inference, but never so much that workers sit idle
+        batch_size = min(Config.BACKGROUND_BATCH_SIZE, -(-len(items) // services.jobs.max_workers))
+        if batch_size > 1:
+            tasks = []
+            for start in range(0, len(items), batch_size):
+                chunk = items[start:start + batch_size]
+                sources = [source for source, _ in chunk]
+                outputs = [output for _, output in chunk]
+                tasks.append((remove_background_batch_task, (sources, outputs, model_name, options), len(chunk)))
+        else:
+            tasks = [(remove_background_task, (source, output, model_name, options)) for source, output in items]
+        
+        job = services.jobs.submit(
+            'remove-background', tasks,
+            on_result=lambda result: image_service.register_output(Path(result['output']))
+        )
         return jsonify({
             "success": True,
-            "message": f"Background removal started for {len(filenames)} images",
-            "processed_count": len(filenames)
-        })
+            "message": f"Background removal started for {len(items)} images",
+            "job_id": job.id,
+            "status_url": url_for("images.job_status", job_id=job.id),
+            "result_url": url_for("images.job_result", job_id=job.id),
+            "missing": missing
+        }), 202
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @bp.post("/process/convert-ico")
 def convert_to_ico_selected():
-    """Convert selected images to ICO format"""
+    """Start an ICO conversion job for selected images.
+
+    Returns 202 with a job id immediately; poll ``/jobs/<id>`` for progress
+    and ``/jobs/<id>/result`` for the per-file status. Icons are written to
+    ``output/icons``.
+    """
     try:
         data = request.get_json()
         if not data or 'filenames' not in data:
@@ -308,14 +620,81 @@ def convert_to_ico_selected():
         if not filenames:
             return jsonify({"error": "No files selected"}), 400
         
-        # TODO: Implement ICO conversion processing
-        # This would use the IcoConverter class
+        services = get_services()
+        image_service = services.image_service
+        
+        tasks, missing = [], []
+        for filename in dict.fromkeys(filenames):
+            source = image_service.find_image(filename)
+            if source is None:
+                missing.append(filename)
+                continue
+            output = image_service.icons_dir / f"{source.stem}.ico"
+            tasks.append((convert_ico_task, (str(source), str(output), Config.ICO_SIZES)))
+        if not tasks:
+            return jsonify({"error": "None of the selected files were found", "missing": missing}), 404
         
+        job = services.jobs.submit(
+            'convert-ico', tasks,
+            on_result=lambda result: image_service.register_output(Path(result['output']))
+        )
         return jsonify({
             "success": True,
-            "message": f"ICO conversion started for {len(filenames)} images",
-            "processed_count": len(filenames)
-        })
+            "message": f"ICO conversion started for {len(tasks)} images",
+            "job_id": job.id,
+            "status_url": url_for("images.job_status", job_id=job.id),
+            "result_url": url_for("images.job_result", job_id=job.id),
+            "missing": missing
+        }), 202
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@bp.get("/process/sessions")
+def model_sessions():
+    """Loaded background-removal models per process, with load time and resident size"""
+    try:
+        processes = read_session_reports(get_services().session_report_dir)
+        return jsonify({
+            "budget_bytes": Config.SESSION_BUDGET_MB * 1024 * 1024,
+            "preload": Config.PRELOAD_MODELS,
+            "processes": processes,
+            "total_bytes": sum(process['total_bytes'] for process in processes)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ---------------------------------------------------------------------------
+# Job Routes
+# ---------------------------------------------------------------------------
+
+@bp.get("/jobs/<job_id>")
+def job_status(job_id):
+    """Get progress of a processing job"""
+    job = get_services().jobs.snapshot(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@bp.get("/jobs/<job_id>/result")
+def job_result(job_id):
+    """Get per-file results of a job; 202 with progress while it is still running"""
+    job = get_services().jobs.snapshot(job_id, include_results=True)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job['status'] == 'running':
+        del job['results']
+        return jsonify(job), 202
+    
+    methods: Dict[str, int] = {}
+    for result in job['results']:
+        if result.get('output'):
+            result['output'] = Path(result['output']).name
+            if result.get('success'):
+                result['url'] = url_for("images.serve_image", filename=result['output'], format="original")
+        if result.get('method'):
+            methods[result['method']] = methods.get(result['method'], 0) + 1
+    if methods:
+        # How each item was processed, e.g. background removal's cached/flat/model split
+        job['methods'] = methods
+    return jsonify(job)
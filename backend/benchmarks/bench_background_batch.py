@@ -0,0 +1,91 @@
+"""
+Throughput benchmark for batched background removal
+
+Runs BackgroundRemover.predict_masks + cutout over synthetic (or supplied)
+images at several batch sizes and reports images/second, next to the
+per-image rembg.remove path for reference. The session is loaded and warmed
+up before timing; PNG encoding is excluded as it is the same for every mode.
+
+Run from the project root (needs rembg with onnxruntime and the model file):
+    python -m backend.benchmarks.bench_background_batch --count 64 --batch-sizes 1,2,4,8,16
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+import rembg
+from PIL import Image, ImageDraw
+
+from backend.src.processors.background_remover import BackgroundRemover
+
+
+def synthetic_images(count: int, size: int, seed: int = 42) -> list:
+    """Logo-like images: a few filled shapes on a plain background"""
+    rng = random.Random(seed)
+    images = []
+    for _ in range(count):
+        img = Image.new('RGB', (size, size), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(rng.randint(2, 5)):
+            x0, y0 = rng.randrange(size // 2), rng.randrange(size // 2)
+            x1, y1 = x0 + rng.randrange(size // 8, size // 2), y0 + rng.randrange(size // 8, size // 2)
+            fill = tuple(rng.randrange(256) for _ in range(3))
+            (draw.ellipse if rng.random() < 0.5 else draw.rectangle)((x0, y0, x1, y1), fill=fill)
+        images.append(img)
+    return images
+
+
+def load_images(directory: Path, count: int) -> list:
+    images = []
+    for path in sorted(directory.iterdir()):
+        if path.suffix.lower() in ('.png', '.jpg', '.jpeg', '.webp'):
+            with Image.open(path) as img:
+                images.append(img.convert('RGB'))
+        if len(images) == count:
+            break
+    return images
+
+
+def timed(label: str, func, images: list):
+    start = time.perf_counter()
+    func(images)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {len(images):>5} images  {elapsed:8.3f} s  {len(images) / elapsed:8.2f} images/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--model', default='u2net')
+    parser.add_argument('--count', type=int, default=64)
+    parser.add_argument('--size', type=int, default=1024, help='edge of the synthetic images')
+    parser.add_argument('--input-dir', type=Path, help='use real images from this directory instead')
+    parser.add_argument('--batch-sizes', default='1,2,4,8,16')
+    parser.add_argument('--skip-rembg', action='store_true')
+    args = parser.parse_args()
+
+    images = load_images(args.input_dir, args.count) if args.input_dir else synthetic_images(args.count, args.size)
+    remover = BackgroundRemover(args.model)
+    if not remover.supports_batching:
+        parser.error(f"model {args.model} has no batch mode")
+
+    model_input = remover.session.inner_session.get_inputs()[0]
+    print(f"{args.model}: input {model_input.name} {model_input.shape}, "
+          f"providers {remover.session.inner_session.get_providers()}")
+    remover.predict_masks(images[:1])
+
+    if not args.skip_rembg:
+        timed('rembg.remove per image', lambda batch: [rembg.remove(img, session=remover.session) for img in batch],
+              images)
+
+    for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+        def run(batch, batch_size=batch_size):
+            for start in range(0, len(batch), batch_size):
+                chunk = batch[start:start + batch_size]
+                for img, mask in zip(chunk, remover.predict_masks(chunk)):
+                    remover.cutout(img, mask)
+        timed(f"batched, batch_size={batch_size}", run, images)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Memory benchmark for the columnar in-memory catalog
+
+Builds a catalog of synthetic images and reports bytes per image (via
+tracemalloc) for ColumnarCatalog against the list-of-dicts representation
+get_all_images used to hold, plus first-page query latency.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_catalog_memory --count 1000000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from backend.src.services.catalog_columns import ColumnarCatalog
+from backend.src.utils.naming import _parse_filename_cached, parse_filename
+
+PROMPTS = [f"prompt_{i:03d}" for i in range(500)]
+MODELS = ['dalle3', 'flux', 'flux_dev', 'ideogram', 'recraft', 'galleri5']
+
+
+def synthetic_rows(count: int, seed: int = 42):
+    """Index-shaped rows: (path, filename, type, prompt_id, model, provider,
+    created_at, extension, size_bytes, mtime_ns, width, height)"""
+    rng = random.Random(seed)
+    for i in range(count):
+        image_type = 'raw' if i % 3 else 'processed'
+        filename = (f"{rng.choice(PROMPTS)}_{rng.choice(MODELS)}_"
+                    f"2025{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}_"
+                    f"{rng.randint(0, 23):02d}{rng.randint(0, 59):02d}{i % 60:02d}_{i}.png")
+        meta = parse_filename(filename)
+        yield (f"output/{image_type}/{filename}", filename, image_type, meta['prompt_id'],
+               meta['model'], meta['provider'], meta['created_at'], meta['extension'],
+               rng.randint(200_000, 2_000_000), 0, 1024, 1024)
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = build()
+    # The parser's LRU is shared process state, not part of either representation
+    _parse_filename_cached.cache_clear()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, used
+
+
+def build_dicts(count: int):
+    images = []
+    for row in synthetic_rows(count):
+        meta = parse_filename(row[1])
+        meta.update({'size_mb': round(row[8] / (1024 * 1024), 2), 'path': row[0], 'type': row[2]})
+        images.append(meta)
+    return images
+
+
+def build_columns(count: int):
+    catalog = ColumnarCatalog({'raw': 'output/raw', 'processed': 'output/processed'})
+    catalog.upsert_rows(synthetic_rows(count))
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=1_000_000)
+    parser.add_argument('--dict-count', type=int, default=100_000,
+                        help='rows for the list-of-dicts baseline (it is large)')
+    args = parser.parse_args()
+
+    catalog, used = measure(lambda: build_columns(args.count))
+    print(f"ColumnarCatalog      {args.count:>9,} images  {used / 2**20:8.1f} MiB  "
+          f"{used / args.count:7.1f} bytes/image")
+
+    for sort in ('newest', 'name'):
+        start = time.perf_counter()
+        catalog.query(limit=100, sort=sort)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        catalog.query(limit=100, sort=sort)
+        warm = time.perf_counter() - start
+        print(f"  first page sort={sort:<7} cold {cold * 1000:8.1f} ms   warm {warm * 1000:6.2f} ms")
+
+    start = time.perf_counter()
+    catalog.query(limit=100, model='flux', date_from='2025-03-01', date_to='2025-06-30')
+    print(f"  filtered first page       {(time.perf_counter() - start) * 1000:8.1f} ms")
+    del catalog
+
+    if args.dict_count:
+        _, used = measure(lambda: build_dicts(args.dict_count))
+        print(f"list of dicts        {args.dict_count:>9,} images  {used / 2**20:8.1f} MiB  "
+              f"{used / args.dict_count:7.1f} bytes/image")
+
+
+if __name__ == '__main__':
+    main()
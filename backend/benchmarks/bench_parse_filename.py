@@ -0,0 +1,84 @@
+"""
+Throughput benchmark for the canonical filename parser
+
+Parses synthetic {prompt_id}_{model}_{YYYYMMDD_HHMMSS}.png names and reports
+names/second for cold (every call misses the LRU) and warm (working set fits
+in the LRU) runs, next to the legacy split + strptime parser for reference.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_parse_filename --count 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+
+from backend.src.utils.naming import PARSE_CACHE_SIZE, _parse_filename_cached, parse_filename
+
+PROMPTS = ['circuit_orb', 'blue_pen_chip', 'neon_chip_brush', 'logo', 'green_neon_chip']
+MODELS = ['dalle3', 'flux', 'ideogram', 'recraft', 'galleri5']
+
+
+def synthetic_names(count: int, seed: int = 42) -> list:
+    """Unique generated-style filenames"""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1).timestamp()
+    names = []
+    for i in range(count):
+        ts = datetime.fromtimestamp(base + i * 7 + rng.randrange(7))
+        names.append(f"{rng.choice(PROMPTS)}_{i}_{rng.choice(MODELS)}_{ts:%Y%m%d_%H%M%S}.png")
+    return names
+
+
+def legacy_parse_filename(filename: str) -> dict:
+    """The split + strptime parser this benchmark replaced, kept as a baseline"""
+    stem = Path(filename).stem
+    parts = stem.split('_')
+    timestamp_idx = -1
+    for i, part in enumerate(parts):
+        if len(part) == 8 and part.isdigit():
+            if i + 1 < len(parts) and len(parts[i + 1]) == 6 and parts[i + 1].isdigit():
+                timestamp_idx = i
+                break
+    if timestamp_idx > 0:
+        prompt_id = '_'.join(parts[:timestamp_idx - 1]) or 'unknown'
+        model = parts[timestamp_idx - 1]
+        timestamp = '_'.join(parts[timestamp_idx:timestamp_idx + 2])
+        created_at = datetime.strptime(timestamp, '%Y%m%d_%H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+    else:
+        prompt_id, model, created_at = parts[0], 'unknown', 'unknown'
+    return {'prompt_id': prompt_id, 'model': model, 'created_at': created_at,
+            'extension': Path(filename).suffix[1:], 'filename': filename}
+
+
+def timed(label: str, func, names: list):
+    start = time.perf_counter()
+    for name in names:
+        func(name)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(names):>9,} names  {elapsed:7.3f} s  {len(names) / elapsed:>12,.0f} names/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=1_000_000)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    names = synthetic_names(args.count)
+
+    _parse_filename_cached.cache_clear()
+    timed('parse_filename (cold)', parse_filename, names)
+
+    warm = names[:min(PARSE_CACHE_SIZE, len(names))]
+    for name in warm:
+        parse_filename(name)
+    timed('parse_filename (warm)', parse_filename, warm * max(1, len(names) // len(warm)))
+
+    if not args.skip_legacy:
+        timed('legacy split + strptime', legacy_parse_filename, names)
+
+
+if __name__ == '__main__':
+    main()
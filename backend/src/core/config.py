@@ -36,10 +36,42 @@ class Config:
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
     
     # Processing Settings
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(os.cpu_count() or 2)))
+    BACKGROUND_MODEL = os.getenv("BACKGROUND_MODEL", "u2net")
+    BACKGROUND_BATCH_SIZE = int(os.getenv("BACKGROUND_BATCH_SIZE", "1"))  # images per inference; see bench_background_batch
+    MASK_CACHE_MB = int(os.getenv("MASK_CACHE_MB", "1024"))
+    FLAT_BACKGROUND_TOLERANCE = int(os.getenv("FLAT_BACKGROUND_TOLERANCE", "24"))  # 0 always runs the model
+    BACKGROUND_LOWRES_SIZE = int(os.getenv("BACKGROUND_LOWRES_SIZE", "512"))  # inputs 2x this size predict masks downscaled; 0 disables
+    SESSION_BUDGET_MB = int(os.getenv("SESSION_BUDGET_MB", "2048"))  # per process; least recently used models are unloaded beyond it
+    PRELOAD_MODELS = [m.strip() for m in os.getenv("PRELOAD_MODELS", "").split(",") if m.strip()]
     REMOVE_BACKGROUND = os.getenv("REMOVE_BACKGROUND", "true").lower() == "true"
     CREATE_ICO = os.getenv("CREATE_ICO", "true").lower() == "true"
     ICO_SIZES = [16, 32, 48, 64, 128, 256]
     
+    # Catalog
+    CATALOG_WATCHER = os.getenv("CATALOG_WATCHER", "true").lower() == "true"
+    CATALOG_POLL_INTERVAL = float(os.getenv("CATALOG_POLL_INTERVAL", "2.0"))
+    
+    # Thumbnails
+    THUMBNAIL_WIDTHS = [64, 128, 256, 384, 512, 768, 1024]
+    THUMBNAIL_CACHE_MB = int(os.getenv("THUMBNAIL_CACHE_MB", "512"))
+    
+    # Served image derivatives (format negotiation / resizing in serve_image)
+    IMAGE_NEGOTIATION = os.getenv("IMAGE_NEGOTIATION", "true").lower() == "true"
+    DERIVATIVE_PREFERENCE = ["avif", "webp"]  # negotiated in this order when the client accepts several
+    DERIVATIVE_QUALITY = int(os.getenv("DERIVATIVE_QUALITY", "75"))
+    DERIVATIVE_MAX_SIZE = 4096
+    DERIVATIVE_CACHE_MB = int(os.getenv("DERIVATIVE_CACHE_MB", "2048"))
+    
+    # Bulk-download archives
+    ARCHIVE_CACHE_MB = int(os.getenv("ARCHIVE_CACHE_MB", "2048"))
+    
+    # File delivery offload: "" (send from Flask), "x-sendfile" (Apache/lighttpd)
+    # or "x-accel" (nginx internal location X_ACCEL_PREFIX aliasing the project root)
+    SENDFILE_MODE = os.getenv("SENDFILE_MODE", "").lower()
+    X_ACCEL_PREFIX = os.getenv("X_ACCEL_PREFIX", "/_omnimage_files")
+    IMMUTABLE_MAX_AGE = 31536000
+    
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     
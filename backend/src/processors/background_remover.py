@@ -4,154 +4,346 @@ Background removal processor using rembg
 """
 
 import logging
+from collections import Counter
 from pathlib import Path
-from typing import Optional, List
-from PIL import Image
+from typing import Dict, Optional, List, Tuple
+import numpy as np
+from PIL import Image, ImageOps
 import rembg
 
+from .flat_background import flat_background_mask
+from .mask_refine import guided_upsample
+from .session_registry import session_registry
+
+# Input size, mean and std of the models batch mode runs directly, matching
+# how rembg's own sessions normalize them; other models fall back to rembg.remove
+BATCH_MODEL_SPECS = {
+    "u2net": ((320, 320), (0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+    "u2netp": ((320, 320), (0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+    "u2net_human_seg": ((320, 320), (0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+    "silueta": ((320, 320), (0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+    "isnet-general-use": ((1024, 1024), (0.5, 0.5, 0.5), (1.0, 1.0, 1.0)),
+    "isnet-anime": ((1024, 1024), (0.485, 0.456, 0.406), (1.0, 1.0, 1.0)),
+}
+
 class BackgroundRemover:
-    """Remove backgrounds from images using AI models"""
+    """Remove backgrounds from images using AI models
+    
+    With ``batch_size`` > 1, process_batch stacks that many images into one
+    input tensor and runs the ONNX session once per batch instead of calling
+    rembg.remove per image; masks are normalized for the whole batch at once.
+    
+    With a ``mask_cache`` (a DerivativeCache), predicted alpha masks are kept
+    as grayscale PNGs keyed by the source's content hash and the model, so
+    reprocessing an image only composites the cached mask.
     
-    def __init__(self, model_name: str = "u2net"):
+    Images on a flat background (most generated logos and icons) are cut out
+    by a border-seeded color key with ``flat_tolerance`` instead of the
+    model; 0 disables that check. ``method_counts`` tallies how each mask
+    was obtained.
+    
+    Inputs at least twice ``lowres_size`` on the long side are box-reduced
+    once to between one and two times that size for mask prediction (the
+    model itself only sees 320 px), and the mask is upsampled with a guided
+    filter against the full-resolution image; 0 always predicts from the
+    full image.
+    """
+    
+    def __init__(self, model_name: str = "u2net", batch_size: int = 1, mask_cache=None,
+                 flat_tolerance: int = 24, lowres_size: int = 512):
         self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.mask_cache = mask_cache
+        self.flat_tolerance = flat_tolerance
+        self.lowres_size = lowres_size
+        self.method_counts: Counter = Counter()
         self.logger = logging.getLogger("processor.background_remover")
-        self._session = None
     
     @property
     def session(self):
-        """Lazy load the rembg session"""
-        if self._session is None:
-            self.logger.info(f"Loading background removal model: {self.model_name}")
-            self._session = rembg.new_session(self.model_name)
-            self.logger.info("Background removal model loaded")
-        return self._session
+        """The model's rembg session, shared process-wide through the session registry"""
+        return session_registry.get(self.model_name)
     
-    def process_image(self, input_path: Path, output_path: Path) -> bool:
-        """Remove background from a single image"""
+    @property
+    def supports_batching(self) -> bool:
+        return self.model_name in BATCH_MODEL_SPECS
+    
+    def uses_lowres(self, size: Tuple[int, int]) -> bool:
+        return self.lowres_size > 0 and max(size) >= 2 * self.lowres_size
+    
+    def mask_variant(self, size: Tuple[int, int]) -> str:
+        """Mask cache variant; low-res predictions differ, so they get their own"""
+        if self.uses_lowres(size):
+            return f"mask-{self.model_name}-lr{self.lowres_size}"
+        return f"mask-{self.model_name}"
+    
+    def cached_mask(self, input_path: Path, size: Tuple[int, int]) -> Optional[Image.Image]:
+        """Previously predicted mask for this source and model, or None"""
+        if self.mask_cache is None:
+            return None
+        mask_path = self.mask_cache.lookup(input_path, self.mask_variant(size), '.png')
+        if mask_path is None:
+            return None
         try:
-            with Image.open(input_path) as img:
-                # Convert to RGB if necessary
-                if img.mode not in ('RGB', 'RGBA'):
-                    img = img.convert('RGB')
-                
-                # Remove background
-                output_img = rembg.remove(img, session=self.session)
-                
-                # Ensure output directory exists
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Save as PNG to preserve transparency
-                output_img.save(output_path, 'PNG', optimize=True)
-                
-            self.logger.info(f"Background removed: {input_path.name} -> {output_path.name}")
-            return True
-            
+            with Image.open(mask_path) as mask:
+                mask.load()
         except Exception as e:
-            self.logger.error(f"Failed to remove background from {input_path.name}: {e}")
-            return False
+            self.logger.warning(f"Ignoring unreadable cached mask for {input_path.name}: {e}")
+            return None
+        return mask if mask.mode == 'L' and mask.size == size else None
     
-    def process_batch(self, input_paths: List[Path], output_dir: Path) -> List[Path]:
-        """Process multiple images, returning list of successful outputs"""
-        
-        successful_outputs = []
-        
-        for input_path in input_paths:
-            # Generate output filename with _nobg suffix
-            output_filename = f"{input_path.stem}_nobg.png"
-            output_path = output_dir / output_filename
-            
-            if self.process_image(input_path, output_path):
-                successful_outputs.append(output_path)
-        
-        self.logger.info(f"Background removal complete: {len(successful_outputs)}/{len(input_paths)} successful")
-        return successful_outputs
-
-# src/processors/ico_converter.py
-"""
-ICO file converter using Pillow
-"""
-
-import logging
-from pathlib import Path
-from typing import List, Optional, Tuple
-from PIL import Image
-
-class ICOConverter:
-    """Convert images to ICO format with multiple sizes"""
+    def store_mask(self, input_path: Path, mask: Image.Image):
+        """Cache a predicted mask; failures only cost a future recomputation"""
+        if self.mask_cache is None:
+            return
+        try:
+            self.mask_cache.get_or_create(
+                input_path, self.mask_variant(mask.size), '.png',
+                lambda _source, tmp_path: mask.save(tmp_path, 'PNG') or True
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to cache mask for {input_path.name}: {e}")
+    
+    def predict_mask(self, img: Image.Image) -> Optional[Image.Image]:
+        """Single-image mask from the session, or None for multi-mask models"""
+        masks = self.session.predict(img)
+        if len(masks) != 1 or masks[0].mode != 'L' or masks[0].size != img.size:
+            return None
+        return masks[0]
+    
+    def _preprocess(self, images: List[Image.Image]) -> np.ndarray:
+        """Resize and normalize images into one float32 NCHW tensor"""
+        size, mean, std = BATCH_MODEL_SPECS[self.model_name]
+        batch = np.stack([
+            np.asarray(img.convert('RGB').resize(size, Image.Resampling.LANCZOS)) for img in images
+        ]).astype(np.float32)
+        # Each image is scaled by its own maximum, as rembg does
+        peak = batch.reshape(len(images), -1).max(axis=1)
+        batch /= np.maximum(peak, 1e-6)[:, None, None, None]
+        batch -= np.asarray(mean, dtype=np.float32)
+        batch /= np.asarray(std, dtype=np.float32)
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+    
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        """Run the model on a batch; returns the first output's first channel (N, H, W)"""
+        inner = self.session.inner_session
+        model_input = inner.get_inputs()[0]
+        if isinstance(model_input.shape[0], int) and model_input.shape[0] != len(batch):
+            # Exported with a fixed batch dimension: feed it one image at a time
+            outputs = [inner.run(None, {model_input.name: batch[i:i + 1]})[0] for i in range(len(batch))]
+            return np.concatenate(outputs)[:, 0]
+        return inner.run(None, {model_input.name: batch})[0][:, 0]
+    
+    @staticmethod
+    def _postprocess(pred: np.ndarray) -> np.ndarray:
+        """Min-max normalize each prediction to a uint8 mask, all at once"""
+        lo = pred.min(axis=(1, 2), keepdims=True)
+        hi = pred.max(axis=(1, 2), keepdims=True)
+        pred = (pred - lo) / np.maximum(hi - lo, 1e-6)
+        return (pred.clip(0, 1) * 255).astype(np.uint8)
+    
+    def predict_masks(self, images: List[Image.Image]) -> List[Image.Image]:
+        """Alpha masks (mode L, at each image's size) from one batched inference"""
+        masks = self._postprocess(self._run(self._preprocess(images)))
+        return [
+            Image.fromarray(mask, mode='L').resize(img.size, Image.Resampling.LANCZOS)
+            for img, mask in zip(images, masks)
+        ]
+    
+    @staticmethod
+    def cutout(img: Image.Image, mask: Image.Image) -> Image.Image:
+        """Image with the mask applied as alpha (rembg's naive cutout)"""
+        return Image.composite(img, Image.new('RGBA', img.size, 0), mask)
+    
+    def work_image(self, img: Image.Image) -> Image.Image:
+        """The image masks are predicted from: *img* itself, or a single downscale of it"""
+        if not self.uses_lowres(img.size):
+            return img
+        # Integer box reduction: one cheap pass that keeps at least lowres_size
+        return img.reduce(max(img.size) // self.lowres_size)
     
-    def __init__(self, ico_sizes: List[int] = None):
-        self.ico_sizes = ico_sizes or [16, 32, 48, 64, 128, 256]
-        self.logger = logging.getLogger("processor.ico_converter")
+    def full_mask(self, mask: Image.Image, work: Image.Image, img: Image.Image) -> Image.Image:
+        """Bring a mask predicted on *work* to the size of *img*"""
+        if work is img:
+            return mask
+        return guided_upsample(mask, work, img)
     
-    def convert_image(self, input_path: Path, output_path: Path) -> bool:
-        """Convert single image to ICO format"""
+    def flat_mask(self, work: Image.Image) -> Optional[Image.Image]:
+        if self.flat_tolerance <= 0:
+            return None
+        return flat_background_mask(work, self.flat_tolerance)
+    
+    @staticmethod
+    def load_image(input_path: Path) -> Image.Image:
+        with Image.open(input_path) as img:
+            img = ImageOps.exif_transpose(img)
+            return img.convert('RGBA' if img.mode == 'RGBA' else 'RGB')
+    
+    def _save_cutout(self, img: Image.Image, mask: Image.Image, input_path: Path, output_path: Path, method: str):
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cutout(img, mask).save(output_path, 'PNG', optimize=True)
+        self.method_counts[method] += 1
+        self.logger.info(f"Background removed ({method}): {input_path.name} -> {output_path.name}")
+    
+    def remove_background(self, input_path: Path, output_path: Path) -> Optional[str]:
+        """Remove background from a single image
+        
+        Returns how the mask was obtained ("cached", "flat" or "model"), or
+        None on failure.
+        """
         try:
-            with Image.open(input_path) as img:
-                # Convert to RGBA for transparency support
-                if img.mode != 'RGBA':
-                    img = img.convert('RGBA')
-                
-                # Create different sizes
-                resized_images = []
-                
-                for size in self.ico_sizes:
-                    # Resize maintaining aspect ratio
-                    resized = img.resize((size, size), Image.Resampling.LANCZOS)
-                    resized_images.append(resized)
-                
-                # Ensure output directory exists
+            img = self.load_image(input_path)
+            
+            # Skip the model when the mask is cached or the background is flat
+            mask, method = self.cached_mask(input_path, img.size), "cached"
+            if mask is None:
+                work = self.work_image(img)
+                mask, method = self.flat_mask(work), "flat"
+                if mask is None:
+                    mask, method = self.predict_mask(work), "model"
+                if mask is not None:
+                    mask = self.full_mask(mask, work, img)
+                    if method == "model":
+                        self.store_mask(input_path, mask)
+            
+            if mask is not None:
+                self._save_cutout(img, mask, input_path, output_path, method)
+            else:
                 output_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Save as ICO with multiple sizes
-                img.save(
-                    output_path, 
-                    format='ICO', 
-                    sizes=[(size, size) for size in self.ico_sizes],
-                    append_images=resized_images[1:] if len(resized_images) > 1 else None
-                )
-                
-            self.logger.info(f"ICO created: {input_path.name} -> {output_path.name}")
-            return True
+                rembg.remove(img, session=self.session).save(output_path, 'PNG', optimize=True)
+                self.method_counts[method] += 1
+                self.logger.info(f"Background removed ({method}): {input_path.name} -> {output_path.name}")
+            return method
             
         except Exception as e:
-            self.logger.error(f"Failed to convert {input_path.name} to ICO: {e}")
-            return False
+            self.logger.error(f"Failed to remove background from {input_path.name}: {e}")
+            return None
     
-    def convert_batch(self, input_paths: List[Path], output_dir: Path) -> List[Path]:
-        """Convert multiple images to ICO format"""
+    def process_image(self, input_path: Path, output_path: Path) -> bool:
+        """Remove background from a single image"""
+        return self.remove_background(input_path, output_path) is not None
+    
+    def process_batch(self, input_paths: List[Path], output_dir: Path) -> List[Path]:
+        """Process multiple images, returning list of successful outputs"""
         
         successful_outputs = []
+        output_paths = [output_dir / f"{input_path.stem}_nobg.png" for input_path in input_paths]
+        methods: Counter = Counter()
         
-        for input_path in input_paths:
-            # Generate output filename
-            output_filename = f"{input_path.stem}.ico"
-            output_path = output_dir / output_filename
-            
-            if self.convert_image(input_path, output_path):
-                successful_outputs.append(output_path)
+        if self.batch_size > 1 and self.supports_batching:
+            for start in range(0, len(input_paths), self.batch_size):
+                chunk = list(zip(input_paths[start:start + self.batch_size],
+                                 output_paths[start:start + self.batch_size]))
+                for (_, output_path), method in zip(chunk, self.process_images(chunk)):
+                    if method:
+                        successful_outputs.append(output_path)
+                        methods[method] += 1
+        else:
+            for input_path, output_path in zip(input_paths, output_paths):
+                method = self.remove_background(input_path, output_path)
+                if method:
+                    successful_outputs.append(output_path)
+                    methods[method] += 1
         
-        self.logger.info(f"ICO conversion complete: {len(successful_outputs)}/{len(input_paths)} successful")
+        breakdown = ", ".join(f"{method}: {count}" for method, count in sorted(methods.items()))
+        self.logger.info(f"Background removal complete: {len(successful_outputs)}/{len(input_paths)} successful"
+                         + (f" ({breakdown})" if breakdown else ""))
         return successful_outputs
     
-    def verify_ico(self, ico_path: Path) -> bool:
-        """Verify ICO file is valid and report sizes"""
+    def process_images(self, pairs: List[Tuple[Path, Path]]) -> List[Optional[str]]:
+        """Remove backgrounds from (input_path, output_path) pairs with one batched inference
+        
+        Only images without a cached mask or flat background go through the
+        model. Returns the method per pair as remove_background does, and
+        falls back to per-image processing if the batch can't be run. Only
+        work images are held for the batch; inputs that were downscaled are
+        reloaded one at a time for the cutout.
+        """
+        results: List[Optional[str]] = [None] * len(pairs)
+        pending, works, downscaled = [], [], []
+        for i, (input_path, output_path) in enumerate(pairs):
+            try:
+                img = self.load_image(input_path)
+                mask, method = self.cached_mask(input_path, img.size), "cached"
+                if mask is None:
+                    work = self.work_image(img)
+                    mask, method = self.flat_mask(work), "flat"
+                    if mask is None:
+                        pending.append(i)
+                        works.append(work)
+                        downscaled.append(work is not img)
+                        continue
+                    mask = self.full_mask(mask, work, img)
+                self._save_cutout(img, mask, input_path, output_path, method)
+                results[i] = method
+            except Exception as e:
+                self.logger.error(f"Failed to remove background from {input_path.name}: {e}")
+        if not pending:
+            return results
+        
         try:
-            with Image.open(ico_path) as img:
-                # ICO files can contain multiple images
-                sizes_found = []
-                
-                try:
-                    # Try to get all sizes
-                    for i in range(100):  # Arbitrary limit
-                        img.seek(i)
-                        sizes_found.append(img.size)
-                except EOFError:
-                    # Normal - reached end of ICO frames
-                    pass
-                
-                self.logger.info(f"ICO verified: {ico_path.name} contains {len(sizes_found)} sizes: {sizes_found}")
-                return True
-                
+            predicted = self.predict_masks(works)
         except Exception as e:
-            self.logger.error(f"ICO verification failed for {ico_path.name}: {e}")
-            return False
+            self.logger.warning(f"Batched inference failed ({e}), processing {len(pending)} images one by one")
+            for i in pending:
+                results[i] = self.remove_background(*pairs[i])
+            return results
+        
+        for i, work, is_downscaled, mask in zip(pending, works, downscaled, predicted):
+            input_path, output_path = pairs[i]
+            try:
+                img = self.load_image(input_path) if is_downscaled else work
+                mask = self.full_mask(mask, work, img)
+                self.store_mask(input_path, mask)
+                self._save_cutout(img, mask, input_path, output_path, "model")
+                results[i] = "model"
+            except Exception as e:
+                self.logger.error(f"Failed to remove background from {input_path.name}: {e}")
+        return results
+
+
+# Per-process removers for job pool workers, kept for the life of the worker;
+# their sessions live in the worker's session registry
+_worker_removers: Dict[str, BackgroundRemover] = {}
+
+def _worker_remover(model_name: str, options: Optional[Dict] = None) -> BackgroundRemover:
+    """Worker's remover for *model_name*, configured from the task's options
+    
+    Options: ``mask_cache`` as a (directory, byte budget) pair,
+    ``flat_tolerance`` and ``lowres_size``.
+    """
+    options = options or {}
+    remover = _worker_removers.get(model_name)
+    if remover is None:
+        remover = _worker_removers[model_name] = BackgroundRemover(model_name)
+    mask_cache = options.get('mask_cache')
+    if mask_cache is not None and remover.mask_cache is None:
+        from ..services.derivative_cache import DerivativeCache
+        cache_dir, budget_bytes = mask_cache
+        remover.mask_cache = DerivativeCache(Path(cache_dir), budget_bytes)
+    remover.flat_tolerance = options.get('flat_tolerance', remover.flat_tolerance)
+    remover.lowres_size = options.get('lowres_size', remover.lowres_size)
+    return remover
+
+def _task_result(input_path: str, output_path: str, method: Optional[str]) -> Dict:
+    result = {'input': Path(input_path).name, 'output': output_path, 'success': method is not None}
+    if method is None:
+        result['error'] = f"Background removal failed for {Path(input_path).name}"
+    else:
+        result['method'] = method
+    return result
+
+def remove_background_task(input_path: str, output_path: str, model_name: str = "u2net",
+                           options: Optional[Dict] = None) -> Dict:
+    """Job pool task: remove the background of one image (runs in a worker process)"""
+    method = _worker_remover(model_name, options).remove_background(Path(input_path), Path(output_path))
+    return _task_result(input_path, output_path, method)
+
+def remove_background_batch_task(input_paths: List[str], output_paths: List[str], model_name: str = "u2net",
+                                 options: Optional[Dict] = None) -> List[Dict]:
+    """Job pool task: remove the backgrounds of several images with one batched inference"""
+    remover = _worker_remover(model_name, options)
+    if not remover.supports_batching:
+        return [remove_background_task(i, o, model_name, options) for i, o in zip(input_paths, output_paths)]
+    methods = remover.process_images([(Path(i), Path(o)) for i, o in zip(input_paths, output_paths)])
+    return [_task_result(i, o, method) for i, o, method in zip(input_paths, output_paths, methods)]
@@ -0,0 +1,106 @@
+# src/processors/flat_background.py
+"""
+Color-key background removal for images on a flat, uniform background
+"""
+
+from typing import Optional
+import numpy as np
+from PIL import Image
+
+# Border pixels sampled per edge; enough to judge uniformity without touching every pixel
+BORDER_SAMPLES = 512
+
+def _border_pixels(arr: np.ndarray) -> np.ndarray:
+    """Evenly spaced pixels from all four edges, as an (N, C) array"""
+    h, w = arr.shape[:2]
+    rows = np.linspace(0, h - 1, min(h, BORDER_SAMPLES)).astype(int)
+    cols = np.linspace(0, w - 1, min(w, BORDER_SAMPLES)).astype(int)
+    return np.concatenate([arr[0, cols], arr[-1, cols], arr[rows, 0], arr[rows, -1]])
+
+def _color_distance(arr: np.ndarray, color: np.ndarray) -> np.ndarray:
+    """Largest per-channel difference from *color* (uint8 result)"""
+    diff = np.maximum(arr, color) - np.minimum(arr, color)
+    return np.maximum(np.maximum(diff[..., 0], diff[..., 1]), diff[..., 2])
+
+def _row_run_ids(mask: np.ndarray) -> np.ndarray:
+    """Label each pixel with the id of its run of equal values along its row"""
+    h, w = mask.shape
+    flat = mask.ravel()
+    starts = np.empty(h * w, dtype=bool)
+    starts[0] = True
+    np.not_equal(flat[1:], flat[:-1], out=starts[1:])
+    starts[::w] = True
+    return (np.cumsum(starts, dtype=np.int32) - 1).reshape(h, w)
+
+def _connected_to_border(near: np.ndarray, max_sweeps: int = 32) -> np.ndarray:
+    """Pixels of *near* 4-connected to the image border (tolerance flood fill)
+
+    Sweeps alternate between rows and columns and fill whole runs of *near*
+    pixels at once, so the background around a logo fills in a few passes
+    instead of pixel by pixel. Pockets still unreached after *max_sweeps*
+    are kept as foreground.
+    """
+    row_runs = _row_run_ids(near)
+    col_runs = _row_run_ids(np.ascontiguousarray(near.T)).T
+    reached = np.zeros_like(near)
+    reached[[0, -1], :] = near[[0, -1], :]
+    reached[:, [0, -1]] = near[:, [0, -1]]
+    count = np.count_nonzero(reached)
+    for sweep in range(max_sweeps):
+        runs = row_runs if sweep % 2 == 0 else col_runs
+        seeded = np.zeros(int(runs[-1, -1]) + 1, dtype=bool)
+        seeded[runs[reached]] = True
+        reached = seeded[runs] & near
+        new_count = np.count_nonzero(reached)
+        # A sweep that adds nothing means both directions are closed
+        if new_count == count and sweep > 0:
+            break
+        count = new_count
+    return reached
+
+def _dilate(mask: np.ndarray) -> np.ndarray:
+    """Binary dilation by one pixel (4-neighbourhood)"""
+    grown = mask.copy()
+    grown[1:, :] |= mask[:-1, :]
+    grown[:-1, :] |= mask[1:, :]
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+    return grown
+
+def flat_background_mask(img: Image.Image, tolerance: int = 24, min_border_uniformity: float = 0.98,
+                         min_background: float = 0.05, min_foreground: float = 0.001) -> Optional[Image.Image]:
+    """Alpha mask (mode L) for an image on a near-uniform background, or None
+
+    The background color is the median of the border pixels. The fast path is
+    only taken when at least *min_border_uniformity* of them lie within
+    *tolerance* of it and the flood-filled background and the remaining
+    foreground are both plausibly sized; otherwise None is returned and the
+    caller should run the model. Pixels along the cut are given partial
+    alpha by their color distance from the background, which keeps the
+    anti-aliased edges of the artwork.
+    """
+    if img.mode == 'RGBA':
+        border_alpha = _border_pixels(np.asarray(img.getchannel('A')))
+        if np.count_nonzero(border_alpha < 8) >= min_border_uniformity * border_alpha.size:
+            # Already cut out: the existing alpha is the mask
+            return img.getchannel('A')
+    arr = np.asarray(img.convert('RGB'))
+
+    border = _border_pixels(arr)
+    background = np.median(border, axis=0).astype(np.uint8)
+    if np.count_nonzero(_color_distance(border, background) <= tolerance) < min_border_uniformity * len(border):
+        return None
+
+    distance = _color_distance(arr, background)
+    removed = _connected_to_border(distance <= tolerance)
+    fraction = np.count_nonzero(removed) / removed.size
+    if fraction < min_background or fraction > 1 - min_foreground:
+        return None
+
+    mask = np.where(removed, 0, 255).astype(np.uint8)
+    # Anti-alias: foreground pixels touching the background ramp from 0 at the
+    # tolerance to opaque at three times it
+    edge = _dilate(removed) & ~removed
+    ramp = (distance[edge].astype(np.float32) - tolerance) / (2 * tolerance)
+    mask[edge] = (np.clip(ramp, 0, 1) * 255).astype(np.uint8)
+    return Image.fromarray(mask, mode='L')
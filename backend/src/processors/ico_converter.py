@@ -3,14 +3,130 @@
 ICO file converter using Pillow
 """
 
+import io
+import json
 import logging
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from PIL import Image
 
+from .pyramid import ImagePyramid
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Channels per PNG color type, to turn the IHDR bit depth into bits per pixel
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+def read_ico_frames(ico_path: Path) -> List[Dict]:
+    """List the frames of an ICO file from its headers, without decoding pixels
+
+    Reads the ICONDIR and ICONDIRENTRY records, then the first bytes of each
+    frame to tell an embedded PNG (whose IHDR gives the real size and depth)
+    from a BMP (whose DIB header gives the depth when the entry leaves it 0).
+    Raises ValueError when the file is not a well-formed icon.
+    """
+    with open(ico_path, 'rb') as f:
+        file_size = f.seek(0, 2)
+        f.seek(0)
+        reserved, icon_type, count = struct.unpack('<HHH', f.read(6))
+        if reserved != 0 or icon_type != 1:
+            raise ValueError("not an ICO file")
+        if count == 0:
+            raise ValueError("ICO file has no frames")
+        directory = f.read(16 * count)
+        if len(directory) < 16 * count:
+            raise ValueError("truncated ICO directory")
+        
+        frames = []
+        for width, height, _colors, _reserved, _planes, bit_count, size, offset in struct.iter_unpack('<BBBBHHII', directory):
+            if size == 0:
+                raise ValueError("ICO directory has an empty frame")
+            if offset + size > file_size:
+                raise ValueError(f"frame data at {offset} ({size} bytes) lies outside the file")
+            f.seek(offset)
+            head = f.read(26)
+            frame = {
+                'width': width or 256,
+                'height': height or 256,
+                'bit_depth': bit_count,
+                'format': 'bmp',
+                'offset': offset,
+                'size_bytes': size,
+            }
+            if head.startswith(PNG_SIGNATURE):
+                png_width, png_height, depth, color_type = struct.unpack('>IIBB', head[16:26])
+                frame.update(width=png_width, height=png_height, format='png',
+                             bit_depth=depth * PNG_CHANNELS.get(color_type, 1))
+            elif len(head) >= 16 and not bit_count:
+                frame['bit_depth'] = struct.unpack('<H', head[14:16])[0]
+            frames.append(frame)
+    return frames
+
+def _ico_bmp_frame(img: Image.Image) -> bytes:
+    """32-bit BGRA DIB with its 1-bit AND mask, as stored in an ICO entry"""
+    arr = np.asarray(img.convert('RGBA'))
+    height, width = arr.shape[:2]
+    # Rows are stored bottom-up; the header height covers color + mask
+    pixels = np.ascontiguousarray(arr[::-1, :, [2, 1, 0, 3]]).tobytes()
+    mask_row_bytes = (width + 31) // 32 * 4
+    mask = np.zeros((height, mask_row_bytes * 8), dtype=bool)
+    mask[:, :width] = arr[::-1, :, 3] == 0
+    mask_bytes = np.packbits(mask, axis=1).tobytes()
+    header = struct.pack('<IiiHHIIiiII', 40, width, height * 2, 1, 32, 0,
+                         len(pixels) + len(mask_bytes), 0, 0, 0, 0)
+    return header + pixels + mask_bytes
+
+def _ico_png_frame(img: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+def encode_ico_frame(img: Image.Image, png_from: int = 256) -> bytes:
+    """Entry payload for one ICO frame: BMP below *png_from* pixels, PNG from it
+
+    Only the 256 frame is PNG-compressed, the layout Windows itself uses:
+    PNG entries are read from Vista on and, by older readers, only at 256.
+    Smaller frames stay BMP, which every Windows version and legacy browser
+    reads (a 256 bitmap would be 262 KB raw).
+    """
+    if max(img.size) >= png_from:
+        return _ico_png_frame(img)
+    return _ico_bmp_frame(img)
+
+def write_ico(output_path: Path, frames: List[Image.Image], payloads: List[bytes]):
+    """Write an ICO file from already encoded frame payloads"""
+    directory = struct.pack('<HHH', 0, 1, len(frames))
+    offset = 6 + 16 * len(frames)
+    for img, payload in zip(frames, payloads):
+        width, height = img.size
+        # 0 in the directory means 256
+        directory += struct.pack('<BBBBHHII', width % 256, height % 256, 0, 0, 1, 32, len(payload), offset)
+        offset += len(payload)
+    with open(output_path, 'wb') as f:
+        f.write(directory)
+        for payload in payloads:
+            f.write(payload)
+
 class ICOConverter:
     """Convert images to ICO format with multiple sizes"""
     
+    # Plain PNG icons of a favicon bundle: file name -> edge
+    BUNDLE_PNGS = {
+        'favicon-16x16.png': 16,
+        'favicon-32x32.png': 32,
+        'android-chrome-192x192.png': 192,
+        'android-chrome-512x512.png': 512,
+    }
+    APPLE_TOUCH_SIZE = 180
+    MASKABLE_SIZES = (192, 512)
+    # Share of a maskable icon's edge given to the artwork; the rest is padding
+    # so launcher masks (circle, squircle) don't clip it
+    MASKABLE_CONTENT = 0.8
+    
     def __init__(self, ico_sizes: List[int] = None):
         self.ico_sizes = ico_sizes or [16, 32, 48, 64, 128, 256]
         self.logger = logging.getLogger("processor.ico_converter")
@@ -18,30 +134,17 @@ class ICOConverter:
     def convert_image(self, input_path: Path, output_path: Path) -> bool:
         """Convert single image to ICO format"""
         try:
-            with Image.open(input_path) as img:
-                # Convert to RGBA for transparency support
-                if img.mode != 'RGBA':
-                    img = img.convert('RGBA')
-                
-                # Create different sizes
-                resized_images = []
-                
-                for size in self.ico_sizes:
-                    # Resize maintaining aspect ratio
-                    resized = img.resize((size, size), Image.Resampling.LANCZOS)
-                    resized_images.append(resized)
-                
-                # Ensure output directory exists
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Save as ICO with multiple sizes
-                img.save(
-                    output_path, 
-                    format='ICO', 
-                    sizes=[(size, size) for size in self.ico_sizes],
-                    append_images=resized_images[1:] if len(resized_images) > 1 else None
-                )
-                
+            # Decode once and derive every frame from the next larger one;
+            # non-square sources are padded like the favicon bundle's icons
+            largest = max(self.ico_sizes)
+            pyramid = ImagePyramid.open(input_path, mode='RGBA', largest=(largest, largest))
+            frames = [self._square(pyramid, size) for size in sorted(self.ico_sizes, reverse=True)]
+            
+            # Ensure output directory exists
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            write_ico(output_path, frames, [encode_ico_frame(frame) for frame in frames])
+            
             self.logger.info(f"ICO created: {input_path.name} -> {output_path.name}")
             return True
             
@@ -49,6 +152,91 @@ class ICOConverter:
             self.logger.error(f"Failed to convert {input_path.name} to ICO: {e}")
             return False
     
+    @staticmethod
+    def _square(pyramid: ImagePyramid, edge: int, content: int = 0,
+                background: Optional[Tuple[int, int, int]] = None) -> Image.Image:
+        """*edge*-pixel square icon with the image fitted, centered, into *content* pixels
+        
+        Non-square sources are padded rather than stretched. With a
+        *background* color the icon is opaque.
+        """
+        content = content or edge
+        if pyramid.size[0] == pyramid.size[1]:
+            art = pyramid.resize((content, content))
+        else:
+            scale = content / max(pyramid.size)
+            art = pyramid.resize((max(1, round(pyramid.size[0] * scale)), max(1, round(pyramid.size[1] * scale))))
+        if art.size == (edge, edge) and background is None:
+            return art
+        canvas = Image.new('RGBA', (edge, edge), background + (255,) if background else (0, 0, 0, 0))
+        canvas.alpha_composite(art, ((edge - art.width) // 2, (edge - art.height) // 2))
+        return canvas.convert('RGB') if background else canvas
+    
+    def create_favicon_bundle(self, input_path: Path, output_dir: Path,
+                              background: Tuple[int, int, int] = (255, 255, 255),
+                              app_name: Optional[str] = None) -> Dict[str, Path]:
+        """Write a web icon set for one image into *output_dir*
+        
+        favicon.ico (ico_sizes), the BUNDLE_PNGS, apple-touch-icon.png
+        (opaque on *background*), maskable-<size>.png icons (artwork padded
+        into the safe zone on *background*) and a site.webmanifest listing the
+        Android and maskable icons. The source is decoded once and every
+        size derived from an ImagePyramid, largest first; the outputs are then
+        encoded in parallel. Returns file name -> path, empty on failure.
+        """
+        try:
+            # (output name or ICO frame size, edge, artwork size, background)
+            specs = [(size, size, size, None) for size in self.ico_sizes]
+            specs += [(name, size, size, None) for name, size in self.BUNDLE_PNGS.items()]
+            specs.append(('apple-touch-icon.png', self.APPLE_TOUCH_SIZE, self.APPLE_TOUCH_SIZE, background))
+            specs += [(f"maskable-{size}.png", size, round(size * self.MASKABLE_CONTENT), background)
+                      for size in self.MASKABLE_SIZES]
+            
+            largest = max(spec[2] for spec in specs)
+            pyramid = ImagePyramid.open(input_path, mode='RGBA', largest=(largest, largest))
+            # Resize sequentially, largest artwork first, so each size is
+            # derived from the next larger pyramid level
+            images = {}
+            for key, edge, content, fill in sorted(specs, key=lambda spec: -spec[2]):
+                images[key] = self._square(pyramid, edge, content, fill)
+            ico_frames = [images.pop(size) for size in sorted(self.ico_sizes, reverse=True)]
+            
+            output_dir.mkdir(parents=True, exist_ok=True)
+            outputs = {name: output_dir / name for name in images}
+            outputs['favicon.ico'] = output_dir / 'favicon.ico'
+            
+            # Pillow releases the GIL while compressing, so threads encode in parallel
+            with ThreadPoolExecutor(max_workers=min(len(images) + len(ico_frames), os.cpu_count() or 1)) as pool:
+                ico_payloads = pool.map(encode_ico_frame, ico_frames)
+                saves = [pool.submit(img.save, outputs[name], 'PNG', optimize=True) for name, img in images.items()]
+                write_ico(outputs['favicon.ico'], ico_frames, list(ico_payloads))
+                for save in saves:
+                    save.result()
+            
+            manifest_icons = [
+                {'src': name, 'sizes': f"{size}x{size}", 'type': 'image/png'}
+                for name, size in self.BUNDLE_PNGS.items() if name.startswith('android-chrome')
+            ]
+            manifest_icons += [
+                {'src': f"maskable-{size}.png", 'sizes': f"{size}x{size}", 'type': 'image/png', 'purpose': 'maskable'}
+                for size in self.MASKABLE_SIZES
+            ]
+            manifest = {
+                'name': app_name or input_path.stem,
+                'icons': manifest_icons,
+                'background_color': '#%02x%02x%02x' % background,
+                'display': 'standalone',
+            }
+            outputs['site.webmanifest'] = output_dir / 'site.webmanifest'
+            outputs['site.webmanifest'].write_text(json.dumps(manifest, indent=2))
+            
+            self.logger.info(f"Favicon bundle created: {input_path.name} -> {output_dir} ({len(outputs)} files)")
+            return outputs
+            
+        except Exception as e:
+            self.logger.error(f"Failed to create favicon bundle for {input_path.name}: {e}")
+            return {}
+    
     def convert_batch(self, input_paths: List[Path], output_dir: Path) -> List[Path]:
         """Convert multiple images to ICO format"""
         
@@ -68,31 +256,20 @@ class ICOConverter:
     def verify_ico(self, ico_path: Path) -> bool:
         """Verify ICO file is valid and report sizes"""
         try:
-            with Image.open(ico_path) as img:
-                # ICO files can contain multiple images
-                sizes_found = []
-                
-                try:
-                    # Try to get all sizes
-                    for i in range(100):  # Arbitrary limit
-                        img.seek(i)
-                        sizes_found.append(img.size)
-                except EOFError:
-                    # Normal - reached end of ICO frames
-                    pass
-                
-                self.logger.info(f"ICO verified: {ico_path.name} contains {len(sizes_found)} sizes: {sizes_found}")
-                return True
+            sizes_found = [(frame['width'], frame['height']) for frame in read_ico_frames(ico_path)]
+            self.logger.info(f"ICO verified: {ico_path.name} contains {len(sizes_found)} sizes: {sizes_found}")
+            return True
                 
         except Exception as e:
             self.logger.error(f"ICO verification failed for {ico_path.name}: {e}")
             return False
     
     def get_ico_info(self, ico_path: Path) -> dict:
-        """Get detailed information about ICO file"""
+        """Get detailed information about ICO file (read from its headers only)"""
         info = {
             "valid": False,
             "sizes": [],
+            "frames": [],
             "file_size_kb": 0,
             "format": None
         }
@@ -100,21 +277,21 @@ class ICOConverter:
         try:
             if ico_path.exists():
                 info["file_size_kb"] = ico_path.stat().st_size / 1024
-                
-                with Image.open(ico_path) as img:
-                    info["format"] = img.format
-                    
-                    # Get all sizes in the ICO
-                    try:
-                        for i in range(100):
-                            img.seek(i)
-                            info["sizes"].append(img.size)
-                    except EOFError:
-                        pass
-                    
-                    info["valid"] = len(info["sizes"]) > 0
+                info["frames"] = read_ico_frames(ico_path)
+                info["format"] = "ICO"
+                info["sizes"] = [(frame['width'], frame['height']) for frame in info["frames"]]
+                info["valid"] = len(info["sizes"]) > 0
                     
         except Exception as e:
             self.logger.error(f"Failed to get ICO info for {ico_path}: {e}")
         
         return info
+
+
+def convert_ico_task(input_path: str, output_path: str, ico_sizes: Optional[List[int]] = None) -> Dict:
+    """Job pool task: convert one image to ICO (runs in a worker process)"""
+    success = ICOConverter(ico_sizes).convert_image(Path(input_path), Path(output_path))
+    result = {'input': Path(input_path).name, 'output': output_path, 'success': success}
+    if not success:
+        result['error'] = f"ICO conversion failed for {Path(input_path).name}"
+    return result
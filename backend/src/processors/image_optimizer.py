@@ -3,10 +3,27 @@
 Image optimization processor
 """
 
+import io
 import logging
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict, Any
-from PIL import Image, ImageEnhance
+from PIL import Image, ImageEnhance, ImageOps, features
+
+from .pyramid import ImagePyramid
+
+# Derivative formats: name -> (Pillow format, MIME type, file suffix)
+DERIVATIVE_FORMATS = {
+    'avif': ('AVIF', 'image/avif', '.avif'),
+    'webp': ('WEBP', 'image/webp', '.webp'),
+    'jpeg': ('JPEG', 'image/jpeg', '.jpg'),
+    'png': ('PNG', 'image/png', '.png'),
+}
+
+def derivative_format_available(fmt: str) -> bool:
+    """Whether this Pillow build can encode the derivative format"""
+    if fmt in ('avif', 'webp'):
+        return bool(features.check(fmt))
+    return fmt in DERIVATIVE_FORMATS
 
 class ImageOptimizer:
     """Optimize images for size and quality"""
@@ -16,8 +33,13 @@ class ImageOptimizer:
     
     def optimize_image(self, input_path: Path, output_path: Path, 
                       max_size_kb: int = 500, quality: int = 85, 
-                      enhance: bool = False) -> bool:
-        """Optimize single image for file size and optionally enhance"""
+                      enhance: bool = False, subsampling: int = -1) -> bool:
+        """Optimize single image for file size and optionally enhance
+        
+        JPEG output is lowered in quality until it fits *max_size_kb*;
+        *subsampling* is Pillow's JPEG chroma subsampling (-1: encoder
+        default, 0: 4:4:4, 1: 4:2:2, 2: 4:2:0).
+        """
         try:
             with Image.open(input_path) as img:
                 original_size = input_path.stat().st_size / 1024
@@ -42,7 +64,8 @@ class ImageOptimizer:
                 if output_path.suffix.lower() == '.png':
                     img.save(output_path, 'PNG', optimize=True)
                 elif output_path.suffix.lower() in ['.jpg', '.jpeg']:
-                    img.save(output_path, 'JPEG', quality=quality, optimize=True)
+                    # Find the encode that fits in memory; only the winner hits the disk
+                    output_path.write_bytes(self._reduce_quality(img, max_size_kb, quality, subsampling))
                 else:
                     # Default to PNG
                     output_path = output_path.with_suffix('.png')
@@ -56,10 +79,6 @@ class ImageOptimizer:
                                f"({original_size:.1f} KB -> {file_size_kb:.1f} KB, "
                                f"{compression_ratio:.1f}% reduction)")
                 
-                # If still too large, try reducing quality/size
-                if file_size_kb > max_size_kb and output_path.suffix.lower() in ['.jpg', '.jpeg']:
-                    self._reduce_quality(output_path, max_size_kb, quality)
-                
                 return True
                 
         except Exception as e:
@@ -87,36 +106,62 @@ class ImageOptimizer:
             self.logger.warning(f"Failed to enhance image: {e}")
             return img
     
-    def _reduce_quality(self, image_path: Path, max_size_kb: int, initial_quality: int):
-        """Reduce JPEG quality to meet size requirements"""
-        try:
-            with Image.open(image_path) as img:
-                quality = initial_quality
-                
-                while quality > 30:  # Don't go below 30% quality
-                    quality -= 10
-                    img.save(image_path, 'JPEG', quality=quality, optimize=True)
-                    
-                    file_size_kb = image_path.stat().st_size / 1024
-                    if file_size_kb <= max_size_kb:
-                        self.logger.info(f"Reduced quality to {quality}% for size optimization")
-                        break
-                        
-        except Exception as e:
-            self.logger.warning(f"Failed to reduce quality for {image_path.name}: {e}")
+    @staticmethod
+    def _encode_jpeg(img: Image.Image, quality: int, subsampling: int) -> bytes:
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=quality, optimize=True, subsampling=subsampling)
+        return buffer.getvalue()
+    
+    def _reduce_quality(self, img: Image.Image, max_size_kb: int, initial_quality: int,
+                        subsampling: int = -1) -> bytes:
+        """Highest-quality JPEG encode of *img* within *max_size_kb*
+        
+        Tries *initial_quality*, then binary-searches the lower qualities
+        (steps of 10, down to 25) for the highest one that fits; encodes go
+        to memory buffers, so an image takes about 3 encodes instead of one
+        disk write per step. If even the lowest quality is too large and
+        *subsampling* keeps more chroma than 4:2:0, the search is repeated
+        with 4:2:0. When nothing fits, the smallest encode is returned.
+        """
+        max_bytes = max_size_kb * 1024
+        data = self._encode_jpeg(img, initial_quality, subsampling)
+        if len(data) <= max_bytes:
+            return data
+        
+        candidates = list(range(initial_quality - 10, 20, -10))  # descending
+        for chroma in ([subsampling, 2] if subsampling in (0, 1) else [subsampling]):
+            best: Optional[Tuple[int, bytes]] = None
+            smallest = data
+            low, high = 0, len(candidates) - 1
+            while low <= high:
+                mid = (low + high) // 2
+                encoded = self._encode_jpeg(img, candidates[mid], chroma)
+                if len(encoded) <= max_bytes:
+                    best = (candidates[mid], encoded)
+                    high = mid - 1
+                else:
+                    smallest = encoded if len(encoded) < len(smallest) else smallest
+                    low = mid + 1
+            if best is not None:
+                self.logger.info(f"Reduced quality to {best[0]}% for size optimization")
+                return best[1]
+            data = smallest
+        
+        self.logger.warning(f"No JPEG quality fits {max_size_kb} KB; using the smallest encode")
+        return data
     
     def resize_image(self, input_path: Path, output_path: Path, 
                     target_size: Tuple[int, int], maintain_aspect: bool = True) -> bool:
         """Resize image to target dimensions"""
         try:
-            with Image.open(input_path) as img:
-                if maintain_aspect:
-                    img.thumbnail(target_size, Image.Resampling.LANCZOS)
-                else:
-                    img = img.resize(target_size, Image.Resampling.LANCZOS)
-                
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                img.save(output_path, optimize=True)
+            pyramid = ImagePyramid.open(input_path, largest=target_size)
+            if maintain_aspect:
+                img = pyramid.thumbnail(target_size)
+            else:
+                img = pyramid.resize(target_size)
+            
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            img.save(output_path, optimize=True)
                 
             self.logger.info(f"Resized: {input_path.name} -> {output_path.name} to {img.size}")
             return True
@@ -125,6 +170,53 @@ class ImageOptimizer:
             self.logger.error(f"Failed to resize {input_path.name}: {e}")
             return False
     
+    def render_derivative(self, input_path: Path, output_path: Path, fmt: str = 'webp',
+                          width: Optional[int] = None, height: Optional[int] = None,
+                          fit: str = 'contain', quality: int = 80) -> bool:
+        """Re-encode an image for serving, optionally resized
+        
+        fit='contain' scales down to fit within width x height (either may be
+        omitted); fit='cover' scales and center-crops to exactly width x height.
+        """
+        try:
+            pil_format = DERIVATIVE_FORMATS[fmt][0]
+            with Image.open(input_path) as img:
+                if fit == 'cover' and width and height:
+                    img = ImageOps.fit(img, (width, height), Image.Resampling.LANCZOS)
+                elif width or height:
+                    img.thumbnail((width or img.width, height or img.height), Image.Resampling.LANCZOS)
+                
+                has_alpha = img.mode in ('RGBA', 'LA') or 'transparency' in img.info
+                if pil_format == 'JPEG':
+                    if has_alpha:
+                        # JPEG has no alpha; flatten onto white like optimize_image
+                        rgba = img.convert('RGBA')
+                        background = Image.new('RGB', img.size, (255, 255, 255))
+                        background.paste(rgba, mask=rgba.split()[-1])
+                        img = background
+                    else:
+                        img = img.convert('RGB')
+                elif img.mode not in ('RGB', 'RGBA'):
+                    img = img.convert('RGBA' if has_alpha else 'RGB')
+                
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                if pil_format == 'WEBP':
+                    img.save(output_path, pil_format, quality=quality, method=4)
+                elif pil_format == 'AVIF':
+                    # speed 8: ~3x faster than the default at near-identical size
+                    img.save(output_path, pil_format, quality=quality, speed=8)
+                elif pil_format == 'JPEG':
+                    img.save(output_path, pil_format, quality=quality, optimize=True, progressive=True)
+                else:
+                    img.save(output_path, pil_format)
+            
+            self.logger.debug(f"Derivative created: {input_path.name} -> {fmt} {img.size}")
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Failed to create {fmt} derivative for {input_path.name}: {e}")
+            return False
+    
     def batch_optimize(self, input_paths: List[Path], output_dir: Path, **kwargs) -> List[Path]:
         """Optimize multiple images"""
         
@@ -181,13 +273,12 @@ class ImageOptimizer:
                         size: Tuple[int, int] = (128, 128)) -> bool:
         """Create thumbnail of image"""
         try:
-            with Image.open(input_path) as img:
-                img.thumbnail(size, Image.Resampling.LANCZOS)
-                
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Save as PNG to preserve quality
-                img.save(output_path, 'PNG', optimize=True)
+            img = ImagePyramid.open(input_path, largest=size).thumbnail(size)
+            
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Save as PNG to preserve quality
+            img.save(output_path, 'PNG', optimize=True)
                 
             self.logger.info(f"Thumbnail created: {input_path.name} -> {output_path.name}")
             return True
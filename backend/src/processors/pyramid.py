@@ -0,0 +1,102 @@
+# src/processors/pyramid.py
+"""
+Progressive downscale pyramid for producing several sizes from one decode
+"""
+
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from PIL import Image
+
+# Integer-reduce only while the remaining LANCZOS step still spans at least
+# this factor; Pillow's reducing_gap of 2 is indistinguishable from a full
+# LANCZOS resize at a fraction of the cost
+REDUCING_GAP = 2
+
+# Modes Image.reduce and LANCZOS handle directly; anything else is converted
+RESAMPLE_MODES = ('L', 'LA', 'RGB', 'RGBA')
+
+class ImagePyramid:
+    """A decoded image and every smaller level derived from it
+
+    Each requested size is made from the smallest level at least that large:
+    by ``Image.reduce`` (a cheap box average) for the integer part of the
+    ratio that leaves a REDUCING_GAP margin, then one LANCZOS resize for the
+    rest. Results are kept as levels, so asking for sizes largest first
+    derives each one from the previous instead of from full resolution.
+
+    ``reduce`` keeps a partial block at the right and bottom edges, so a
+    reduced level covers slightly less of the image than its pixel size
+    says; each level's extent (the image area in its own pixels) is kept
+    and passed as the LANCZOS box, which keeps results aligned with a
+    direct resize.
+    """
+
+    def __init__(self, img: Image.Image):
+        if img.mode not in RESAMPLE_MODES:
+            has_alpha = 'A' in img.mode or 'transparency' in img.info
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+        self.levels: List[Image.Image] = [img]
+        self._extents: List[Tuple[float, float]] = [img.size]
+
+    @classmethod
+    def open(cls, path: Path, mode: Optional[str] = None,
+             largest: Optional[Tuple[int, int]] = None) -> 'ImagePyramid':
+        """Decode *path* once, optionally as *mode*
+
+        With *largest*, the biggest size that will be requested, JPEGs are
+        decoded at the smallest DCT scale that still covers it.
+        """
+        with Image.open(path) as img:
+            if largest:
+                img.draft(None, largest)
+            return cls(img.convert(mode) if mode and img.mode != mode else img.copy())
+
+    @property
+    def base(self) -> Image.Image:
+        return self.levels[0]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.base.size
+
+    def _nearest_level(self, size: Tuple[int, int]) -> int:
+        """Index of the smallest level covering *size*, or of the base when none does (upscaling)"""
+        covering = [i for i, level in enumerate(self.levels) if level.width >= size[0] and level.height >= size[1]]
+        return min(covering, key=lambda i: self.levels[i].width * self.levels[i].height) if covering else 0
+
+    def _add_level(self, level: Image.Image, extent: Tuple[float, float]) -> Image.Image:
+        self.levels.append(level)
+        self._extents.append(extent)
+        return level
+
+    def resize(self, size: Tuple[int, int]) -> Image.Image:
+        """The image at exactly *size* (aspect ratio not preserved)"""
+        index = self._nearest_level(size)
+        level, extent = self.levels[index], self._extents[index]
+        if level.size == size and extent == size:
+            return level
+        factor = int(min(extent[0] / size[0], extent[1] / size[1]) // REDUCING_GAP)
+        if factor >= 2:
+            extent = (extent[0] / factor, extent[1] / factor)
+            level = self._add_level(level.reduce(factor), extent)
+        resized = level.resize(size, Image.Resampling.LANCZOS, box=(0, 0, *extent))
+        return self._add_level(resized, size)
+
+    def fit_size(self, box: Tuple[int, int]) -> Tuple[int, int]:
+        """Size within *box* keeping the aspect ratio; never larger than the image"""
+        width, height = self.size
+        if width <= box[0] and height <= box[1]:
+            return width, height
+        scale = min(box[0] / width, box[1] / height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def thumbnail(self, box: Tuple[int, int]) -> Image.Image:
+        """The image scaled down to fit *box*, like ``Image.thumbnail``"""
+        return self.resize(self.fit_size(box))
+
+    def sizes(self, sizes: Iterable[Tuple[int, int]]) -> List[Image.Image]:
+        """The image at each of *sizes* (in the given order), built largest first"""
+        sizes = list(sizes)
+        for size in sorted(set(sizes), key=lambda s: s[0] * s[1], reverse=True):
+            self.resize(size)
+        return [self.resize(size) for size in sizes]
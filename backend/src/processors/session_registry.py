@@ -0,0 +1,209 @@
+# src/processors/session_registry.py
+"""
+Process-wide registry of rembg sessions with a memory budget
+"""
+
+import gc
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import rembg
+
+logger = logging.getLogger("processor.session_registry")
+
+def _resident_bytes() -> int:
+    """Current resident set size of this process (0 where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _model_file_bytes(session) -> int:
+    model_path = getattr(getattr(session, 'inner_session', None), '_model_path', None)
+    try:
+        return os.path.getsize(model_path) if model_path else 0
+    except OSError:
+        return 0
+
+class _Entry:
+    __slots__ = ('session', 'load_seconds', 'size_bytes', 'loaded_at', 'last_used', 'uses')
+
+    def __init__(self, session, load_seconds: float, size_bytes: int):
+        self.session = session
+        self.load_seconds = load_seconds
+        self.size_bytes = size_bytes
+        self.loaded_at = self.last_used = time.time()
+        self.uses = 0
+
+class SessionRegistry:
+    """rembg sessions shared by every BackgroundRemover in the process
+
+    Each model is loaded once (concurrent first requests wait for the same
+    load) and kept while the estimated resident size of all sessions fits
+    ``budget_bytes`` (0: unlimited); beyond that the least recently used
+    other sessions are dropped. A session's size is the growth in RSS while
+    it loaded, but at least its model file size (the weights are resident
+    however much freed memory the load reused).
+
+    With a ``report_dir``, the registry writes ``sessions-<pid>.json`` there
+    after every load or eviction so the API can report on pool workers.
+    """
+
+    def __init__(self, budget_bytes: int = 0, report_dir: Optional[Path] = None):
+        self.budget_bytes = budget_bytes
+        self.report_dir = report_dir
+        self._lock = threading.Lock()
+        self._sessions: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def configure(self, budget_bytes: int, report_dir: Optional[Path] = None):
+        self.budget_bytes = budget_bytes
+        self.report_dir = report_dir
+        with self._lock:
+            self._enforce_budget(keep=None)
+        self._write_report()
+
+    def get(self, model_name: str):
+        """The session for *model_name*, loading it on first use"""
+        with self._lock:
+            entry = self._touch(model_name)
+            if entry is not None:
+                return entry.session
+            load_lock = self._loading.setdefault(model_name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._touch(model_name)
+                if entry is not None:
+                    return entry.session
+            entry = self._load(model_name)
+            with self._lock:
+                self._sessions[model_name] = entry
+                self._loading.pop(model_name, None)
+                entry.uses += 1
+                self._enforce_budget(keep=model_name)
+        self._write_report()
+        return entry.session
+
+    def _touch(self, model_name: str) -> Optional[_Entry]:
+        entry = self._sessions.get(model_name)
+        if entry is not None:
+            self._sessions.move_to_end(model_name)
+            entry.last_used = time.time()
+            entry.uses += 1
+        return entry
+
+    def _load(self, model_name: str) -> _Entry:
+        logger.info(f"Loading background removal model: {model_name}")
+        rss_before = _resident_bytes()
+        start = time.perf_counter()
+        session = rembg.new_session(model_name)
+        load_seconds = time.perf_counter() - start
+        size_bytes = max(_resident_bytes() - rss_before, _model_file_bytes(session))
+        logger.info(f"Loaded {model_name} in {load_seconds:.2f}s (~{size_bytes / 2**20:.0f} MiB resident)")
+        return _Entry(session, load_seconds, size_bytes)
+
+    def _enforce_budget(self, keep: Optional[str]):
+        """Drop least recently used sessions (never *keep*) until within budget"""
+        if self.budget_bytes <= 0:
+            return
+        total = sum(entry.size_bytes for entry in self._sessions.values())
+        for model_name in list(self._sessions):
+            if total <= self.budget_bytes:
+                break
+            if model_name == keep:
+                continue
+            total -= self._sessions.pop(model_name).size_bytes
+            logger.info(f"Evicted model {model_name} to stay within the session budget")
+        gc.collect()
+        if total > self.budget_bytes:
+            logger.warning(f"Loaded models use ~{total / 2**20:.0f} MiB, over the "
+                           f"{self.budget_bytes / 2**20:.0f} MiB session budget")
+
+    def preload(self, model_names: Iterable[str]):
+        """Load models up front; failures are logged, not raised"""
+        for model_name in model_names:
+            try:
+                self.get(model_name)
+            except Exception as e:
+                logger.error(f"Failed to preload model {model_name}: {e}")
+
+    def evict(self, model_name: str) -> bool:
+        with self._lock:
+            entry = self._sessions.pop(model_name, None)
+        if entry is None:
+            return False
+        del entry
+        gc.collect()
+        self._write_report()
+        return True
+
+    def stats(self) -> Dict:
+        """Loaded sessions (most recently used last) with load time and size"""
+        with self._lock:
+            sessions = [
+                {
+                    'model': model_name,
+                    'load_seconds': round(entry.load_seconds, 3),
+                    'size_bytes': entry.size_bytes,
+                    'loaded_at': entry.loaded_at,
+                    'last_used': entry.last_used,
+                    'uses': entry.uses,
+                }
+                for model_name, entry in self._sessions.items()
+            ]
+        return {
+            'pid': os.getpid(),
+            'budget_bytes': self.budget_bytes,
+            'total_bytes': sum(session['size_bytes'] for session in sessions),
+            'sessions': sessions,
+        }
+
+    def _write_report(self):
+        if self.report_dir is None:
+            return
+        try:
+            self.report_dir.mkdir(parents=True, exist_ok=True)
+            path = self.report_dir / f"sessions-{os.getpid()}.json"
+            tmp = path.with_suffix('.json.tmp')
+            tmp.write_text(json.dumps(self.stats()))
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning(f"Failed to write session report: {e}")
+
+# The registry every BackgroundRemover in this process uses
+session_registry = SessionRegistry()
+
+def init_worker_sessions(budget_bytes: int, report_dir: Optional[str], preload: Iterable[str] = ()):
+    """Job pool initializer: configure this worker's registry and warm its models"""
+    session_registry.configure(budget_bytes, Path(report_dir) if report_dir else None)
+    session_registry.preload(preload)
+
+def read_session_reports(report_dir: Path) -> list:
+    """Session stats of every live process that reported into *report_dir*
+
+    Reports left behind by processes that have exited are removed.
+    """
+    reports = []
+    if not report_dir.exists():
+        return reports
+    for path in sorted(report_dir.glob("sessions-*.json")):
+        try:
+            pid = int(path.stem.split('-', 1)[1])
+            os.kill(pid, 0)
+        except (ValueError, ProcessLookupError):
+            path.unlink(missing_ok=True)
+            continue
+        except PermissionError:
+            pass
+        try:
+            reports.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return reports
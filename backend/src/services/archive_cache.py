@@ -0,0 +1,83 @@
+"""
+Disk cache for bulk-download ZIP archives
+Keyed by the selection's names and file versions; filled while the first download streams
+"""
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from ..utils.file_utils import CacheBudget
+
+logger = logging.getLogger('omnimage.archive_cache')
+
+
+class ArchiveCache:
+    """ZIP archives of image selections, stored as ``{key}.zip``
+
+    The key hashes the sorted (archive name, mtime_ns, size) of every member,
+    so any change to the selection or to a member's file produces a new key
+    and stale archives are simply never hit again. Archives are written by
+    teeing the live download stream into a temp file that is moved into
+    place only when the stream completes; an aborted download caches nothing.
+    Hits touch the file's mtime and eviction drops least recently used
+    archives once the byte budget is exceeded.
+    """
+
+    def __init__(self, cache_dir: Path, budget_bytes: int):
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._budget = CacheBudget(cache_dir, budget_bytes, pattern="*.zip")
+
+    @staticmethod
+    def key_for(entries: List[Tuple[Path, str]]) -> str:
+        """Cache key for (file path, archive name) entries; stats each member once"""
+        members = []
+        for path, arcname in sorted(entries, key=lambda entry: entry[1]):
+            st = path.stat()
+            members.append((arcname, st.st_mtime_ns, st.st_size))
+        return hashlib.sha256(json.dumps(members, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Cached archive for *key* (marked as recently used), or None"""
+        path = self.cache_dir / f"{key}.zip"
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+
+    def store(self, key: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Pass *chunks* through unchanged while writing them to the cache under *key*
+
+        Archives larger than the whole budget are streamed but not kept.
+        """
+        tmp = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        written = 0
+        out = open(tmp, 'wb')
+        try:
+            for chunk in chunks:
+                if out is not None:
+                    out.write(chunk)
+                    written += len(chunk)
+                    if written > self.budget_bytes:
+                        out.close()
+                        out = None
+                        tmp.unlink()
+                yield chunk
+            if out is not None:
+                out.close()
+                out = None
+                os.replace(tmp, self.cache_dir / f"{key}.zip")
+                if self._budget.add(written):
+                    logger.info(f"Evicted cached archives: {self._budget.total_bytes} bytes kept")
+        finally:
+            if out is not None:
+                out.close()
+            if tmp.exists():
+                tmp.unlink()
@@ -0,0 +1,419 @@
+"""
+Compact columnar in-memory catalog
+Interned strings and array-backed columns instead of one dict per image
+"""
+import base64
+import bisect
+import json
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.error_handling import ValidationError
+from ..utils.naming import parse_filename
+from .catalog_index import UNLISTED_TYPES, file_version
+
+# Sort orders: name -> (column, descending)
+SORT_ORDERS = {
+    'newest': ('created', True),
+    'oldest': ('created', False),
+    'name': ('filename', False),
+    'largest': ('size', True),
+    'smallest': ('size', False),
+}
+
+# Equality filters accepted by query_images (comma-separated values allowed)
+FILTER_COLUMNS = ('provider', 'model', 'prompt_id', 'type')
+
+MAX_PAGE_SIZE = 500
+
+# Sentinel for created_at values that aren't a valid timestamp ('unknown' etc.)
+NO_TIMESTAMP = -1
+
+
+def encode_cursor(sort: str, value, seq: int) -> str:
+    """Opaque keyset cursor pointing just after (value, seq) in the given sort order"""
+    raw = json.dumps([sort, value, seq], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[object, int]:
+    """Decode a cursor produced by encode_cursor for the same sort order"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, seq = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValidationError("Invalid cursor", {'after': cursor})
+    if cursor_sort != sort:
+        raise ValidationError("Cursor does not match sort order", {'after': cursor, 'sort': sort})
+    # Values are compared against the sort column, so their types must match it
+    value_type = str if SORT_ORDERS[sort][0] == 'filename' else int
+    if type(value) is not value_type or type(seq) is not int:
+        raise ValidationError("Invalid cursor", {'after': cursor})
+    return value, seq
+
+
+def created_key(created_at: str) -> int:
+    """'YYYY-MM-DD HH:MM:SS' -> YYYYMMDDHHMMSS as an int (sortable, 8 bytes)"""
+    if len(created_at) == 19 and created_at[4] == '-':
+        return int(created_at[0:4] + created_at[5:7] + created_at[8:10]
+                   + created_at[11:13] + created_at[14:16] + created_at[17:19])
+    return NO_TIMESTAMP
+
+
+def parse_date_bound(value: str, end: bool) -> int:
+    """Date filter ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS') -> created key bound"""
+    digits = re.sub(r'[^0-9]', '', value)
+    if len(digits) not in (8, 14):
+        raise ValidationError(f"Invalid date: {value}", {'expected': 'YYYY-MM-DD[ HH:MM:SS]'})
+    if len(digits) == 8:
+        digits += '235959' if end else '000000'
+    return int(digits)
+
+
+class StringPool:
+    """Interns repeated strings (models, providers, prompt ids) as small ints"""
+
+    __slots__ = ('ids', 'values')
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: str) -> int:
+        idx = self.ids.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.ids[value] = idx
+            self.values.append(value)
+        return idx
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self.ids.get(value)
+
+
+class ImageEntry:
+    """One materialized catalog row, built only for rows being returned"""
+
+    __slots__ = ('filename', 'prompt_id', 'model', 'provider', 'created_at', 'extension',
+                 'size_bytes', 'width', 'height', 'path', 'type', 'version')
+
+    def __init__(self, filename, prompt_id, model, provider, created_at, extension,
+                 size_bytes, width, height, path, type, version):
+        self.filename = filename
+        self.prompt_id = prompt_id
+        self.model = model
+        self.provider = provider
+        self.created_at = created_at
+        self.extension = extension
+        self.size_bytes = size_bytes
+        self.width = width
+        self.height = height
+        self.path = path
+        self.type = type
+        self.version = version
+
+    def to_dict(self) -> Dict:
+        """API metadata shape
+
+        ``url`` always serves the original bytes (exports, downloads and
+        canvas work need them); ``display_url`` lets the server pick the
+        smallest format the client's Accept header lists.
+        """
+        return {
+            'prompt_id': self.prompt_id,
+            'model': self.model,
+            'provider': self.provider,
+            'created_at': self.created_at,
+            'extension': self.extension,
+            'filename': self.filename,
+            'size_mb': round(self.size_bytes / (1024 * 1024), 2),
+            'width': self.width,
+            'height': self.height,
+            'path': self.path,
+            'type': self.type,
+            'url': f"/api/v1/image/{self.filename}?v={self.version}&format=original",
+            'display_url': f"/api/v1/image/{self.filename}?v={self.version}",
+            'thumbnail_url': f"/api/v1/image/{self.filename}/thumb?v={self.version}"
+        }
+
+
+class ColumnarCatalog:
+    """In-memory image catalog stored column-wise
+
+    Strings that repeat across images (prompt_id, model, provider, type,
+    extension) are interned in StringPools and stored as integer ids;
+    timestamps, sizes and dimensions live in ``array`` columns. Only the
+    filename is kept as a per-row string. Rows are removed by swapping the
+    last row into the hole, so every mutation is O(1).
+
+    Filtering and sorting run on numpy views of the columns; sort
+    permutations are cached until the next mutation. All access goes
+    through one lock because numpy views pin the arrays' buffers.
+    """
+
+    def __init__(self, prefixes: Dict[str, str]):
+        # image type -> project-relative directory ('raw' -> 'output/raw')
+        self.prefixes = prefixes
+        self._type_by_prefix = {prefix: image_type for image_type, prefix in prefixes.items()}
+        self._lock = threading.RLock()
+
+        self.pools = {name: StringPool() for name in ('prompt_id', 'model', 'provider', 'type', 'extension')}
+        self.filenames: List[str] = []
+        self.columns = {
+            'prompt_id': array('I'),
+            'model': array('I'),
+            'provider': array('I'),
+            'type': array('B'),
+            'extension': array('H'),
+            'created': array('q'),
+            'size': array('q'),
+            'width': array('i'),
+            'height': array('i'),
+            'seq': array('Q'),
+            'version': array('I'),
+        }
+        # type id -> {filename: row}; keys share the string objects in self.filenames
+        self._rows: Dict[int, Dict[str, int]] = {}
+        self._next_seq = 0
+        self._sorted: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    # ------------------------------------------------------------------
+    # Mutation (fed by CatalogIndex change notifications)
+    # ------------------------------------------------------------------
+
+    def upsert_rows(self, rows: Iterable[tuple]):
+        """Apply index rows: (path, filename, type, prompt_id, model, provider,
+        created_at, extension, size_bytes, mtime_ns, width, height)"""
+        with self._lock:
+            for (_, filename, image_type, prompt_id, model, provider,
+                 created_at, extension, size_bytes, mtime_ns, width, height) in rows:
+                type_id = self.pools['type'].intern(image_type)
+                values = (
+                    self.pools['prompt_id'].intern(prompt_id),
+                    self.pools['model'].intern(model),
+                    self.pools['provider'].intern(provider),
+                    type_id,
+                    self.pools['extension'].intern(extension),
+                    created_key(created_at),
+                    size_bytes,
+                    -1 if width is None else width,
+                    -1 if height is None else height,
+                    self._next_seq,
+                    file_version(mtime_ns, size_bytes),
+                )
+                self._next_seq += 1
+
+                by_name = self._rows.setdefault(type_id, {})
+                row = by_name.get(filename)
+                if row is None:
+                    by_name[filename] = len(self.filenames)
+                    self.filenames.append(filename)
+                    for column, value in zip(self.columns.values(), values):
+                        column.append(value)
+                else:
+                    for column, value in zip(self.columns.values(), values):
+                        column[row] = value
+            self._sorted.clear()
+
+    def remove_paths(self, paths: Iterable[str]):
+        """Drop rows by project-relative path"""
+        with self._lock:
+            for path in paths:
+                prefix, _, filename = path.rpartition('/')
+                image_type = self._type_by_prefix.get(prefix)
+                type_id = self.pools['type'].lookup(image_type) if image_type else None
+                row = self._rows.get(type_id, {}).pop(filename, None)
+                if row is None:
+                    continue
+
+                last = len(self.filenames) - 1
+                if row != last:
+                    moved = self.filenames[last]
+                    self.filenames[row] = moved
+                    for column in self.columns.values():
+                        column[row] = column[last]
+                    self._rows[self.columns['type'][row]][moved] = row
+                self.filenames.pop()
+                for column in self.columns.values():
+                    column.pop()
+            self._sorted.clear()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def find(self, filename: str, type_order: Iterable[str]) -> Optional[str]:
+        """Project-relative path of the first type (in *type_order*) holding *filename*"""
+        with self._lock:
+            for image_type in type_order:
+                type_id = self.pools['type'].lookup(image_type)
+                if type_id is not None and filename in self._rows.get(type_id, {}):
+                    return f"{self.prefixes[image_type]}/{filename}"
+        return None
+
+    def entry(self, row: int) -> ImageEntry:
+        """Materialize one row"""
+        cols = self.columns
+        filename = self.filenames[row]
+        image_type = self.pools['type'].values[cols['type'][row]]
+        created = cols['created'][row]
+        if created == NO_TIMESTAMP:
+            # 'unknown' or an unparseable stamp; the memoized parser has the raw text
+            created_at = parse_filename(filename)['created_at']
+        else:
+            s = str(created)
+            created_at = f"{s[0:4]}-{s[4:6]}-{s[6:8]} {s[8:10]}:{s[10:12]}:{s[12:14]}"
+        width, height = cols['width'][row], cols['height'][row]
+        return ImageEntry(
+            filename=filename,
+            prompt_id=self.pools['prompt_id'].values[cols['prompt_id'][row]],
+            model=self.pools['model'].values[cols['model'][row]],
+            provider=self.pools['provider'].values[cols['provider'][row]],
+            created_at=created_at,
+            extension=self.pools['extension'].values[cols['extension'][row]],
+            size_bytes=cols['size'][row],
+            width=None if width < 0 else width,
+            height=None if height < 0 else height,
+            path=f"{self.prefixes[image_type]}/{filename}",
+            type=image_type,
+            version=f"{cols['version'][row]:08x}",
+        )
+
+    # ------------------------------------------------------------------
+    # Sorting / filtering
+    # ------------------------------------------------------------------
+
+    def _view(self, column: str) -> np.ndarray:
+        col = self.columns[column]
+        return np.frombuffer(col, dtype=col.typecode) if len(col) else np.empty(0, dtype=col.typecode)
+
+    def _sort_key(self, column: str):
+        """Row -> (sort value, seq) used for ordering and cursor positioning"""
+        seq = self.columns['seq']
+        values = self.filenames if column == 'filename' else self.columns[column]
+        return lambda row: (values[row], seq[row])
+
+    def _ascending(self, column: str) -> np.ndarray:
+        """Cached ascending (value, seq) permutation of all rows"""
+        perm = self._sorted.get(column)
+        if perm is None:
+            if column == 'filename':
+                # Stable sort by filename over seq order == (filename, seq) order,
+                # with a C-level key instead of building a tuple per row
+                order = np.argsort(self._view('seq'), kind='stable').tolist()
+                order.sort(key=self.filenames.__getitem__)
+                perm = np.array(order, dtype=np.uint32)
+            else:
+                perm = np.lexsort((self._view('seq'), self._view(column))).astype(np.uint32)
+            self._sorted[column] = perm
+        return perm
+
+    def _listed(self, column: str) -> np.ndarray:
+        """Ascending permutation by *column* without rows of UNLISTED_TYPES (cached)"""
+        key = f"{column}:listed"
+        perm = self._sorted.get(key)
+        if perm is None:
+            perm = self._ascending(column)
+            hidden = self._ids('type', UNLISTED_TYPES)
+            if hidden:
+                perm = perm[~np.isin(self._view('type')[perm], hidden)]
+            self._sorted[key] = perm
+        return perm
+
+    def _ids(self, column: str, values: Iterable[str]) -> List[int]:
+        pool = self.pools[column]
+        return [i for i in (pool.lookup(v) for v in values) if i is not None]
+
+    def _mask(self, filters: Dict[str, str], date_from: Optional[int], date_to: Optional[int],
+              match: Optional[List[Dict[str, Iterable[str]]]] = None) -> Optional[np.ndarray]:
+        """Boolean row mask for the given filters, or None when nothing is filtered"""
+        mask = None
+        for clause in match or ():
+            # A clause holds when any of its fields has one of the listed values
+            hit = np.zeros(len(self), dtype=bool)
+            for name, values in clause.items():
+                hit |= np.isin(self._view(name), self._ids(name, values))
+            mask = hit if mask is None else mask & hit
+
+        for name, value in filters.items():
+            if value is None or value == '':
+                continue
+            hit = np.isin(self._view(name), self._ids(name, [v for v in str(value).split(',') if v]))
+            mask = hit if mask is None else mask & hit
+
+        if date_from is not None or date_to is not None:
+            created = self._view('created')
+            hit = created != NO_TIMESTAMP
+            if date_from is not None:
+                hit &= created >= date_from
+            if date_to is not None:
+                hit &= created <= date_to
+            mask = hit if mask is None else mask & hit
+        return mask
+
+    def list_entries(self, sort: str = 'newest') -> List[ImageEntry]:
+        """Every listed entry (see UNLISTED_TYPES) in the given sort order"""
+        column, descending = SORT_ORDERS[sort]
+        with self._lock:
+            perm = self._listed(column)
+            rows = perm[::-1] if descending else perm
+            return [self.entry(row) for row in rows]
+
+    def query(self, limit: int = 100, after: Optional[str] = None, sort: str = 'newest',
+              date_from: Optional[str] = None, date_to: Optional[str] = None,
+              match: Optional[List[Dict[str, Iterable[str]]]] = None, **filters) -> Dict:
+        """One page of entries using keyset pagination over the sorted columns
+
+        Filters are equality matches on FILTER_COLUMNS; date_from/date_to bound
+        created_at inclusively (``YYYY-MM-DD`` or ``YYYY-MM-DD HH:MM:SS``).
+        *match* holds search clauses (see SearchIndex.match), all of which
+        must hold. Rows of UNLISTED_TYPES are only returned when the type
+        filter names them.
+        Unfiltered pages cost O(log n + limit) once the sort permutation is
+        cached; filtered pages add one vectorized pass over the columns.
+        """
+        if sort not in SORT_ORDERS:
+            raise ValidationError(f"Unsupported sort order: {sort}", {'allowed_sorts': list(SORT_ORDERS)})
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValidationError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        unknown = set(filters) - set(FILTER_COLUMNS)
+        if unknown:
+            raise ValidationError(f"Unsupported filters: {', '.join(sorted(unknown))}")
+
+        column, descending = SORT_ORDERS[sort]
+        lower = parse_date_bound(date_from, end=False) if date_from else None
+        upper = parse_date_bound(date_to, end=True) if date_to else None
+        cursor = tuple(decode_cursor(after, sort)) if after else None
+
+        with self._lock:
+            perm = self._ascending(column) if filters.get('type') else self._listed(column)
+            mask = self._mask(filters, lower, upper, match)
+            if mask is not None:
+                perm = perm[mask[perm]]
+
+            key = self._sort_key(column)
+            if descending:
+                end = bisect.bisect_left(perm, cursor, key=key) if cursor else len(perm)
+                start = max(0, end - limit)
+                rows = perm[start:end][::-1]
+                has_more = start > 0
+            else:
+                start = bisect.bisect_right(perm, cursor, key=key) if cursor else 0
+                rows = perm[start:start + limit]
+                has_more = start + limit < len(perm)
+
+            entries = [self.entry(row) for row in rows]
+            next_cursor = encode_cursor(sort, *key(rows[-1])) if has_more and len(rows) else None
+
+        return {
+            'images': [entry.to_dict() for entry in entries],
+            'next_cursor': next_cursor,
+            'count': len(entries)
+        }
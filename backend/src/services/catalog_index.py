@@ -0,0 +1,521 @@
+"""
+Persistent SQLite index of generated images
+Replaces the glob + stat + parse scan that used to run on every listing
+"""
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from ..utils.error_handling import ValidationError
+from ..utils.naming import parse_filename
+
+logger = logging.getLogger('omnimage.catalog_index')
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
+# Directory types whose files use something other than IMAGE_EXTENSIONS
+EXTENSIONS_BY_TYPE = {'icon': {'.ico'}}
+# Directory types that are indexed (listable with type=..., servable) but left
+# out of default listings, lookups and statistics
+UNLISTED_TYPES = ('icon',)
+
+# Row tuple layout shared with listeners (see _build_row)
+ROW_COLUMNS = (
+    'path', 'filename', 'type', 'prompt_id', 'model', 'provider',
+    'created_at', 'extension', 'size_bytes', 'mtime_ns', 'width', 'height'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path        TEXT PRIMARY KEY,
+    filename    TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    prompt_id   TEXT NOT NULL,
+    model       TEXT NOT NULL,
+    provider    TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    extension   TEXT NOT NULL,
+    size_bytes  INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    width       INTEGER,
+    height      INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_images_filename ON images (filename);
+CREATE TABLE IF NOT EXISTS directories (
+    type        TEXT PRIMARY KEY,
+    mtime_ns    INTEGER NOT NULL
+);
+"""
+
+# Running aggregates maintained by triggers so /stats never rescans the catalog
+AGGREGATE_SCHEMA_VERSION = 3
+AGGREGATE_DIMENSIONS = ('provider', 'model', 'type')
+# Rollup table -> length of the created_at prefix that forms its bucket
+ROLLUP_TABLES = {'stats_hourly': 13, 'stats_daily': 10}
+
+AGGREGATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats_totals (
+    id            INTEGER PRIMARY KEY CHECK (id = 1),
+    total_images  INTEGER NOT NULL,
+    total_bytes   INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats_totals (id, total_images, total_bytes) VALUES (1, 0, 0);
+CREATE TABLE IF NOT EXISTS stats_by (
+    dimension   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    count       INTEGER NOT NULL,
+    bytes       INTEGER NOT NULL,
+    PRIMARY KEY (dimension, key)
+);
+CREATE TABLE IF NOT EXISTS stats_hourly (
+    bucket      TEXT PRIMARY KEY,
+    count       INTEGER NOT NULL,
+    bytes       INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats_daily (
+    bucket      TEXT PRIMARY KEY,
+    count       INTEGER NOT NULL,
+    bytes       INTEGER NOT NULL
+);
+"""
+
+
+def _aggregate_statements(row: str, sign: str) -> str:
+    """Trigger statements applying one image row (NEW or OLD) to every aggregate"""
+    statements = [
+        f"UPDATE stats_totals SET total_images = total_images {sign} 1, "
+        f"total_bytes = total_bytes {sign} {row}.size_bytes WHERE id = 1;"
+    ]
+    for dimension in AGGREGATE_DIMENSIONS:
+        statements.append(
+            f"INSERT INTO stats_by (dimension, key, count, bytes) "
+            f"VALUES ('{dimension}', {row}.{dimension}, {sign}1, {sign}{row}.size_bytes) "
+            f"ON CONFLICT (dimension, key) DO UPDATE SET "
+            f"count = count + excluded.count, bytes = bytes + excluded.bytes;"
+        )
+        if sign == '-':
+            statements.append(
+                f"DELETE FROM stats_by WHERE dimension = '{dimension}' "
+                f"AND key = {row}.{dimension} AND count <= 0;"
+            )
+    for table, width in ROLLUP_TABLES.items():
+        bucket = f"substr({row}.created_at, 1, {width})"
+        statements.append(
+            f"INSERT INTO {table} (bucket, count, bytes) "
+            f"SELECT {bucket}, {sign}1, {sign}{row}.size_bytes WHERE {row}.created_at != 'unknown' "
+            f"ON CONFLICT (bucket) DO UPDATE SET "
+            f"count = count + excluded.count, bytes = bytes + excluded.bytes;"
+        )
+        if sign == '-':
+            statements.append(f"DELETE FROM {table} WHERE bucket = {bucket} AND count <= 0;")
+    return '\n'.join(statements)
+
+
+_UNLISTED_SQL = ', '.join(f"'{image_type}'" for image_type in UNLISTED_TYPES)
+
+AGGREGATE_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS images_stats_insert AFTER INSERT ON images
+WHEN NEW.type NOT IN ({_UNLISTED_SQL}) BEGIN
+{_aggregate_statements('NEW', '+')}
+END;
+CREATE TRIGGER IF NOT EXISTS images_stats_delete AFTER DELETE ON images
+WHEN OLD.type NOT IN ({_UNLISTED_SQL}) BEGIN
+{_aggregate_statements('OLD', '-')}
+END;
+CREATE TRIGGER IF NOT EXISTS images_stats_update AFTER UPDATE ON images
+WHEN NEW.type NOT IN ({_UNLISTED_SQL}) BEGIN
+{_aggregate_statements('OLD', '-')}
+{_aggregate_statements('NEW', '+')}
+END;
+"""
+
+# Generation counter bumped on every index change; cheap version for HTTP validators
+_NOW_EPOCH = "(julianday('now') - 2440587.5) * 86400.0"
+_BUMP_VERSION = f"UPDATE catalog_version SET generation = generation + 1, updated_at = {_NOW_EPOCH} WHERE id = 1;"
+
+VERSION_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id          INTEGER PRIMARY KEY CHECK (id = 1),
+    generation  INTEGER NOT NULL,
+    updated_at  REAL NOT NULL
+);
+INSERT OR IGNORE INTO catalog_version (id, generation, updated_at) VALUES (1, 0, {_NOW_EPOCH});
+CREATE TRIGGER IF NOT EXISTS images_version_insert AFTER INSERT ON images BEGIN {_BUMP_VERSION} END;
+CREATE TRIGGER IF NOT EXISTS images_version_delete AFTER DELETE ON images BEGIN {_BUMP_VERSION} END;
+CREATE TRIGGER IF NOT EXISTS images_version_update AFTER UPDATE ON images BEGIN {_BUMP_VERSION} END;
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+-- Random per database file: the generation restarts at 0 when the file is
+-- recreated, so validators must also tell databases apart
+INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('instance_id', lower(hex(randomblob(8))));
+"""
+
+def file_version(mtime_ns: int, size_bytes: int) -> int:
+    """32-bit token that changes whenever a file is rewritten; ``?v=`` of image URLs as %08x"""
+    return zlib.crc32(f'{mtime_ns}:{size_bytes}'.encode('ascii'))
+
+def read_dimensions(file_path: Path) -> Tuple[Optional[int], Optional[int]]:
+    """Read image dimensions from the file header without decoding pixels"""
+    try:
+        with Image.open(file_path) as img:
+            return img.size
+    except Exception:
+        return None, None
+
+
+class CatalogIndex:
+    """SQLite-backed catalog of images, reconciled incrementally from disk
+
+    Each watched directory is only rescanned when its own mtime changes, and
+    within a rescan only files whose (mtime, size) differ from the indexed row
+    are re-parsed and re-probed for dimensions.
+
+    The index is the persistent store; listing and sorting are served from
+    in-memory listeners (ColumnarCatalog) that are notified of every row
+    upserted or removed.
+    """
+
+    def __init__(self, db_path: Path, project_root: Path, directories: Dict[str, Path]):
+        self.db_path = db_path
+        self.project_root = project_root
+        self.directories = directories
+        self._lock = threading.RLock()
+        self._listeners: List[object] = []
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.executescript(AGGREGATE_SCHEMA)
+        stale = self._conn.execute('PRAGMA user_version').fetchone()[0] < AGGREGATE_SCHEMA_VERSION
+        if stale:
+            # Triggers from an older version would survive CREATE ... IF NOT EXISTS
+            for name in ('insert', 'delete', 'update'):
+                self._conn.execute(f'DROP TRIGGER IF EXISTS images_stats_{name}')
+        self._conn.executescript(AGGREGATE_TRIGGERS)
+        self._conn.executescript(VERSION_SCHEMA)
+        if stale:
+            self._rebuild_aggregates()
+            self._conn.execute(f'PRAGMA user_version = {AGGREGATE_SCHEMA_VERSION}')
+        self._conn.commit()
+        self.instance_id: str = self._conn.execute(
+            "SELECT value FROM catalog_meta WHERE key = 'instance_id'"
+        ).fetchone()[0]
+
+    def _rebuild_aggregates(self):
+        """Recompute every aggregate from scratch (index created by an older version)"""
+        logger.info("Rebuilding catalog statistics aggregates")
+        listed = f"type NOT IN ({_UNLISTED_SQL})"
+        self._conn.execute(
+            f'UPDATE stats_totals SET total_images = (SELECT COUNT(*) FROM images WHERE {listed}), '
+            f'total_bytes = (SELECT COALESCE(SUM(size_bytes), 0) FROM images WHERE {listed}) WHERE id = 1'
+        )
+        self._conn.execute('DELETE FROM stats_by')
+        for dimension in AGGREGATE_DIMENSIONS:
+            self._conn.execute(
+                f"INSERT INTO stats_by (dimension, key, count, bytes) "
+                f"SELECT '{dimension}', {dimension}, COUNT(*), SUM(size_bytes) FROM images "
+                f"WHERE {listed} GROUP BY {dimension}"
+            )
+        for table, width in ROLLUP_TABLES.items():
+            self._conn.execute(f'DELETE FROM {table}')
+            self._conn.execute(
+                f"INSERT INTO {table} (bucket, count, bytes) "
+                f"SELECT substr(created_at, 1, {width}), COUNT(*), SUM(size_bytes) FROM images "
+                f"WHERE created_at != 'unknown' AND {listed} GROUP BY 1"
+            )
+
+    def add_listener(self, listener) -> None:
+        """Register an object with upsert_rows(rows) / remove_paths(paths) and
+        replay the current contents into it"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(ROW_COLUMNS)} FROM images").fetchall()
+            listener.upsert_rows(tuple(row) for row in rows)
+            self._listeners.append(listener)
+
+    def _notify_upserted(self, rows: List[tuple]):
+        for listener in self._listeners:
+            listener.upsert_rows(rows)
+
+    def _delete_paths(self, paths: List[str]):
+        """Delete rows by relative path and notify listeners"""
+        self._conn.executemany('DELETE FROM images WHERE path = ?', [(path,) for path in paths])
+        for listener in self._listeners:
+            listener.remove_paths(paths)
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> int:
+        """Bring the index up to date with disk, returning the number of rows changed"""
+        changed = 0
+        with self._lock:
+            known = {row['type']: row['mtime_ns'] for row in
+                     self._conn.execute('SELECT type, mtime_ns FROM directories')}
+
+            for image_type, directory in self.directories.items():
+                try:
+                    dir_mtime = directory.stat().st_mtime_ns
+                except FileNotFoundError:
+                    paths = [row['path'] for row in self._conn.execute(
+                        'SELECT path FROM images WHERE type = ?', (image_type,))]
+                    self._delete_paths(paths)
+                    self._conn.execute('DELETE FROM directories WHERE type = ?', (image_type,))
+                    changed += len(paths)
+                    continue
+
+                if not force and known.get(image_type) == dir_mtime:
+                    continue
+
+                # Record the mtime observed *before* scanning so that anything
+                # landing mid-scan bumps it again and triggers the next rescan
+                changed += self._reconcile_directory(image_type, directory)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO directories (type, mtime_ns) VALUES (?, ?)',
+                    (image_type, dir_mtime)
+                )
+
+            self._conn.commit()
+
+        if changed:
+            logger.debug(f"Catalog index refreshed: {changed} rows changed")
+        return changed
+
+    def _reconcile_directory(self, image_type: str, directory: Path) -> int:
+        """Diff one directory against its indexed rows"""
+        indexed = {
+            row['filename']: (row['mtime_ns'], row['size_bytes'])
+            for row in self._conn.execute(
+                'SELECT filename, mtime_ns, size_bytes FROM images WHERE type = ?', (image_type,)
+            )
+        }
+
+        upserts = []
+        seen = set()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not self.accepts(image_type, entry.name):
+                    continue
+
+                seen.add(entry.name)
+                st = entry.stat()
+                if indexed.get(entry.name) == (st.st_mtime_ns, st.st_size):
+                    continue
+
+                upserts.append(self._build_row(image_type, Path(entry.path), st))
+
+        removed = [self._relative(directory / name) for name in indexed.keys() - seen]
+
+        if upserts:
+            self._upsert_rows(upserts)
+        if removed:
+            self._delete_paths(removed)
+
+        return len(upserts) + len(removed)
+
+    def _build_row(self, image_type: str, file_path: Path, st: os.stat_result) -> tuple:
+        metadata = parse_filename(file_path.name)
+        width, height = read_dimensions(file_path)
+        return (
+            self._relative(file_path), file_path.name, image_type,
+            metadata['prompt_id'], metadata['model'], metadata['provider'],
+            metadata['created_at'], metadata['extension'],
+            st.st_size, st.st_mtime_ns, width, height
+        )
+
+    def _upsert_rows(self, rows: List[tuple]):
+        self._conn.executemany(
+            'INSERT INTO images (path, filename, type, prompt_id, model, provider, '
+            'created_at, extension, size_bytes, mtime_ns, width, height) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (path) DO UPDATE SET filename = excluded.filename, type = excluded.type, '
+            'prompt_id = excluded.prompt_id, model = excluded.model, provider = excluded.provider, '
+            'created_at = excluded.created_at, extension = excluded.extension, '
+            'size_bytes = excluded.size_bytes, mtime_ns = excluded.mtime_ns, '
+            'width = excluded.width, height = excluded.height',
+            rows
+        )
+        self._notify_upserted(rows)
+
+    def _relative(self, file_path: Path) -> str:
+        return file_path.relative_to(self.project_root).as_posix()
+
+    @staticmethod
+    def accepts(image_type: str, filename: str) -> bool:
+        """Whether a file in a directory of *image_type* belongs in the index"""
+        return Path(filename).suffix.lower() in EXTENSIONS_BY_TYPE.get(image_type, IMAGE_EXTENSIONS)
+
+    def type_for_path(self, file_path: Path) -> Optional[str]:
+        """Directory type a file would be indexed under, or None if it isn't catalogued"""
+        for image_type, directory in self.directories.items():
+            if file_path.parent == directory and self.accepts(image_type, file_path.name):
+                return image_type
+        return None
+
+    # ------------------------------------------------------------------
+    # Explicit updates (used by services that move files themselves)
+    # ------------------------------------------------------------------
+
+    def add_file(self, image_type: str, file_path: Path):
+        """Index (or re-index) a single file written by the application
+
+        A file already indexed at its current (mtime, size) is left alone, so
+        the watcher and a service registering the same output don't both
+        count as changes.
+        """
+        with self._lock:
+            st = file_path.stat()
+            if self.get_file_state(file_path) == (st.st_mtime_ns, st.st_size):
+                return
+            self._upsert_rows([self._build_row(image_type, file_path, st)])
+            self._conn.commit()
+
+    def mark_directories_current(self):
+        """Record current directory mtimes so request-time refresh() skips rescans
+
+        Only valid while something else (the catalog watcher) is applying
+        every change in those directories as it happens.
+        """
+        with self._lock:
+            for image_type, directory in self.directories.items():
+                try:
+                    dir_mtime = directory.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO directories (type, mtime_ns) VALUES (?, ?)',
+                    (image_type, dir_mtime)
+                )
+            self._conn.commit()
+
+    def remove_files(self, file_paths: Iterable[Path]):
+        """Drop rows for files moved or deleted by the application"""
+        with self._lock:
+            self._delete_paths([self._relative(path) for path in file_paths])
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def get_file_state(self, file_path: Path) -> Optional[Tuple[int, int]]:
+        """Indexed (mtime_ns, size_bytes) for one file, or None if it isn't indexed"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT mtime_ns, size_bytes FROM images WHERE path = ?', (self._relative(file_path),)
+            ).fetchone()
+        return (row['mtime_ns'], row['size_bytes']) if row else None
+
+    def get_image(self, file_path: Path) -> Optional[Dict]:
+        """Indexed metadata for one file, or None if it isn't indexed"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(ROW_COLUMNS)} FROM images WHERE path = ?",
+                (self._relative(file_path),)
+            ).fetchone()
+        return self.row_to_dict(row) if row else None
+
+    def get_version(self) -> Tuple[int, float]:
+        """Current (generation, updated_at epoch seconds) of the index contents"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT generation, updated_at FROM catalog_version WHERE id = 1'
+            ).fetchone()
+        return row['generation'], row['updated_at']
+
+    def get_stats(self) -> Dict:
+        """Catalog statistics read straight from the running aggregates
+
+        Files of UNLISTED_TYPES are not counted.
+        """
+        with self._lock:
+            totals = self._conn.execute(
+                'SELECT total_images, total_bytes FROM stats_totals WHERE id = 1'
+            ).fetchone()
+            by = {dimension: {} for dimension in AGGREGATE_DIMENSIONS}
+            for row in self._conn.execute('SELECT dimension, key, count FROM stats_by'):
+                by[row['dimension']][row['key']] = row['count']
+            by_date = {row['bucket']: row['count'] for row in
+                       self._conn.execute('SELECT bucket, count FROM stats_daily ORDER BY bucket')}
+
+        return {
+            'total_images': totals['total_images'],
+            'total_size_mb': round(totals['total_bytes'] / (1024 * 1024), 2),
+            'by_provider': by['provider'],
+            'by_model': by['model'],
+            'by_type': by['type'],
+            'by_date': by_date
+        }
+
+    def get_rollups(self, granularity: str = 'day', start: Optional[str] = None,
+                    end: Optional[str] = None) -> List[Dict]:
+        """Image counts per hour or day, optionally bounded by an inclusive time range
+
+        Buckets are ``YYYY-MM-DD HH`` for hourly and ``YYYY-MM-DD`` for daily
+        rollups; start/end are bucket prefixes, so a date-only end includes
+        every hour of that day (and ``2025-06`` the whole month).
+        """
+        tables = {'hour': 'stats_hourly', 'day': 'stats_daily'}
+        if granularity not in tables:
+            raise ValidationError(f"Unsupported granularity: {granularity}", {'allowed': list(tables)})
+        table = tables[granularity]
+        width = ROLLUP_TABLES[table]
+
+        clauses, params = [], []
+        if start:
+            clauses.append('bucket >= ?')
+            params.append(start[:width])
+        if end:
+            # Compare only the prefix end specifies, or a shorter end would sort
+            # before (and so exclude) the finer buckets it covers
+            end = end[:width]
+            clauses.append('substr(bucket, 1, ?) <= ?')
+            params.extend([len(end), end])
+
+        sql = f"SELECT bucket, count, bytes FROM {table}"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY bucket'
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {'bucket': row['bucket'], 'count': row['count'],
+             'size_mb': round(row['bytes'] / (1024 * 1024), 2)}
+            for row in rows
+        ]
+
+    @staticmethod
+    def row_to_dict(row) -> Dict:
+        """Convert an index row into the API metadata shape"""
+        version = f"{file_version(row['mtime_ns'], row['size_bytes']):08x}"
+        return {
+            'prompt_id': row['prompt_id'],
+            'model': row['model'],
+            'provider': row['provider'],
+            'created_at': row['created_at'],
+            'extension': row['extension'],
+            'filename': row['filename'],
+            'size_mb': round(row['size_bytes'] / (1024 * 1024), 2),
+            'width': row['width'],
+            'height': row['height'],
+            'path': row['path'],
+            'type': row['type'],
+            'url': f"/api/v1/image/{row['filename']}?v={version}",
+            'thumbnail_url': f"/api/v1/image/{row['filename']}/thumb?v={version}"
+        }
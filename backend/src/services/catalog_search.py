@@ -0,0 +1,138 @@
+"""
+Token/prefix search index over catalog metadata and prompt text
+Indexes distinct prompt_id/model/provider values, not individual images
+"""
+import bisect
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Catalog fields a query token can match, with their index in a catalog row
+SEARCH_FIELDS = {'prompt_id': 3, 'model': 4, 'provider': 5}
+
+# Query tokens shorter than this only match whole tokens, so 'a' doesn't expand
+# to most of the vocabulary
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric runs: 'Circuit_Orb-2' -> ['circuit', 'orb', '2']"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index from tokens to the metadata values that contain them
+
+    Every image's searchable text is a function of its prompt_id, model and
+    provider (prompt text is looked up by prompt_id), and those values repeat
+    across thousands of images. So postings point at ``(field, value)`` pairs
+    and a query resolves to per-field value sets, which ColumnarCatalog turns
+    into a row mask over its interned id columns.
+
+    The vocabulary is kept sorted so a prefix expands to a contiguous slice
+    found with bisect. The index is a CatalogIndex listener: new values are
+    indexed as their first image is upserted. Values whose images are all gone
+    keep their postings; they simply match no rows.
+    """
+
+    def __init__(self, prompt_source: Optional[Callable[[], Tuple[object, Dict[str, str]]]] = None):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Set[Tuple[str, str]]] = {}
+        self._vocabulary: List[str] = []
+        self._value_tokens: Dict[Tuple[str, str], Set[str]] = {}
+        self._prompt_texts: Dict[str, str] = {}
+        self._prompt_version: object = None
+        self.prompt_source = prompt_source
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def upsert_rows(self, rows: Iterable[tuple]):
+        """CatalogIndex listener hook: index any metadata value seen for the first time"""
+        with self._lock:
+            for row in rows:
+                for field, idx in SEARCH_FIELDS.items():
+                    key = (field, row[idx])
+                    if key not in self._value_tokens:
+                        self._index_value(key)
+
+    def remove_paths(self, paths: Iterable[str]):
+        """CatalogIndex listener hook; values stay indexed (see class docstring)"""
+
+    def _index_value(self, key: Tuple[str, str]):
+        field, value = key
+        tokens = set(tokenize(value))
+        if field == 'prompt_id' and value in self._prompt_texts:
+            tokens.update(tokenize(self._prompt_texts[value]))
+
+        old = self._value_tokens.get(key, set())
+        for token in old - tokens:
+            postings = self._postings[token]
+            postings.discard(key)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        for token in tokens - old:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                bisect.insort(self._vocabulary, token)
+            postings.add(key)
+        self._value_tokens[key] = tokens
+
+    def set_prompt_texts(self, texts: Dict[str, str]):
+        """Replace the prompt_id -> prompt text map, re-indexing only changed prompts"""
+        with self._lock:
+            changed = {
+                prompt_id for prompt_id in self._prompt_texts.keys() | texts.keys()
+                if self._prompt_texts.get(prompt_id) != texts.get(prompt_id)
+            }
+            self._prompt_texts = dict(texts)
+            for prompt_id in changed:
+                key = ('prompt_id', prompt_id)
+                if key in self._value_tokens:
+                    self._index_value(key)
+
+    def refresh_prompts(self):
+        """Pull prompt text from prompt_source when its version changed"""
+        if self.prompt_source is None:
+            return
+        version, texts = self.prompt_source()
+        with self._lock:
+            if version == self._prompt_version:
+                return
+            self.set_prompt_texts(texts)
+            self._prompt_version = version
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _expand(self, token: str) -> Set[Tuple[str, str]]:
+        """Postings for every vocabulary token starting with *token*"""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return set(self._postings.get(token, ()))
+        matches: Set[Tuple[str, str]] = set()
+        vocabulary = self._vocabulary
+        i = bisect.bisect_left(vocabulary, token)
+        while i < len(vocabulary) and vocabulary[i].startswith(token):
+            matches |= self._postings[vocabulary[i]]
+            i += 1
+        return matches
+
+    def match(self, query: str) -> List[Dict[str, Set[str]]]:
+        """One clause per query token: {field: values} an image must hit in some field
+
+        Clauses are ANDed; every token is matched as a prefix.
+        """
+        clauses = []
+        with self._lock:
+            for token in dict.fromkeys(tokenize(query)):
+                clause: Dict[str, Set[str]] = {}
+                for field, value in self._expand(token):
+                    clause.setdefault(field, set()).add(value)
+                clauses.append(clause)
+        return clauses
@@ -0,0 +1,293 @@
+"""
+Filesystem watcher that keeps the catalog index current, and the publisher
+that turns index changes into events
+Uses watchdog (inotify on Linux) when installed, otherwise polls the directories
+"""
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .catalog_index import ROW_COLUMNS, CatalogIndex
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - optional dependency
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger('omnimage.catalog_watcher')
+
+
+class CatalogEventBus:
+    """Fan-out of catalog change events to any number of subscribers
+
+    Each subscriber gets its own bounded queue. A subscriber that falls too far
+    behind has its backlog replaced by a single ``resync`` event, telling the
+    client to refetch the listing instead of applying deltas.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def publish(self, event: Dict) -> Dict:
+        event = dict(event, id=next(self._ids))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                self._resync(q, event['id'])
+        return event
+
+    @staticmethod
+    def _resync(q: queue.Queue, event_id: int):
+        try:
+            while True:
+                q.get_nowait()
+        except queue.Empty:
+            pass
+        q.put_nowait({'type': 'resync', 'id': event_id})
+
+
+class CatalogEventPublisher:
+    """CatalogIndex listener that publishes every index change to a CatalogEventBus
+
+    Registered like ColumnarCatalog, so a change emits exactly one event
+    whoever applied it: the watcher, a request-time refresh() or a service
+    calling add_file/remove_files. The replay add_listener performs on
+    registration only seeds the set of known paths, which tells ``add``
+    from ``modify``.
+    """
+
+    def __init__(self, catalog: CatalogIndex, bus: CatalogEventBus):
+        self.catalog = catalog
+        self.bus = bus
+        self._known: Optional[Set[str]] = None
+
+    def upsert_rows(self, rows: Iterable[tuple]):
+        if self._known is None:
+            self._known = {row[0] for row in rows}
+            return
+        for row in rows:
+            path = row[0]
+            event_type = 'modify' if path in self._known else 'add'
+            self._known.add(path)
+            image = CatalogIndex.row_to_dict(dict(zip(ROW_COLUMNS, row)))
+            self.bus.publish({'type': event_type, 'image': image})
+
+    def remove_paths(self, paths: Iterable[str]):
+        for path in paths:
+            if not self._known or path not in self._known:
+                continue
+            self._known.discard(path)
+            image = {
+                'path': path,
+                'filename': PurePosixPath(path).name,
+                'type': self.catalog.type_for_path(self.catalog.project_root / path),
+            }
+            self.bus.publish({'type': 'remove', 'image': image})
+
+
+class _WatchdogHandler(FileSystemEventHandler):
+    """Forward raw watchdog events to the watcher's pending set"""
+
+    def __init__(self, watcher: 'CatalogWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        self.watcher.notify(Path(event.src_path))
+        dest = getattr(event, 'dest_path', None)
+        if dest:
+            self.watcher.notify(Path(dest))
+
+
+class CatalogWatcher:
+    """Apply filesystem changes to a CatalogIndex as they happen
+
+    Raw notifications only mark paths as pending; a worker thread coalesces
+    them for ``debounce`` seconds (a file being written fires many events) and
+    then re-stats each path once to decide what actually changed. Events for
+    the changes are published by the index's CatalogEventPublisher.
+
+    Without watchdog, directories are polled, but like CatalogIndex.refresh
+    only a directory whose mtime changed (a file added, removed or renamed)
+    is rescanned. Files already known are re-stat'd on every poll, since
+    overwriting a file in place leaves its directory's mtime alone.
+    """
+
+    def __init__(self, catalog: CatalogIndex, poll_interval: float = 2.0, debounce: float = 0.25):
+        self.catalog = catalog
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._pending: Dict[Path, float] = {}
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self._observer is not None else 'polling'
+
+    def start(self):
+        """Start watching; safe to call once per process"""
+        if self._thread is not None:
+            return
+
+        # Snapshot (polling baseline) before the full reconcile, so a file landing
+        # in between shows up as a change rather than being missed by both
+        snapshot = self._snapshot()
+        self.catalog.refresh(force=True)
+
+        if Observer is not None:
+            try:
+                observer = Observer()
+                handler = _WatchdogHandler(self)
+                for directory in self.catalog.directories.values():
+                    directory.mkdir(parents=True, exist_ok=True)
+                    observer.schedule(handler, str(directory), recursive=False)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+            except Exception as e:
+                logger.warning(f"Filesystem notifications unavailable, falling back to polling: {e}")
+                self._observer = None
+
+        self._thread = threading.Thread(
+            target=self._run, args=(snapshot if self._observer is None else {},),
+            name='catalog-watcher', daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Catalog watcher started ({self.mode})")
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def notify(self, file_path: Path):
+        """Mark a path as possibly changed (called from notification threads)"""
+        with self._pending_lock:
+            self._pending[file_path] = time.monotonic()
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self, snapshot: Dict):
+        last_poll = time.monotonic()
+        while not self._stop.is_set():
+            self._wakeup.wait(self.debounce if self._pending else self.poll_interval)
+            self._wakeup.clear()
+            try:
+                if self._observer is None and time.monotonic() - last_poll >= self.poll_interval:
+                    snapshot = self._poll(snapshot)
+                    last_poll = time.monotonic()
+                self._flush_pending()
+            except Exception as e:
+                logger.error(f"Catalog watcher iteration failed: {e}", exc_info=True)
+
+    def _snapshot(self, previous: Optional[Dict] = None) -> Dict[str, Tuple[int, Dict[Path, Tuple[int, int]]]]:
+        """Per directory type: (directory mtime_ns, {file: (mtime_ns, size)})
+
+        Directories whose mtime matches *previous* aren't listed again; only
+        the files *previous* knows of in them are re-stat'd.
+        """
+        previous = previous or {}
+        snapshot = {}
+        for image_type, directory in self.catalog.directories.items():
+            try:
+                # Read before scanning, so a file landing mid-scan bumps it again
+                dir_mtime = directory.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            files = {}
+            if image_type in previous and previous[image_type][0] == dir_mtime:
+                for path in previous[image_type][1]:
+                    try:
+                        st = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[path] = (st.st_mtime_ns, st.st_size)
+                snapshot[image_type] = (dir_mtime, files)
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file() and self.catalog.accepts(image_type, entry.name):
+                            st = entry.stat()
+                            files[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                continue
+            snapshot[image_type] = (dir_mtime, files)
+        return snapshot
+
+    def _poll(self, previous: Dict) -> Dict:
+        current = self._snapshot(previous)
+        for image_type in previous.keys() | current.keys():
+            before = previous.get(image_type, (None, {}))
+            after = current.get(image_type, (None, {}))
+            for path in before[1].keys() | after[1].keys():
+                if before[1].get(path) != after[1].get(path):
+                    self.notify(path)
+        return current
+
+    def _flush_pending(self):
+        """Apply every pending path that has been quiet for the debounce window"""
+        cutoff = time.monotonic() - self.debounce
+        with self._pending_lock:
+            ready = [path for path, seen in self._pending.items() if seen <= cutoff]
+            for path in ready:
+                del self._pending[path]
+
+        for path in ready:
+            self._apply(path)
+        if ready:
+            # Every change so far has been applied; let request-time refresh() skip rescans
+            self.catalog.mark_directories_current()
+
+    def _apply(self, file_path: Path):
+        image_type = self.catalog.type_for_path(file_path)
+        if image_type is None:
+            return
+
+        indexed = self.catalog.get_file_state(file_path)
+        try:
+            st = file_path.stat()
+        except FileNotFoundError:
+            if indexed is not None:
+                self.catalog.remove_files([file_path])
+            return
+
+        if indexed != (st.st_mtime_ns, st.st_size):
+            self.catalog.add_file(image_type, file_path)
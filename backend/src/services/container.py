@@ -0,0 +1,69 @@
+"""
+Application-scoped service container
+Built once in create_app so services and their caches live across requests
+"""
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from ..core.config import Config
+from ..processors.session_registry import init_worker_sessions
+from .catalog_watcher import CatalogEventBus, CatalogEventPublisher, CatalogWatcher
+from .image_service import ImageService
+from .job_manager import JobManager
+from .workflow_service import WorkflowService
+
+logger = logging.getLogger('omnimage.container')
+
+
+class ServiceContainer:
+    """Owns long-lived services and caches shared by all request threads
+
+    - image_service: catalog index (SQLite connection + lock), stats aggregates,
+      search index (fed prompt text by workflow_service), thumbnail cache
+    - workflow_service: prompt file cache
+    - catalog_events / catalog_watcher: change feed for /images/stream
+    - jobs: process pool for background removal and ICO conversion; each
+      worker has its own session registry, bounded by SESSION_BUDGET_MB and
+      warmed with PRELOAD_MODELS. The app process runs no inference, so it
+      loads no models; the pool starts (and preloads) on the first job.
+    """
+
+    def __init__(self, project_root: Path, thumbnail_dir: Optional[Path] = None):
+        self.project_root = project_root
+        self.image_service = ImageService(project_root, thumbnail_dir)
+        self.workflow_service = WorkflowService(project_root)
+        self.image_service.search.prompt_source = self.workflow_service.get_prompt_texts
+        self.catalog_events = CatalogEventBus()
+        self.image_service.catalog.add_listener(
+            CatalogEventPublisher(self.image_service.catalog, self.catalog_events)
+        )
+        self.catalog_watcher: Optional[CatalogWatcher] = None
+        self.session_report_dir = Config.CACHE_DIR / "sessions"
+        session_budget = Config.SESSION_BUDGET_MB * 1024 * 1024
+        self.jobs = JobManager(
+            Config.JOB_WORKERS, initializer=init_worker_sessions,
+            initargs=(session_budget, str(self.session_report_dir), Config.PRELOAD_MODELS),
+            warm_up=bool(Config.PRELOAD_MODELS)
+        )
+
+        self._lock = threading.Lock()
+
+    def start_catalog_watcher(self, poll_interval: float = 2.0) -> CatalogWatcher:
+        """Start the filesystem watcher feeding the catalog index and event bus"""
+        with self._lock:
+            if self.catalog_watcher is None:
+                self.catalog_watcher = CatalogWatcher(
+                    self.image_service.catalog, poll_interval=poll_interval
+                )
+                self.catalog_watcher.start()
+            return self.catalog_watcher
+
+    def shutdown(self):
+        """Stop background threads and release resources"""
+        if self.catalog_watcher is not None:
+            self.catalog_watcher.stop()
+        self.jobs.shutdown()
+        self.image_service.catalog.close()
+        logger.info("Service container shut down")
@@ -0,0 +1,128 @@
+"""
+Disk cache for files derived from catalog images (thumbnails, resized variants)
+Content-addressed, single-flight rendering, LRU eviction under a byte budget
+"""
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from ..utils.error_handling import ProcessingError
+from ..utils.file_utils import CacheBudget
+
+logger = logging.getLogger('omnimage.derivative_cache')
+
+
+class DerivativeCache:
+    """Files rendered from a source image, stored as ``{content hash}_{variant}{suffix}``
+
+    Keys use a hash of the source bytes, so a regenerated image with the same
+    name gets fresh derivatives while renamed/archived copies share them. The
+    hash is memoized per (path, mtime, size), so a warm lookup costs one stat.
+
+    Concurrent requests for the same key collapse into one render: the first
+    caller renders while the others wait on the key's lock, then find the file.
+    Hits touch the file's mtime, which makes the eviction order LRU.
+    """
+
+    def __init__(self, cache_dir: Path, budget_bytes: int, hash_memo_size: int = 65536):
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self.hash_memo_size = hash_memo_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._hashes: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+        self._inflight: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._budget = CacheBudget(cache_dir, budget_bytes)
+
+    def content_hash(self, source: Path) -> str:
+        """sha256 of the file contents, memoized by (path, mtime_ns, size)"""
+        st = source.stat()
+        memo_key = (str(source), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._hashes.get(memo_key)
+            if digest is not None:
+                self._hashes.move_to_end(memo_key)
+                return digest
+
+        hasher = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+
+        with self._lock:
+            self._hashes[memo_key] = digest
+            while len(self._hashes) > self.hash_memo_size:
+                self._hashes.popitem(last=False)
+        return digest
+
+    def key_for(self, source: Path, variant: str, suffix: str) -> str:
+        """Cache file name for a derivative of *source*"""
+        return f"{self.content_hash(source)[:32]}_{variant}{suffix}"
+
+    def lookup(self, source: Path, variant: str, suffix: str) -> Optional[Path]:
+        """Path of the cached derivative (marked as recently used), or None"""
+        target = self.cache_dir / self.key_for(source, variant, suffix)
+        return target if self._touch(target) else None
+
+    def get_or_create(self, source: Path, variant: str, suffix: str,
+                      render: Callable[[Path, Path], bool]) -> Path:
+        """Path of the cached derivative, rendering it with ``render(source, tmp_path)`` on a miss
+
+        *render* writes the derivative to the path it is given and returns
+        True on success; the file is moved into place atomically.
+        """
+        key = self.key_for(source, variant, suffix)
+        target = self.cache_dir / key
+        if self._touch(target):
+            return target
+
+        lock = self._acquire(key)
+        try:
+            with lock:
+                if self._touch(target):
+                    return target
+                tmp = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+                try:
+                    if not render(source, tmp) or not tmp.exists():
+                        raise ProcessingError(f"Failed to render {variant} for {source.name}")
+                    os.replace(tmp, target)
+                finally:
+                    if tmp.exists():
+                        tmp.unlink()
+                if self._budget.add(target.stat().st_size):
+                    logger.info(f"Evicted derivatives in {self.cache_dir.name}: "
+                                f"{self._budget.total_bytes} bytes kept")
+                return target
+        finally:
+            self._release(key)
+
+    def _touch(self, target: Path) -> bool:
+        """Mark a cached file as recently used; False when it doesn't exist"""
+        try:
+            os.utime(target)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _acquire(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock, waiters = self._inflight.get(key, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._inflight[key] = (lock, waiters + 1)
+            return lock
+
+    def _release(self, key: str):
+        with self._lock:
+            lock, waiters = self._inflight[key]
+            if waiters == 1:
+                del self._inflight[key]
+            else:
+                self._inflight[key] = (lock, waiters - 1)
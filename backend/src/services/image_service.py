@@ -8,11 +8,16 @@ import shutil
 import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from ..utils.file_utils import get_file_size
-from ..utils.naming import parse_filename
+from ..core.config import Config
+from ..processors.image_optimizer import DERIVATIVE_FORMATS, ImageOptimizer, derivative_format_available
 from ..utils.error_handling import NotFoundError, ProcessingError, ValidationError
+from .archive_cache import ArchiveCache
+from .catalog_columns import ColumnarCatalog
+from .catalog_index import UNLISTED_TYPES, CatalogIndex
+from .catalog_search import SearchIndex, tokenize
+from .derivative_cache import DerivativeCache
 
 logger = logging.getLogger('omnimage.image_service')
 
@@ -20,85 +25,172 @@ logger = logging.getLogger('omnimage.image_service')
 class ImageService:
     """Service for managing image operations"""
     
-    def __init__(self, project_root: Path):
+    def __init__(self, project_root: Path, thumbnail_dir: Optional[Path] = None):
         self.project_root = project_root
         self.output_dir = project_root / "output"
         self.raw_dir = self.output_dir / "raw"
         self.processed_dir = self.output_dir / "processed"
         self.icons_dir = self.output_dir / "icons"
         self.logs_dir = project_root / "logs"
+        self.cache_dir = Config.CACHE_DIR
         
         # Ensure directories exist
         for dir_path in [self.output_dir, self.raw_dir, self.processed_dir, self.icons_dir, self.logs_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
+        
+        # Persistent metadata index; reconciled lazily against directory mtimes
+        self.catalog = CatalogIndex(
+            self.cache_dir / "catalog.sqlite3",
+            project_root,
+            {'raw': self.raw_dir, 'processed': self.processed_dir, 'icon': self.icons_dir}
+        )
+        
+        # Compact in-memory copy of the index that listing/sorting/filtering run on
+        self.columns = ColumnarCatalog({
+            image_type: directory.relative_to(project_root).as_posix()
+            for image_type, directory in self.catalog.directories.items()
+        })
+        self.catalog.add_listener(self.columns)
+        
+        # Token/prefix index for search; prompt_source is wired by the container
+        self.search = SearchIndex()
+        self.catalog.add_listener(self.search)
+        
+        # Lazily rendered thumbnails, evicted under THUMBNAIL_CACHE_MB
+        self.optimizer = ImageOptimizer()
+        self.thumbnails = DerivativeCache(
+            thumbnail_dir or self.cache_dir / "thumbnails",
+            Config.THUMBNAIL_CACHE_MB * 1024 * 1024
+        )
+        # Re-encoded/resized variants served by serve_image
+        self.derivatives = DerivativeCache(
+            self.cache_dir / "derivatives",
+            Config.DERIVATIVE_CACHE_MB * 1024 * 1024
+        )
+        # Alpha masks from background removal, by source content and model
+        self.masks = DerivativeCache(
+            self.cache_dir / "masks",
+            Config.MASK_CACHE_MB * 1024 * 1024
+        )
+        # ZIPs of repeated bulk-download selections
+        self.archives = ArchiveCache(
+            self.cache_dir / "archives",
+            Config.ARCHIVE_CACHE_MB * 1024 * 1024
+        )
     
     def get_all_images(self) -> List[Dict]:
-        """Get all generated images with metadata"""
-        images = []
-        
-        # Get images from raw directory
-        if self.raw_dir.exists():
-            for img_file in self.raw_dir.glob("*"):
-                if img_file.is_file() and img_file.suffix.lower() in ['.png', '.jpg', '.jpeg', '.webp']:
-                    metadata = parse_filename(img_file.name)
-                    metadata.update({
-                        'size_mb': get_file_size(img_file),
-                        'path': str(img_file.relative_to(self.project_root)),
-                        'type': 'raw'
-                    })
-                    images.append(metadata)
-        
-        # Get images from processed directory
-        if self.processed_dir.exists():
-            for img_file in self.processed_dir.glob("*"):
-                if img_file.is_file() and img_file.suffix.lower() in ['.png', '.jpg', '.jpeg', '.webp']:
-                    metadata = parse_filename(img_file.name)
-                    metadata.update({
-                        'size_mb': get_file_size(img_file),
-                        'path': str(img_file.relative_to(self.project_root)),
-                        'type': 'processed'
-                    })
-                    images.append(metadata)
-        
-        # Sort by created_at (newest first)
-        images.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return images
+        """Get all generated images with metadata (newest first)"""
+        self.catalog.refresh()
+        return [entry.to_dict() for entry in self.columns.list_entries('newest')]
+    
+    def query_images(self, **params) -> Dict:
+        """Get one cursor-paginated, filtered page of images
+        
+        See ColumnarCatalog.query for the accepted parameters.
+        """
+        self.catalog.refresh()
+        return self.columns.query(**params)
+    
+    def search_images(self, q: str, **params) -> Dict:
+        """Get one page of images whose prompt_id, model, provider or prompt
+        text match every token of *q* (tokens are matched as prefixes)
+        
+        Accepts the same paging/filter parameters as query_images.
+        """
+        if not tokenize(q or ''):
+            raise ValidationError("Search query must contain letters or digits", {'q': q})
+        self.catalog.refresh()
+        self.search.refresh_prompts()
+        result = self.columns.query(match=self.search.match(q), **params)
+        result['query'] = q
+        return result
+    
+    def find_image(self, filename: str, include_unlisted: bool = False) -> Optional[Path]:
+        """Resolve an image filename to its path on disk via the in-memory catalog
+        
+        Unlisted types (ICO outputs) are only searched with *include_unlisted*,
+        so deleting, downloading and processing act on listed images only.
+        """
+        self.catalog.refresh()
+        types = [image_type for image_type in self.catalog.directories
+                 if include_unlisted or image_type not in UNLISTED_TYPES]
+        path = self.columns.find(filename, types)
+        return self.project_root / path if path else None
+    
+    def resolve_image(self, filename: str) -> Path:
+        """Path of an existing catalogued image (of any type, so the URLs of
+        ``type=icon`` listings resolve), or NotFoundError"""
+        source = self.find_image(filename, include_unlisted=True)
+        if source is None or not source.exists():
+            raise NotFoundError(f"Image {filename} not found")
+        return source
+    
+    def get_content_hash(self, file_path: Path) -> str:
+        """sha256 of a file, memoized by (path, mtime, size) in the derivative cache"""
+        return self.derivatives.content_hash(file_path)
+    
+    def get_thumbnail(self, source: Path, width: int = 256) -> Path:
+        """Get the cached thumbnail for an image, rendering it on first request
+        
+        *width* is rounded up to the next of Config.THUMBNAIL_WIDTHS so the
+        cache holds a bounded number of variants per image.
+        """
+        if width < 1:
+            raise ValidationError("Thumbnail width must be positive", {'w': width})
+        width = next((w for w in Config.THUMBNAIL_WIDTHS if w >= width), Config.THUMBNAIL_WIDTHS[-1])
+        
+        return self.thumbnails.get_or_create(
+            source, f"w{width}", ".png",
+            lambda src, dst: self.optimizer.create_thumbnail(src, dst, (width, width))
+        )
+    
+    def get_derivative(self, source: Path, fmt: str, width: Optional[int] = None,
+                       height: Optional[int] = None, fit: str = 'contain') -> Path:
+        """Get a cached re-encoded (and optionally resized) copy of an image file
+        
+        Encoded once per source content/format/size/fit and served from the
+        derivative cache afterwards.
+        """
+        if fmt not in DERIVATIVE_FORMATS or not derivative_format_available(fmt):
+            raise ValidationError(f"Unsupported format: {fmt}",
+                                  {'allowed_formats': [f for f in DERIVATIVE_FORMATS if derivative_format_available(f)]})
+        if fit not in ('contain', 'cover'):
+            raise ValidationError(f"Unsupported fit: {fit}", {'allowed_fits': ['contain', 'cover']})
+        for name, value in (('w', width), ('h', height)):
+            if value is not None and not 1 <= value <= Config.DERIVATIVE_MAX_SIZE:
+                raise ValidationError(f"{name} must be between 1 and {Config.DERIVATIVE_MAX_SIZE}")
+        if fit == 'cover' and not (width and height):
+            raise ValidationError("fit=cover requires both w and h")
+        
+        variant = f"{width or 0}x{height or 0}_{fit}_q{Config.DERIVATIVE_QUALITY}"
+        return self.derivatives.get_or_create(
+            source, variant, DERIVATIVE_FORMATS[fmt][2],
+            lambda src, dst: self.optimizer.render_derivative(
+                src, dst, fmt, width, height, fit, Config.DERIVATIVE_QUALITY
+            )
+        )
+    
+    def get_catalog_version(self) -> Tuple[int, float]:
+        """Get (generation, last-modified epoch) of the catalog after reconciling with disk"""
+        self.catalog.refresh()
+        return self.catalog.get_version()
     
     def get_image_stats(self) -> Dict:
-        """Get generation statistics"""
-        stats = {
-            'total_images': 0,
-            'total_size_mb': 0,
-            'by_provider': {},
-            'by_model': {},
-            'by_date': {}
-        }
-        
-        images = self.get_all_images()
-        
-        for img in images:
-            stats['total_images'] += 1
-            stats['total_size_mb'] += img.get('size_mb', 0)
-            
-            # Count by provider
-            provider = img.get('provider', 'unknown')
-            stats['by_provider'][provider] = stats['by_provider'].get(provider, 0) + 1
-            
-            # Count by model
-            model = img.get('model', 'unknown')
-            stats['by_model'][model] = stats['by_model'].get(model, 0) + 1
-            
-            # Count by date
-            created_at = img.get('created_at', 'unknown')
-            if created_at != 'unknown':
-                try:
-                    date = created_at.split(' ')[0]  # Get just the date part
-                    stats['by_date'][date] = stats['by_date'].get(date, 0) + 1
-                except:
-                    pass
-        
-        stats['total_size_mb'] = round(stats['total_size_mb'], 2)
-        return stats
+        """Get generation statistics from the catalog's running aggregates"""
+        self.catalog.refresh()
+        return self.catalog.get_stats()
+    
+    def get_stats_timeline(self, granularity: str = 'day', start: Optional[str] = None,
+                           end: Optional[str] = None) -> List[Dict]:
+        """Get hourly or daily image counts within an optional time range"""
+        self.catalog.refresh()
+        return self.catalog.get_rollups(granularity, start, end)
+    
+    def register_output(self, file_path: Path) -> None:
+        """Index a file written by a processor so stats and listings include it immediately"""
+        image_type = self.catalog.type_for_path(file_path)
+        if image_type:
+            self.catalog.add_file(image_type, file_path)
     
     def delete_image(self, filename: str) -> Dict:
         """Move image to trash folder instead of deleting"""
@@ -106,18 +198,9 @@ class ImageService:
         trash_dir = self.output_dir / "trash"
         trash_dir.mkdir(exist_ok=True)
         
-        # Look for the file in raw and processed directories
-        file_found = False
-        original_path = None
-        
-        for directory in [self.raw_dir, self.processed_dir]:
-            file_path = directory / filename
-            if file_path.exists():
-                original_path = file_path
-                file_found = True
-                break
+        original_path = self.find_image(filename)
         
-        if not file_found:
+        if original_path is None or not original_path.exists():
             return {'success': False, 'message': f'File {filename} not found'}
         
         try:
@@ -127,6 +210,7 @@ class ImageService:
             trash_path = trash_dir / trash_filename
             
             shutil.move(str(original_path), str(trash_path))
+            self.catalog.remove_files([original_path])
             
             return {
                 'success': True, 
@@ -159,6 +243,8 @@ class ImageService:
                         shutil.move(str(img_file), str(archive_dir / img_file.name))
                         archived_count += 1
             
+            self.catalog.refresh(force=True)
+            
             return {
                 'success': True,
                 'message': f'Archived {archived_count} images to {archive_dir.name}',
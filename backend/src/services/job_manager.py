@@ -0,0 +1,207 @@
+"""
+Background job system for batch image processing
+Runs job tasks on a process pool and tracks per-job progress and results
+"""
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger('omnimage.job_manager')
+
+
+def _warm_up_task() -> None:
+    """No-op task whose only effect is starting a worker (and its initializer)"""
+
+
+class Job:
+    """Progress and per-item results of one submitted batch"""
+
+    def __init__(self, kind: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.results: List[Dict] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is None:
+            return 'running'
+        return 'failed' if self.failed == self.total and self.total else 'complete'
+
+    def to_dict(self, include_results: bool = False) -> Dict:
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'total': self.total,
+            'completed': self.completed,
+            'failed': self.failed,
+            'progress': round(100.0 * self.completed / self.total, 1) if self.total else 100.0,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+        if include_results:
+            data['results'] = [dict(result) for result in self.results]
+        return data
+
+
+class JobManager:
+    """Submit batches of picklable task functions to a shared process pool
+
+    Every item of a job is its own pool task, so one large job spreads over
+    all workers. A feeder thread per job keeps at most *max_in_flight* of its
+    tasks queued or running on the pool (default: two per worker), so a
+    large job isn't pickled onto the queue all at once and jobs submitted
+    after it still get a share of the workers. Workers are spawned (not
+    forked) on first use and live for the life of the app, so per-process
+    state such as a loaded model stays warm between jobs. Finished jobs are kept for polling, up to *history*.
+    *initializer* is called with *initargs* in each worker as it starts;
+    with *warm_up*, every worker is started (and initialized) as soon as the
+    pool is, rather than as tasks arrive.
+    """
+
+    def __init__(self, max_workers: int, history: int = 200,
+                 initializer: Optional[Callable] = None, initargs: Tuple = (),
+                 max_in_flight: Optional[int] = None, warm_up: bool = False):
+        self.max_workers = max_workers
+        self.history = history
+        self.max_in_flight = max_in_flight or 2 * max_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.warm_up = warm_up
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._closed = False
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a threaded Flask process (SQLite, watcher) is unsafe,
+            # and onnxruntime sessions don't survive fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=self.initializer, initargs=self.initargs
+            )
+            logger.info(f"Started job pool with {self.max_workers} workers")
+            if self.warm_up:
+                # Workers are spawned on demand; one no-op task per worker
+                # brings them all up (with whatever the initializer preloads)
+                for _ in range(self.max_workers):
+                    self._executor.submit(_warm_up_task)
+        return self._executor
+
+    def submit(self, kind: str, tasks: List[Sequence],
+               on_result: Optional[Callable[[Dict], None]] = None) -> Job:
+        """Start a job of ``(function, args)`` tasks; returns immediately
+
+        Each function returns a result dict (with at least ``success``) that
+        is appended to the job's results; *on_result* is called with it in
+        the parent process, e.g. to register output files. A task covering
+        several items is given as ``(function, args, item_count)`` and
+        returns a list of that many result dicts.
+        """
+        counts = [task[2] if len(task) > 2 else 1 for task in tasks]
+        job = Job(kind, sum(counts))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        if not tasks:
+            job.finished_at = time.time()
+            return job
+        threading.Thread(
+            target=self._feed, args=(job, tasks, counts, on_result),
+            name=f"job-{job.id[:8]}", daemon=True
+        ).start()
+        return job
+
+    def _feed(self, job: Job, tasks: List[Sequence], counts: List[int],
+              on_result: Optional[Callable[[Dict], None]]):
+        """Submit a job's tasks, keeping at most max_in_flight of them on the pool"""
+        slots = threading.Semaphore(self.max_in_flight)
+        for (fn, args, *_), count in zip(tasks, counts):
+            slots.acquire()
+            try:
+                future = self._submit_task(fn, args)
+            except Exception as e:
+                future = Future()
+                future.set_exception(e)
+
+            def done(f: Future, count: int = count):
+                slots.release()
+                self._task_done(job, f, count, on_result)
+            future.add_done_callback(done)
+
+    def _submit_task(self, fn: Callable, args: Sequence) -> Future:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job manager is shut down")
+            try:
+                return self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); replace the pool and retry once
+                logger.warning("Job pool broken, restarting it")
+                self._executor = None
+                return self._get_executor().submit(fn, *args)
+
+    def _task_done(self, job: Job, future: Future, count: int,
+                   on_result: Optional[Callable[[Dict], None]]):
+        try:
+            results = future.result()
+        except (Exception, CancelledError) as e:
+            results = [{'success': False, 'error': str(e) or type(e).__name__} for _ in range(count)]
+        if isinstance(results, dict):
+            results = [results]
+        if on_result is not None:
+            for result in results:
+                if not result.get('success'):
+                    continue
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.error(f"Job {job.id} result handler failed: {e}")
+
+        with self._lock:
+            job.results.extend(results)
+            job.completed += len(results)
+            job.failed += sum(1 for result in results if not result.get('success'))
+            if job.completed >= job.total:
+                job.finished_at = time.time()
+                logger.info(f"Job {job.id} ({job.kind}) finished: "
+                            f"{job.total - job.failed}/{job.total} successful")
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond the history limit"""
+        excess = len(self._jobs) - self.history
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]:
+            if excess <= 0:
+                break
+            del self._jobs[job_id]
+            excess -= 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job_id: str, include_results: bool = False) -> Optional[Dict]:
+        """Consistent dict view of a job, or None when unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict(include_results) if job else None
+
+    def shutdown(self):
+        """Cancel queued tasks and stop the worker processes"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -3,10 +3,13 @@ Workflow management service for AI image generation
 Extracted from monolithic app.py
 """
 import json
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from ..core.config import Config
+from ..utils.file_utils import load_prompts
+from ..utils.naming import sanitize_name
 
 
 class WorkflowService:
@@ -20,6 +23,12 @@ class WorkflowService:
         # Ensure directories exist
         self.config_dir.mkdir(exist_ok=True)
         self.prompts_dir.mkdir(exist_ok=True)
+        
+        # Prompt caches, invalidated by directory/file mtime (instance is app-scoped)
+        self._cache_lock = threading.Lock()
+        self._prompt_files_cache: Optional[Tuple[int, List[str]]] = None
+        self._prompts_cache: Dict[str, Tuple[int, List[str]]] = {}
+        self._prompt_texts_cache: Optional[Tuple[tuple, Dict[str, str]]] = None
     
     def get_available_models(self) -> List[Dict]:
         """Get list of available models"""
@@ -65,33 +74,90 @@ class WorkflowService:
     
     def get_prompt_files(self) -> List[str]:
         """Get list of available prompt files"""
-        if not self.prompts_dir.exists():
+        try:
+            dir_mtime = self.prompts_dir.stat().st_mtime_ns
+        except FileNotFoundError:
             return []
         
+        with self._cache_lock:
+            if self._prompt_files_cache and self._prompt_files_cache[0] == dir_mtime:
+                return list(self._prompt_files_cache[1])
+        
         prompt_files = []
         for file in self.prompts_dir.glob("*.txt"):
             prompt_files.append(file.name)
+        prompt_files.sort()
         
-        return sorted(prompt_files)
+        with self._cache_lock:
+            self._prompt_files_cache = (dir_mtime, prompt_files)
+        return list(prompt_files)
     
     def get_prompts_from_file(self, filename: str) -> List[str]:
         """Get prompts from a specific prompt file"""
         file_path = self.prompts_dir / filename
         
-        if not file_path.exists():
+        try:
+            mtime = file_path.stat().st_mtime_ns
+        except FileNotFoundError:
             return []
         
+        with self._cache_lock:
+            cached = self._prompts_cache.get(filename)
+            if cached and cached[0] == mtime:
+                return list(cached[1])
+        
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read().strip()
             
             # Split by lines and filter out empty lines
             prompts = [line.strip() for line in content.split('\n') if line.strip()]
-            return prompts
+            with self._cache_lock:
+                self._prompts_cache[filename] = (mtime, prompts)
+            return list(prompts)
         except Exception as e:
             print(f"Error reading prompt file {filename}: {e}")
             return []
-    
+
+    def get_prompt_texts(self) -> Tuple[tuple, Dict[str, str]]:
+        """Get (version, {prompt_id: prompt text}) across prompt files and prompts.json
+
+        Lines of config/prompts/*.txt map to the id generate_filename would give
+        them (sanitize_name of the text). The version changes whenever any
+        source file does, so callers can skip re-indexing unchanged prompts.
+        """
+        prompts_json = self.config_dir / "prompts.json"
+        files = self.get_prompt_files()
+        version = []
+        for path in [self.prompts_dir / name for name in files] + [prompts_json]:
+            try:
+                version.append(path.stat().st_mtime_ns)
+            except FileNotFoundError:
+                version.append(None)
+        version = (tuple(files), tuple(version))
+
+        with self._cache_lock:
+            if self._prompt_texts_cache and self._prompt_texts_cache[0] == version:
+                return self._prompt_texts_cache
+
+        texts: Dict[str, str] = {}
+        for name in files:
+            for line in self.get_prompts_from_file(name):
+                prompt_id = sanitize_name(line)
+                if prompt_id:
+                    texts[prompt_id] = line
+        if prompts_json.exists():
+            try:
+                for prompt in load_prompts(prompts_json):
+                    text = ' '.join(str(prompt[key]) for key in ('title', 'prompt') if prompt.get(key))
+                    texts[str(prompt['id'])] = text
+            except RuntimeError as e:
+                print(f"Error reading {prompts_json.name}: {e}")
+
+        with self._cache_lock:
+            self._prompt_texts_cache = (version, texts)
+        return version, texts
+
     def validate_workflow_config(self, config: Dict) -> Dict:
         """Validate workflow configuration"""
         errors = []
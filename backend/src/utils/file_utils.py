@@ -5,10 +5,19 @@ File operation utilities
 
 import json
 import shutil
+import threading
+import time
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import requests
 
+# Evicting down to this fraction of the budget leaves headroom, so a full cache
+# doesn't rescan the directory on every new file
+LOW_WATER_RATIO = 0.9
+
+# Temp files older than this are leftovers of a crashed writer
+STALE_TMP_SECONDS = 3600
+
 def load_prompts(prompts_file: Path) -> List[Dict[str, Any]]:
     """Load prompts from JSON file"""
     try:
@@ -70,6 +79,100 @@ def clean_directory(directory: Path, pattern: str = "*", keep_count: int = 0):
         except Exception as e:
             print(f"Failed to remove {file_to_remove}: {e}")
 
+def evict_to_budget(directory: Path, budget_bytes: int, target_bytes: Optional[int] = None,
+                    pattern: str = "*", keep_count: int = 0) -> int:
+    """Delete least recently used files (oldest mtime first) until the directory
+    holds at most *target_bytes* (default: *budget_bytes*); returns bytes kept
+
+    Nothing is deleted while the total is within *budget_bytes*, and the
+    *keep_count* most recent files are never deleted. Callers that touch
+    files on access get LRU order from the mtimes. Hidden files (in-flight
+    ``.*.tmp`` writes) are neither counted nor deleted.
+    """
+    if not directory.exists():
+        return 0
+
+    files = []
+    total = 0
+    for file in directory.glob(pattern):
+        if file.name.startswith('.'):
+            continue
+        try:
+            st = file.stat()
+        except FileNotFoundError:
+            continue
+        if file.is_file():
+            files.append((st.st_mtime_ns, st.st_size, file))
+            total += st.st_size
+    if total <= budget_bytes:
+        return total
+
+    target = budget_bytes if target_bytes is None else target_bytes
+    files.sort(key=lambda f: f[0])
+    for _, size, file_to_remove in files[:max(0, len(files) - keep_count)]:
+        if total <= target:
+            break
+        try:
+            file_to_remove.unlink()
+            total -= size
+        except FileNotFoundError:
+            total -= size
+        except Exception as e:
+            print(f"Failed to remove {file_to_remove}: {e}")
+    return total
+
+def remove_stale_tmp(directory: Path, max_age: float = STALE_TMP_SECONDS) -> int:
+    """Delete ``.*.tmp`` files older than *max_age* seconds; returns how many
+
+    Younger temp files may belong to a writer in another process, so they
+    are left alone.
+    """
+    removed = 0
+    cutoff = time.time() - max_age
+    for tmp in directory.glob(".*.tmp"):
+        try:
+            if tmp.stat().st_mtime < cutoff:
+                tmp.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+class CacheBudget:
+    """Running byte total of a cache directory kept under *budget_bytes*
+
+    Stale temp files are removed and the directory is evicted to budget when
+    it is created; after that, :meth:`add` counts each committed file without
+    rescanning, and only a total over budget triggers an LRU eviction down to
+    LOW_WATER_RATIO of the budget. *pattern* selects the cache's files.
+    """
+
+    def __init__(self, directory: Path, budget_bytes: int, pattern: str = "*"):
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+        self.pattern = pattern
+        self._lock = threading.Lock()
+        remove_stale_tmp(directory)
+        self.total_bytes = evict_to_budget(directory, budget_bytes, self.low_water_bytes, pattern)
+
+    @property
+    def low_water_bytes(self) -> int:
+        return int(self.budget_bytes * LOW_WATER_RATIO)
+
+    def add(self, size: int) -> bool:
+        """Count a file just moved into place; True when that caused an eviction
+
+        The most recent file (normally the one just added) is never evicted.
+        """
+        with self._lock:
+            self.total_bytes += size
+            if self.total_bytes <= self.budget_bytes:
+                return False
+            self.total_bytes = evict_to_budget(
+                self.directory, self.budget_bytes, self.low_water_bytes, self.pattern, keep_count=1
+            )
+            return True
+
 def save_json(data: Dict[str, Any], file_path: Path) -> bool:
     """Save data to JSON file"""
     try:
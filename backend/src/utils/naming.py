@@ -5,6 +5,7 @@ Consistent naming conventions for generated files
 
 import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -41,6 +42,68 @@ def generate_filename(prompt_id: str, model: str, extension: str = "png",
     
     return f"{base}.{extension}"
 
+# Timestamp as two whole underscore-separated parts: ..._YYYYMMDD_HHMMSS[_...]
+_TIMESTAMP_RE = re.compile(r'(?:^|_)([0-9]{8})_([0-9]{6})(?=_|$)')
+
+PARSE_CACHE_SIZE = 65536
+_METADATA_KEYS = ('prompt_id', 'model', 'provider', 'created_at', 'extension', 'filename')
+
+def parse_filename(filename: str) -> dict:
+    """
+    Parse generated image filename to extract metadata
+    Format: {prompt_id}_{model}_{timestamp}.{ext}
+    Example: circuit_orb_dalle3_20250619_172354.png
+    
+    This is the single canonical parser; results are memoized per filename.
+    """
+    return dict(zip(_METADATA_KEYS, _parse_filename_cached(filename)))
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_filename_cached(filename: str) -> tuple:
+    """Parse into an immutable tuple so cached results can't be mutated by callers"""
+    dot = filename.rfind('.')
+    if 0 < dot < len(filename) - 1:
+        stem, ext = filename[:dot], filename[dot + 1:]
+    else:
+        stem, ext = filename, ''
+    
+    match = _TIMESTAMP_RE.search(stem)
+    if match and match.start(1) > 0:
+        # Everything before the timestamp is {prompt_id}_{model}
+        prefix = stem[:match.start(1) - 1]
+        head, sep, model = prefix.rpartition('_')
+        prompt_id = head if sep else 'unknown'
+        created_at = _format_timestamp(match.group(1), match.group(2))
+    else:
+        parts = stem.split('_')
+        prompt_id = parts[0] if parts else 'unknown'
+        model = parts[1] if len(parts) > 1 else 'unknown'
+        created_at = 'unknown'
+    
+    return (prompt_id, model, detect_provider(model), created_at, ext, filename)
+
+def _format_timestamp(date: str, time: str) -> str:
+    """Fixed-width YYYYMMDD + HHMMSS -> 'YYYY-MM-DD HH:MM:SS' without strptime"""
+    try:
+        datetime(int(date[:4]), int(date[4:6]), int(date[6:]),
+                 int(time[:2]), int(time[2:4]), int(time[4:]))
+    except ValueError:
+        return f"{date}_{time}"
+    return f"{date[:4]}-{date[4:6]}-{date[6:]} {time[:2]}:{time[2:4]}:{time[4:]}"
+
+def detect_provider(model: str) -> str:
+    """Determine provider from model name"""
+    model = model.lower()
+    if 'dalle' in model:
+        return 'openai'
+    if 'flux' in model:
+        if 'dev' in model or 'schnell' in model or 'lora' in model:
+            return 'together_ai'
+        return 'fal_ai'
+    if 'galleri5' in model or 'ideogram' in model or 'recraft' in model:
+        return 'replicate'
+    return 'unknown'
+
 # src/utils/logging_utils.py
 """
 Logging utilities for structured logging
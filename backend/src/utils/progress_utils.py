@@ -20,7 +20,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional, Tuple
 
 from ..core.config import Config
 
@@ -111,6 +111,19 @@ def read_progress() -> dict:
     }
 
 
+def get_progress_version() -> Optional[Tuple[int, int]]:
+    """Return ``(mtime_ns, size)`` of the progress file, or ``None`` if absent.
+
+    Used as a cheap validator so pollers can be answered with 304 without
+    reading or parsing the JSON.
+    """
+    try:
+        st = PROGRESS_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 def reset_progress() -> None:
     """Remove the progress file so the next job starts clean."""
     if PROGRESS_FILE.exists():
@@ -0,0 +1,66 @@
+# src/utils/zip_stream.py
+"""
+Streaming ZIP writer: yields archive bytes as they are produced
+"""
+
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+# Already-compressed formats gain nothing from deflate; store them as-is
+STORED_SUFFIXES = {'.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif', '.zip'}
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink:
+    """Write-only file object that collects what zipfile writes until drained
+
+    It has no seek/tell, so zipfile treats it as unseekable and emits data
+    descriptors after each entry instead of patching local headers.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        if self._chunks:
+            data = b''.join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+
+def compress_type_for(path: Path) -> int:
+    """ZIP_STORED for already-compressed images, ZIP_DEFLATED otherwise"""
+    return zipfile.ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+
+def stream_zip(entries: Iterable[Tuple[Path, str]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a ZIP archive of (file path, archive name) entries chunk by chunk
+
+    Memory stays at about one chunk regardless of how many or how large the
+    files are; nothing is written to disk.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as zf:
+        for path, arcname in entries:
+            zinfo = zipfile.ZipInfo.from_file(path, arcname)
+            zinfo.compress_type = compress_type_for(path)
+            with open(path, 'rb') as src, \
+                    zf.open(zinfo, 'w', force_zip64=zinfo.file_size > zipfile.ZIP64_LIMIT) as dst:
+                while True:
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    # Central directory, written when the ZipFile closes
+    yield from sink.drain()
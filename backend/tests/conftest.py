@@ -0,0 +1,55 @@
+"""
+Shared pytest setup: make ``backend.src`` importable when pytest is run from
+any directory (the project root itself has no packaging)
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.src.core.config import Config  # noqa: E402
+
+
+@pytest.fixture
+def image_service(tmp_path, monkeypatch):
+    """ImageService over an empty project in tmp_path
+
+    Modules seed their own files by overriding this fixture; files saved into
+    its directories are indexed by the next catalog refresh.
+    """
+    from backend.src.services.image_service import ImageService
+
+    monkeypatch.setattr(Config, 'CACHE_DIR', tmp_path / 'cache')
+    service = ImageService(tmp_path)
+    yield service
+    service.catalog.close()
+
+
+@pytest.fixture
+def services(tmp_path, monkeypatch):
+    """ServiceContainer over an empty project in tmp_path"""
+    # The container loads the background remover, which needs rembg
+    pytest.importorskip('rembg')
+    from backend.src.services.container import ServiceContainer
+
+    monkeypatch.setattr(Config, 'CACHE_DIR', tmp_path / 'cache')
+    services = ServiceContainer(tmp_path, tmp_path / 'thumbnails')
+    yield services
+    services.shutdown()
+
+
+@pytest.fixture
+def client(services):
+    """Test client for the images blueprint backed by *services*"""
+    from backend.app.routes.images import bp
+
+    app = Flask(__name__)
+    app.testing = True
+    app.extensions['omnimage'] = services
+    app.register_blueprint(bp)
+    return app.test_client()
@@ -0,0 +1,96 @@
+"""
+create_app under a script with a module-level app, as app.py and
+backend/run.py are: the spawned job workers re-import that script
+"""
+import json
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from backend.src.core.config import Config
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+SCRIPT = '''
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, {project_root!r})
+
+from backend.src.core.config import Config
+
+ROOT = Path(__file__).resolve().parent
+Config.CACHE_DIR = ROOT / 'cache'
+Config.JOB_WORKERS = 1
+Config.CATALOG_WATCHER = True
+Config.PRELOAD_MODELS = ['no-such-model']  # turns warm-up on; fails fast without a download
+
+from backend.app import create_app
+
+app = create_app(ROOT)
+
+
+def probe() -> dict:
+    """What the worker built while importing this script as __mp_main__"""
+    return {{
+        'success': True,
+        'services': 'omnimage' in sys.modules['__mp_main__'].app.extensions,
+        'threads': sorted(thread.name for thread in threading.enumerate()),
+    }}
+
+
+if __name__ == '__main__':
+    services = app.extensions['omnimage']
+    pool_started_with_app = services.jobs._executor is not None
+    job = services.jobs.submit('probe', [(probe, ())])
+    deadline = time.monotonic() + 60
+    while services.jobs.snapshot(job.id)['status'] == 'running' and time.monotonic() < deadline:
+        time.sleep(0.05)
+    print(json.dumps(dict(services.jobs.snapshot(job.id, include_results=True),
+                          pool_started_with_app=pool_started_with_app)))
+    services.shutdown()
+'''
+
+
+def run_script(tmp_path, script: str) -> dict:
+    path = tmp_path / 'server.py'
+    path.write_text(textwrap.dedent(script).format(project_root=str(PROJECT_ROOT)))
+    completed = subprocess.run([sys.executable, str(path)], cwd=tmp_path,
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_workers_do_not_build_the_app_services(tmp_path):
+    # The container loads the background remover, which needs rembg
+    pytest.importorskip('rembg')
+    snapshot = run_script(tmp_path, SCRIPT)
+
+    assert snapshot['status'] == 'complete', snapshot
+    assert snapshot['pool_started_with_app'] is False
+    result = snapshot['results'][0]
+    assert result['services'] is False
+    assert 'catalog-watcher' not in result['threads']
+
+
+@pytest.mark.parametrize('testing', [False, True])
+def test_catalog_watcher_is_not_started_for_tests(tmp_path, monkeypatch, testing):
+    pytest.importorskip('rembg')
+    import backend.app
+
+    monkeypatch.setattr(backend.app, 'setup_logging', lambda *args, **kwargs: None)
+    monkeypatch.setattr(Config, 'CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(Config, 'CATALOG_WATCHER', True)
+    app = backend.app.create_app(tmp_path, testing=testing)
+    services = app.extensions['omnimage']
+    try:
+        assert app.testing is testing
+        assert (services.catalog_watcher is None) is testing
+    finally:
+        services.shutdown()
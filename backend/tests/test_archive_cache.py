@@ -0,0 +1,117 @@
+"""
+Bulk-download archive cache: keys, tee-to-disk storing, eviction, and the
+303 redirect to /download/archive/<key> for repeated selections
+"""
+import io
+import os
+import zipfile
+
+import pytest
+from PIL import Image
+
+from backend.src.services.archive_cache import ArchiveCache
+
+
+def make_file(path, size: int = 1000):
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+def test_key_ignores_order_and_follows_member_changes(tmp_path):
+    a, b = make_file(tmp_path / 'a.png'), make_file(tmp_path / 'b.png')
+    key = ArchiveCache.key_for([(a, 'a.png'), (b, 'b.png')])
+
+    assert ArchiveCache.key_for([(b, 'b.png'), (a, 'a.png')]) == key
+    assert ArchiveCache.key_for([(a, 'a.png')]) != key
+
+    make_file(a, 2000)
+    assert ArchiveCache.key_for([(a, 'a.png'), (b, 'b.png')]) != key
+
+
+def test_completed_stream_is_stored(tmp_path):
+    cache = ArchiveCache(tmp_path / 'archives', 10_000)
+    chunks = [b'one', b'two', b'three']
+
+    assert list(cache.store('k1', iter(chunks))) == chunks
+    assert cache.lookup('k1').read_bytes() == b'onetwothree'
+    assert cache.lookup('k2') is None
+
+
+def test_aborted_stream_caches_nothing(tmp_path):
+    cache = ArchiveCache(tmp_path / 'archives', 10_000)
+    stream = cache.store('k1', iter([b'one', b'two', b'three']))
+    next(stream)
+    stream.close()
+
+    assert cache.lookup('k1') is None
+    assert list((tmp_path / 'archives').iterdir()) == []
+
+
+def test_archives_over_budget_are_streamed_not_kept(tmp_path):
+    cache = ArchiveCache(tmp_path / 'archives', 100)
+    chunks = [b'x' * 60, b'y' * 60]
+
+    assert list(cache.store('big', iter(chunks))) == chunks
+    assert cache.lookup('big') is None
+    assert list((tmp_path / 'archives').iterdir()) == []
+
+
+def test_least_recently_used_archives_are_evicted(tmp_path):
+    cache = ArchiveCache(tmp_path / 'archives', 250)
+    for key in ('k1', 'k2'):
+        list(cache.store(key, iter([b'x' * 100])))
+    # Make k1 the most recently used before a third archive overflows the budget
+    os.utime(cache.lookup('k2'), (1, 1))
+    cache.lookup('k1')
+    list(cache.store('k3', iter([b'x' * 100])))
+
+    assert cache.lookup('k2') is None
+    assert cache.lookup('k1') is not None and cache.lookup('k3') is not None
+
+
+@pytest.fixture
+def selection(services):
+    names = []
+    for i in range(3):
+        name = f"orb_{i}_dalle3_20250610_05000{i}.png"
+        Image.new('RGB', (40, 40), (i * 60, 0, 0)).save(services.image_service.raw_dir / name)
+        names.append(name)
+    return names
+
+
+def test_repeated_selection_redirects_to_the_cached_archive(client, selection):
+    first = client.post('/api/v1/download/selected', json={'filenames': selection})
+    assert first.status_code == 200
+    body = first.get_data()
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        assert sorted(zf.namelist()) == sorted(selection)
+
+    # Same selection in another order hits the archive stored by the first stream
+    second = client.post('/api/v1/download/selected', json={'filenames': selection[::-1]})
+    assert second.status_code == 303
+    assert second.headers['Location'] == first.headers['Content-Location']
+
+    archive = client.get(second.headers['Location'])
+    assert archive.status_code == 200
+    assert archive.data == body
+    assert archive.get_etag()[0] == first.get_etag()[0]
+
+    partial = client.get(second.headers['Location'], headers={'Range': 'bytes=0-9'})
+    assert partial.status_code == 206
+    assert partial.data == body[:10]
+    past_end = client.get(second.headers['Location'], headers={'Range': f'bytes={len(body)}-'})
+    assert past_end.status_code == 416
+
+
+def test_changed_member_builds_a_new_archive(client, services, selection):
+    client.post('/api/v1/download/selected', json={'filenames': selection}).get_data()
+    Image.new('RGB', (40, 40), (0, 0, 255)).save(services.image_service.raw_dir / selection[0])
+
+    response = client.post('/api/v1/download/selected', json={'filenames': selection})
+    assert response.status_code == 200
+    response.get_data()
+
+
+def test_archive_route_validates_keys(client):
+    assert client.get('/api/v1/download/archive/not-a-key').status_code == 400
+    assert client.get(f"/api/v1/download/archive/{'0' * 64}").status_code == 404
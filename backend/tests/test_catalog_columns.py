@@ -0,0 +1,199 @@
+"""
+ColumnarCatalog on its own: sort order kept through upserts and
+swap-with-last removals, StringPool interning, and keyset cursors
+"""
+import base64
+import json
+import random
+
+import pytest
+
+from backend.src.services.catalog_columns import (
+    SORT_ORDERS, ColumnarCatalog, StringPool, decode_cursor, encode_cursor
+)
+from backend.src.utils.error_handling import ValidationError
+
+PREFIXES = {'raw': 'output/raw', 'processed': 'output/processed', 'icon': 'output/icons'}
+MODELS = ['flux', 'dalle3', 'imagen4']
+
+
+def make_row(image_type: str, filename: str, created_at: str, size: int, model: str = 'flux') -> tuple:
+    return (f"{PREFIXES[image_type]}/{filename}", filename, image_type, filename.split('_')[0], model,
+            'fal', created_at, 'png', size, size * 1000, 8, 8)
+
+
+class Reference:
+    """What the catalog should hold, kept as plain rows plus the seq each upsert gets"""
+
+    def __init__(self):
+        self.rows = {}
+        self.next_seq = 0
+
+    def upsert(self, catalog: ColumnarCatalog, rows: list):
+        catalog.upsert_rows(rows)
+        for row in rows:
+            self.rows[(row[2], row[1])] = (row, self.next_seq)
+            self.next_seq += 1
+
+    def remove(self, catalog: ColumnarCatalog, keys: list):
+        catalog.remove_paths(f"{PREFIXES[image_type]}/{filename}" for image_type, filename in keys)
+        for key in keys:
+            del self.rows[key]
+
+    def listed(self, sort: str) -> list:
+        column, descending = SORT_ORDERS[sort]
+
+        def value(row):
+            if column == 'filename':
+                return row[1]
+            if column == 'size':
+                return row[8]
+            return int(''.join(c for c in row[6] if c.isdigit()))
+        ordered = sorted(((value(row), seq, row[1]) for row, seq in self.rows.values() if row[2] != 'icon'),
+                         reverse=descending)
+        return [filename for _, _, filename in ordered]
+
+
+def random_rows(rng: random.Random, count: int, start: int = 0) -> list:
+    rows = []
+    for i in range(start, start + count):
+        image_type = rng.choice(['raw', 'raw', 'processed', 'icon'])
+        # Few distinct timestamps and sizes so ties are broken by seq
+        created_at = f"2025-06-{rng.randint(10, 12)} 0{rng.randint(0, 2)}:00:00"
+        rows.append(make_row(image_type, f"p{i % 7}_{rng.choice(MODELS)}_{i:04d}.png", created_at,
+                             rng.randint(1, 5), rng.choice(MODELS)))
+    return rows
+
+
+def assert_consistent(catalog: ColumnarCatalog, reference: Reference):
+    assert len(catalog) == len(reference.rows)
+    for sort in SORT_ORDERS:
+        assert [entry.filename for entry in catalog.list_entries(sort)] == reference.listed(sort)
+    for image_type, filename in reference.rows:
+        assert catalog.find(filename, [image_type]) == f"{PREFIXES[image_type]}/{filename}"
+    # Every row is reachable from its (type, filename) key and nothing else is
+    for type_id, by_name in catalog._rows.items():
+        for filename, row in by_name.items():
+            assert catalog.filenames[row] == filename
+            assert catalog.columns['type'][row] == type_id
+    assert sum(len(by_name) for by_name in catalog._rows.values()) == len(catalog)
+
+
+def test_sort_order_survives_upserts_and_removals():
+    rng = random.Random(11)
+    catalog, reference = ColumnarCatalog(PREFIXES), Reference()
+
+    reference.upsert(catalog, random_rows(rng, 120))
+    assert_consistent(catalog, reference)
+
+    for step in range(10):
+        keys = list(reference.rows)
+        # The last row, the first row and some from the middle
+        removed = {keys[-1], keys[0], *rng.sample(keys, 5)}
+        reference.remove(catalog, sorted(removed))
+        assert_consistent(catalog, reference)
+
+        # Updates move rows to a new size and seq; new rows are appended
+        updated = [make_row(image_type, filename, row[6], rng.randint(1, 5), row[4])
+                   for (image_type, filename), (row, _) in rng.sample(sorted(reference.rows.items()), 5)]
+        reference.upsert(catalog, updated + random_rows(rng, 4, start=1000 + step * 10))
+        assert_consistent(catalog, reference)
+
+
+def test_cached_permutations_are_dropped_on_mutation():
+    catalog, reference = ColumnarCatalog(PREFIXES), Reference()
+    reference.upsert(catalog, [make_row('raw', f"p_flux_{i}.png", '2025-06-10 00:00:00', i) for i in range(1, 6)])
+    assert [entry.filename for entry in catalog.list_entries('largest')] == reference.listed('largest')
+
+    reference.upsert(catalog, [make_row('raw', 'p_flux_1.png', '2025-06-10 00:00:00', 99)])
+    assert catalog.list_entries('largest')[0].filename == 'p_flux_1.png'
+
+    reference.remove(catalog, [('raw', 'p_flux_1.png')])
+    assert [entry.filename for entry in catalog.list_entries('largest')] == reference.listed('largest')
+
+
+def test_same_filename_in_two_types_is_two_rows():
+    catalog = ColumnarCatalog(PREFIXES)
+    catalog.upsert_rows([make_row('raw', 'p_flux_1.png', '2025-06-10 00:00:00', 1),
+                         make_row('processed', 'p_flux_1.png', '2025-06-10 00:00:00', 2)])
+
+    assert catalog.find('p_flux_1.png', ['processed', 'raw']) == 'output/processed/p_flux_1.png'
+    catalog.remove_paths(['output/processed/p_flux_1.png'])
+    assert catalog.find('p_flux_1.png', ['processed', 'raw']) == 'output/raw/p_flux_1.png'
+    # Unknown prefixes and filenames are ignored
+    catalog.remove_paths(['output/other/p_flux_1.png', 'output/raw/missing.png'])
+    assert len(catalog) == 1
+
+
+def test_string_pool_interns_each_value_once():
+    pool = StringPool()
+
+    assert [pool.intern(value) for value in ['flux', 'dalle3', 'flux', 'imagen4', 'dalle3']] == [0, 1, 0, 2, 1]
+    assert pool.values == ['flux', 'dalle3', 'imagen4']
+    assert pool.lookup('dalle3') == 1
+    assert pool.lookup('midjourney') is None
+
+
+def test_catalog_columns_hold_pool_ids():
+    catalog = ColumnarCatalog(PREFIXES)
+    catalog.upsert_rows(random_rows(random.Random(5), 60))
+
+    assert sorted(catalog.pools['model'].values) == sorted(MODELS)
+    assert sorted(catalog.pools['provider'].values) == ['fal']
+    assert max(catalog.columns['model']) < len(MODELS)
+    for row in range(len(catalog)):
+        entry = catalog.entry(row)
+        assert entry.model == catalog.pools['model'].values[catalog.columns['model'][row]]
+
+    # Removing every row of a value keeps it interned; lookups still resolve
+    catalog.remove_paths([f"{PREFIXES[entry.type]}/{entry.filename}" for entry in
+                          (catalog.entry(row) for row in range(len(catalog))) if entry.model == 'flux'])
+    assert catalog.pools['model'].lookup('flux') == 0
+    assert catalog.query(model='flux', type='raw,processed,icon')['count'] == 0
+
+
+@pytest.mark.parametrize('sort, value', [('newest', 20250610050000), ('name', 'a_flux_1.png'), ('largest', 0)])
+def test_cursor_round_trips(sort, value):
+    cursor = encode_cursor(sort, value, 42)
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor, sort) == (value, 42)
+
+
+def b64(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('sort, cursor', [
+    ('newest', 'not a cursor'),
+    ('newest', encode_cursor('newest', 20250610050000, 42)[:-3]),
+    ('newest', b64({'sort': 'newest'})),
+    ('newest', b64(['newest', 20250610050000])),
+    ('newest', b64(['newest', 'x', 42])),
+    ('newest', b64(['newest', 20250610050000, '42'])),
+    ('newest', b64(['newest', None, 42])),
+    ('newest', b64(['newest', 2.5, 42])),
+    ('newest', b64(['newest', True, 42])),
+    ('name', b64(['name', 5, 42])),
+], ids=['garbage', 'truncated', 'object', 'short', 'str-value', 'str-seq', 'null', 'float', 'bool', 'int-name'])
+def test_tampered_cursors_are_rejected(sort, cursor):
+    with pytest.raises(ValidationError) as excinfo:
+        decode_cursor(cursor, sort)
+    assert excinfo.value.status_code == 400
+
+
+def test_cursor_from_another_sort_is_rejected():
+    with pytest.raises(ValidationError, match='sort order'):
+        decode_cursor(encode_cursor('newest', 20250610050000, 1), 'oldest')
+
+
+def test_query_rejects_tampered_cursors():
+    catalog = ColumnarCatalog(PREFIXES)
+    catalog.upsert_rows([make_row('raw', f"p_flux_{i}.png", f"2025-06-1{i} 00:00:00", i) for i in range(5)])
+
+    page = catalog.query(limit=2)
+    assert page['next_cursor']
+    assert catalog.query(limit=2, after=page['next_cursor'])['count'] == 2
+    for sort, cursor in [('newest', b64(['newest', 'x', 1])), ('name', b64(['name', 3, 1]))]:
+        with pytest.raises(ValidationError):
+            catalog.query(limit=2, after=cursor, sort=sort)
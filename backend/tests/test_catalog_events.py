@@ -0,0 +1,116 @@
+"""
+Catalog change events, the polling watcher, and ICO outputs staying out of
+default listings, stats and lookups
+"""
+import os
+
+import pytest
+from PIL import Image
+
+from backend.src.services.catalog_watcher import CatalogEventBus, CatalogEventPublisher, CatalogWatcher
+
+RAW = 'orb_dalle3_20250610_050000.png'
+ICON = 'orb_dalle3_20250610_050000.ico'
+
+
+@pytest.fixture
+def image_service(image_service):
+    Image.new('RGB', (8, 8)).save(image_service.raw_dir / RAW)
+    Image.new('RGBA', (16, 16)).save(image_service.icons_dir / ICON)
+    image_service.catalog.refresh()
+    return image_service
+
+
+@pytest.fixture
+def events(image_service):
+    """Queue of the events published for index changes made after it was created"""
+    bus = CatalogEventBus()
+    image_service.catalog.add_listener(CatalogEventPublisher(image_service.catalog, bus))
+    return bus.subscribe()
+
+
+def drain(q) -> list:
+    items = []
+    while not q.empty():
+        event = q.get_nowait()
+        items.append((event['type'], event['image']['filename']))
+    return items
+
+
+def test_existing_files_are_not_announced(events):
+    assert drain(events) == []
+
+
+def test_every_index_change_publishes_one_event(image_service, events):
+    path = image_service.processed_dir / 'chip_flux_20250611_000000.png'
+    Image.new('RGB', (8, 8)).save(path)
+    image_service.get_image_stats()  # request-time refresh
+    assert drain(events) == [('add', path.name)]
+
+    image_service.register_output(path)  # already indexed at this state
+    assert drain(events) == []
+
+    Image.new('RGB', (9, 9)).save(path)
+    image_service.register_output(path)
+    assert drain(events) == [('modify', path.name)]
+
+    assert image_service.delete_image(path.name)['success']
+    assert drain(events) == [('remove', path.name)]
+
+
+def test_polling_watcher_rescans_only_changed_directories(image_service, events, monkeypatch):
+    watcher = CatalogWatcher(image_service.catalog, debounce=0)
+    snapshot = watcher._snapshot()
+
+    scanned = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda path: scanned.append(path) or scandir(path))
+    assert watcher._poll(snapshot) == snapshot
+    assert scanned == []
+
+    added = image_service.processed_dir / 'chip_flux_20250611_000000.png'
+    Image.new('RGB', (8, 8)).save(added)
+    watcher._poll(snapshot)
+    watcher._flush_pending()
+
+    assert scanned == [image_service.processed_dir]
+    assert drain(events) == [('add', added.name)]
+
+
+def test_polling_watcher_sees_files_rewritten_in_place(image_service, events):
+    path = image_service.raw_dir / RAW
+    watcher = CatalogWatcher(image_service.catalog, debounce=0)
+    snapshot = watcher._snapshot()
+    url = image_service.get_all_images()[0]['url']
+
+    # Overwriting a file leaves the directory's mtime as it was
+    dir_stat = image_service.raw_dir.stat()
+    Image.new('RGB', (12, 12)).save(path)
+    os.utime(image_service.raw_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+    watcher._poll(snapshot)
+    watcher._flush_pending()
+
+    assert drain(events) == [('modify', RAW)]
+    assert image_service.get_all_images()[0]['url'] != url
+
+
+def test_icons_are_listed_only_by_type(image_service):
+    assert [image['filename'] for image in image_service.get_all_images()] == [RAW]
+    assert [image['filename'] for image in image_service.query_images()['images']] == [RAW]
+    assert [image['filename'] for image in image_service.query_images(type='icon')['images']] == [ICON]
+    assert len(image_service.query_images(type='raw,icon')['images']) == 2
+
+
+def test_icons_are_not_counted_in_stats(image_service):
+    stats = image_service.get_image_stats()
+
+    assert stats['total_images'] == 1
+    assert stats['by_type'] == {'raw': 1}
+    assert stats['by_date'] == {'2025-06-10': 1}
+    assert [bucket['count'] for bucket in image_service.get_stats_timeline('hour')] == [1]
+
+
+def test_icons_are_served_but_not_found_for_changes(image_service):
+    assert image_service.find_image(ICON) is None
+    assert not image_service.delete_image(ICON)['success']
+    assert image_service.resolve_image(ICON) == image_service.icons_dir / ICON
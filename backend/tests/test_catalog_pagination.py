@@ -0,0 +1,121 @@
+"""
+Cursor pagination and filtering of the image catalog (ImageService.query_images)
+"""
+import pytest
+from PIL import Image
+
+from backend.src.services.catalog_columns import SORT_ORDERS
+from backend.src.services.image_service import ImageService
+from backend.src.utils.error_handling import ValidationError
+
+
+def sort_key(service: ImageService, sort: str, image: dict):
+    """The value an image is ordered by (listings only carry a rounded size_mb)"""
+    if sort in ('largest', 'smallest'):
+        return (service.project_root / image['path']).stat().st_size
+    return image['filename'] if sort == 'name' else image['created_at']
+
+
+def save_image(path, edge: int):
+    Image.new('RGB', (edge, edge), (edge % 256, 40, 90)).save(path)
+
+
+@pytest.fixture
+def image_service(image_service):
+    # Repeated timestamps and sizes, so ties must be broken by the cursor
+    for i in range(12):
+        model = 'flux' if i % 3 == 0 else 'dalle3'
+        save_image(image_service.raw_dir / f"orb_{i}_{model}_202506{10 + i % 4:02d}_0{i % 2}0000.png", 8 + i % 3)
+    for i in range(4):
+        save_image(image_service.processed_dir / f"chip_{i}_dalle3_20250612_120000_nobg.png", 16)
+    return image_service
+
+
+def all_pages(service: ImageService, **params) -> list:
+    images, after = [], None
+    while True:
+        page = service.query_images(after=after, **params)
+        assert page['count'] == len(page['images']) <= params.get('limit', 100)
+        images.extend(page['images'])
+        after = page['next_cursor']
+        if after is None:
+            return images
+
+
+@pytest.mark.parametrize('sort', list(SORT_ORDERS))
+def test_pages_cover_the_catalog_once_in_sort_order(image_service, sort):
+    paged = all_pages(image_service, limit=3, sort=sort)
+    single = image_service.query_images(limit=500, sort=sort)
+
+    assert single['next_cursor'] is None
+    assert [image['path'] for image in paged] == [image['path'] for image in single['images']]
+    assert len({image['path'] for image in paged}) == 16
+
+    keys = [sort_key(image_service, sort, image) for image in paged]
+    assert keys == sorted(keys, reverse=SORT_ORDERS[sort][1])
+
+
+def test_last_full_page_has_no_cursor(image_service):
+    page = image_service.query_images(limit=16)
+    assert page['count'] == 16
+    assert page['next_cursor'] is None
+
+
+def test_default_listing_is_newest_first(image_service):
+    listed = [image['path'] for image in image_service.get_all_images()]
+    assert listed == [image['path'] for image in all_pages(image_service, limit=5)]
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'model': 'flux'}, 4),
+    ({'model': 'flux,dalle3'}, 16),
+    ({'type': 'processed'}, 4),
+    ({'type': 'raw', 'model': 'dalle3'}, 8),
+    ({'prompt_id': 'orb_1,chip_2'}, 2),
+    ({'model': 'no-such-model'}, 0),
+])
+def test_equality_filters(image_service, filters, expected):
+    images = all_pages(image_service, limit=3, **filters)
+
+    assert len(images) == expected
+    for name, value in filters.items():
+        assert all(image[name] in value.split(',') for image in images)
+
+
+def test_date_bounds_are_inclusive(image_service):
+    # A date-only upper bound covers the whole day
+    images = all_pages(image_service, limit=4, date_from='2025-06-11', date_to='2025-06-12')
+    assert {image['created_at'][:10] for image in images} == {'2025-06-11', '2025-06-12'}
+    assert len(images) == 10
+
+    images = all_pages(image_service, limit=3, date_from='2025-06-12 00:00:01', date_to='2025-06-12')
+    assert [image['created_at'] for image in images] == ['2025-06-12 12:00:00'] * 4
+
+
+def test_listing_follows_new_and_deleted_files(image_service):
+    save_image(image_service.raw_dir / 'late_flux_20250701_000000.png', 8)
+    assert image_service.query_images(limit=1)['images'][0]['filename'] == 'late_flux_20250701_000000.png'
+
+    assert image_service.delete_image('late_flux_20250701_000000.png')['success']
+    newest = image_service.query_images(limit=1)['images'][0]
+    assert newest['filename'] != 'late_flux_20250701_000000.png'
+    assert len(all_pages(image_service, limit=7)) == 16
+
+
+def test_cursor_from_another_sort_is_rejected(image_service):
+    cursor = image_service.query_images(limit=2, sort='name')['next_cursor']
+    with pytest.raises(ValidationError, match='does not match'):
+        image_service.query_images(limit=2, sort='largest', after=cursor)
+
+
+@pytest.mark.parametrize('params', [
+    {'after': 'not-a-cursor'},
+    {'sort': 'random'},
+    {'limit': 0},
+    {'limit': 501},
+    {'colour': 'red'},
+    {'date_from': '2025-06'},
+])
+def test_invalid_parameters(image_service, params):
+    with pytest.raises(ValidationError):
+        image_service.query_images(**params)
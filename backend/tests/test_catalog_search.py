@@ -0,0 +1,124 @@
+"""
+Token/prefix search over prompt ids, models, providers and prompt text
+(SearchIndex via ImageService.search_images)
+"""
+import json
+import os
+
+import pytest
+from PIL import Image
+
+from backend.src.services.workflow_service import WorkflowService
+from backend.src.utils.error_handling import ValidationError
+
+CIRCUIT = 'circuit_orb_dalle3_20250610_050000.png'
+CHIP = 'neon_chip_flux_20250611_030000.png'
+ORB = 'orb_gpt-image-1_20250612_000000.png'
+PROMPTED = 'p7_flux_20250613_000000.png'
+
+
+@pytest.fixture
+def image_service(image_service):
+    for name in (CIRCUIT, CHIP, ORB, PROMPTED):
+        Image.new('RGB', (8, 8)).save(image_service.raw_dir / name)
+    return image_service
+
+
+@pytest.fixture
+def prompts(image_service):
+    """prompts.json, read through WorkflowService.get_prompt_texts like the app does"""
+    path = image_service.project_root / 'config' / 'prompts.json'
+    image_service.search.prompt_source = WorkflowService(image_service.project_root).get_prompt_texts
+    return path
+
+
+def write_prompts(path, text: str, mtime: int):
+    path.write_text(json.dumps([{'id': 'p7', 'title': 'Night harbour', 'prompt': text}]))
+    # Prompt text is re-read when the file's mtime changes
+    os.utime(path, ns=(mtime, mtime))
+
+
+def found(image_service, q: str) -> list:
+    return sorted(image['filename'] for image in image_service.search_images(q)['images'])
+
+
+@pytest.mark.parametrize('q, expected', [
+    ('circuit', [CIRCUIT]),
+    ('circ', [CIRCUIT]),
+    ('or', [CIRCUIT, ORB]),
+    ('ORB', [CIRCUIT, ORB]),
+    ('gpt', [ORB]),
+    ('fl', [CHIP, PROMPTED]),
+    ('openai', [CIRCUIT]),
+    ('fal', [CHIP, PROMPTED]),
+    # Single characters only match whole tokens
+    ('n', []),
+    ('zebra', []),
+])
+def test_tokens_match_as_prefixes(image_service, q, expected):
+    assert found(image_service, q) == expected
+
+
+@pytest.mark.parametrize('q, expected', [
+    ('orb dalle', [CIRCUIT]),
+    ('orb_gpt', [ORB]),
+    ('neon fal', [CHIP]),
+    ('orb flux', []),
+    ('orb orb', [CIRCUIT, ORB]),
+])
+def test_every_token_must_match(image_service, q, expected):
+    assert found(image_service, q) == expected
+
+
+def test_prompt_text_is_searchable(image_service, prompts):
+    write_prompts(prompts, 'A lighthouse under the aurora', 1_000_000_000)
+    assert found(image_service, 'aurora') == [PROMPTED]
+    assert found(image_service, 'light harb') == [PROMPTED]
+
+    write_prompts(prompts, 'A comet over the bay', 2_000_000_000)
+    assert found(image_service, 'aurora') == []
+    assert found(image_service, 'comet') == [PROMPTED]
+
+
+def test_index_follows_added_and_removed_images(image_service):
+    assert found(image_service, 'comet') == []
+
+    added = 'comet_tail_imagen4_20250614_000000.png'
+    Image.new('RGB', (8, 8)).save(image_service.processed_dir / added)
+    assert found(image_service, 'comet') == [added]
+    assert found(image_service, 'imagen') == [added]
+
+    assert image_service.delete_image(added)['success']
+    assert found(image_service, 'comet') == []
+
+
+def test_search_pages_and_filters_like_listings(image_service):
+    page = image_service.search_images('or', limit=1, sort='name')
+    assert [image['filename'] for image in page['images']] == [CIRCUIT]
+    assert page['query'] == 'or'
+
+    page = image_service.search_images('or', after=page['next_cursor'], limit=1, sort='name')
+    assert [image['filename'] for image in page['images']] == [ORB]
+    assert page['next_cursor'] is None
+
+    page = image_service.search_images('fl', model='flux', date_from='2025-06-12')
+    assert [image['filename'] for image in page['images']] == [PROMPTED]
+
+
+@pytest.mark.parametrize('q', ['', '   ', '_-!?'])
+def test_query_without_tokens_is_rejected(image_service, q):
+    with pytest.raises(ValidationError) as excinfo:
+        image_service.search_images(q)
+    assert excinfo.value.status_code == 400
+
+
+def test_search_route(client, services):
+    Image.new('RGB', (8, 8)).save(services.image_service.raw_dir / CIRCUIT)
+
+    response = client.get('/api/v1/images/search?q=circ+orb')
+    assert response.status_code == 200
+    assert [image['filename'] for image in response.get_json()['images']] == [CIRCUIT]
+
+    response = client.get('/api/v1/images/search?q=__')
+    assert response.status_code == 400
+    assert response.get_json()['details'] == {'q': '__'}
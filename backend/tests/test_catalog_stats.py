@@ -0,0 +1,85 @@
+"""
+Trigger-maintained catalog statistics and hourly/daily rollups
+"""
+import pytest
+from PIL import Image
+
+from backend.src.services.catalog_index import CatalogIndex
+from backend.src.utils.error_handling import ValidationError
+
+NAMES = [
+    'orb_dalle3_20250610_050000.png',
+    'orb_dalle3_20250610_230000.png',
+    'chip_flux_20250611_030000.png',
+    'chip_flux_20250611_235959.png',
+    'logo_flux_20250612_000000.png',
+    'untimed.png',
+]
+
+
+@pytest.fixture
+def image_service(image_service):
+    for name in NAMES:
+        Image.new('RGB', (8, 8)).save(image_service.raw_dir / name)
+    return image_service
+
+
+def buckets(rollups) -> dict:
+    return {rollup['bucket']: rollup['count'] for rollup in rollups}
+
+
+def test_stats_track_additions_and_deletions(image_service):
+    stats = image_service.get_image_stats()
+    assert stats['total_images'] == 6
+    assert stats['by_model'] == {'dalle3': 2, 'flux': 3, 'unknown': 1}
+    assert stats['by_type'] == {'raw': 6}
+    assert stats['by_date'] == {'2025-06-10': 2, '2025-06-11': 2, '2025-06-12': 1}
+
+    image_service.delete_image('chip_flux_20250611_030000.png')
+    stats = image_service.get_image_stats()
+    assert stats['total_images'] == 5
+    assert stats['by_model']['flux'] == 2
+    assert stats['by_date']['2025-06-11'] == 1
+
+
+def test_aggregates_match_a_rebuild(image_service):
+    image_service.delete_image('orb_dalle3_20250610_050000.png')
+    incremental = image_service.get_image_stats()
+    image_service.catalog._rebuild_aggregates()
+    assert image_service.catalog.get_stats() == incremental
+
+
+def test_stats_survive_reopening_the_index(image_service):
+    stats = image_service.get_image_stats()
+    image_service.catalog.close()
+    reopened = CatalogIndex(image_service.catalog.db_path, image_service.project_root,
+                            image_service.catalog.directories)
+    try:
+        assert reopened.get_stats() == stats
+    finally:
+        reopened.close()
+
+
+def test_hourly_rollups(image_service):
+    assert buckets(image_service.get_stats_timeline('hour')) == {
+        '2025-06-10 05': 1, '2025-06-10 23': 1, '2025-06-11 03': 1, '2025-06-11 23': 1, '2025-06-12 00': 1,
+    }
+
+
+@pytest.mark.parametrize('granularity, start, end, expected', [
+    # A date-only end includes every hour of that day
+    ('hour', '2025-06-10', '2025-06-11', ['2025-06-10 05', '2025-06-10 23', '2025-06-11 03', '2025-06-11 23']),
+    ('hour', '2025-06-10 23', '2025-06-11 03', ['2025-06-10 23', '2025-06-11 03']),
+    ('hour', '2025-06-11 04:00:00', None, ['2025-06-11 23', '2025-06-12 00']),
+    ('day', '2025-06-11', '2025-06-11', ['2025-06-11']),
+    ('day', None, '2025-06', ['2025-06-10', '2025-06-11', '2025-06-12']),
+    ('day', '2025-06-13', None, []),
+])
+def test_rollup_bounds_are_inclusive_prefixes(image_service, granularity, start, end, expected):
+    rollups = image_service.get_stats_timeline(granularity, start, end)
+    assert [rollup['bucket'] for rollup in rollups] == expected
+
+
+def test_unsupported_granularity(image_service):
+    with pytest.raises(ValidationError):
+        image_service.get_stats_timeline('week')
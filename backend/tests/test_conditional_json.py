@@ -0,0 +1,92 @@
+"""
+Conditional JSON for polled endpoints (/images, /stats, /progress): weak
+ETags, 304s on If-None-Match, and validators that change with the data
+"""
+import json
+
+import pytest
+from PIL import Image
+
+from backend.src.services.catalog_index import CatalogIndex
+from backend.src.utils import progress_utils
+
+CATALOG_URLS = ['/api/v1/images', '/api/v1/images?limit=5', '/api/v1/stats', '/api/v1/stats/timeline']
+
+
+@pytest.fixture
+def image(services):
+    path = services.image_service.raw_dir / 'orb_dalle3_20250610_050000.png'
+    Image.new('RGB', (8, 8)).save(path)
+    return path
+
+
+def revalidate(client, url: str, etag: str):
+    return client.get(url, headers={'If-None-Match': f'W/"{etag}"'})
+
+
+@pytest.mark.parametrize('url', CATALOG_URLS)
+def test_unchanged_catalog_gets_304(client, image, url):
+    response = client.get(url)
+    etag, weak = response.get_etag()
+
+    assert response.status_code == 200
+    assert weak
+    assert response.cache_control.no_cache
+
+    response = revalidate(client, url, etag)
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.get_etag() == (etag, True)
+
+
+@pytest.mark.parametrize('url', CATALOG_URLS)
+def test_added_file_changes_the_etag(client, services, image, url):
+    etag = client.get(url).get_etag()[0]
+    Image.new('RGB', (8, 8)).save(services.image_service.raw_dir / 'chip_flux_20250611_030000.png')
+
+    response = revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+
+
+def test_query_strings_get_their_own_etags(client, image):
+    assert client.get('/api/v1/images?limit=5').get_etag() != client.get('/api/v1/images?limit=6').get_etag()
+
+
+def test_recreated_database_changes_the_etag(client, services, image):
+    etag = client.get('/api/v1/images').get_etag()[0]
+    catalog = services.image_service.catalog
+
+    # A fresh database file starts counting generations from 0 again
+    fresh = CatalogIndex(catalog.db_path.with_name('fresh.sqlite3'), catalog.project_root, catalog.directories)
+    try:
+        assert fresh.instance_id != catalog.instance_id
+        assert fresh.get_version()[0] <= catalog.get_version()[0]
+        reopened = CatalogIndex(catalog.db_path, catalog.project_root, catalog.directories)
+        assert reopened.instance_id == catalog.instance_id
+        reopened.close()
+
+        services.image_service.catalog.instance_id = fresh.instance_id
+        response = revalidate(client, '/api/v1/images', etag)
+        assert response.status_code == 200
+        assert response.get_etag()[0] != etag
+    finally:
+        fresh.close()
+
+
+def test_progress_is_revalidated_against_the_file(client, tmp_path, monkeypatch):
+    progress_file = tmp_path / 'progress.json'
+    monkeypatch.setattr(progress_utils, 'PROGRESS_FILE', progress_file)
+
+    response = client.get('/api/v1/progress')
+    etag = response.get_etag()[0]
+    assert response.get_json()['status'] == 'complete'
+    assert revalidate(client, '/api/v1/progress', etag).status_code == 304
+
+    progress_file.write_text(json.dumps({'status': 'running', 'completed': 3, 'total_tasks': 10}))
+    response = revalidate(client, '/api/v1/progress', etag)
+    assert response.status_code == 200
+    assert response.get_json()['completed'] == 3
+
+    etag = response.get_etag()[0]
+    assert revalidate(client, '/api/v1/progress', etag).status_code == 304
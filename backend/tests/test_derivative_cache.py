@@ -0,0 +1,139 @@
+"""
+DerivativeCache: content-addressed keys, single-flight rendering, LRU eviction
+and temp-file handling
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from backend.src.services.derivative_cache import DerivativeCache
+from backend.src.utils.error_handling import ProcessingError
+from backend.src.utils.file_utils import STALE_TMP_SECONDS
+
+
+class CountingRenderer:
+    """render(source, target) that copies the source and counts its calls"""
+
+    def __init__(self, delay: float = 0.0, size: int = 0):
+        self.calls = 0
+        self.delay = delay
+        self.size = size
+        self._lock = threading.Lock()
+
+    def __call__(self, source, target) -> bool:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        target.write_bytes(source.read_bytes() + b'\0' * self.size)
+        return True
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DerivativeCache(tmp_path / 'cache', 10_000)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'source.png'
+    path.write_bytes(b'image bytes')
+    return path
+
+
+def test_renders_once_then_hits(cache, source):
+    render = CountingRenderer()
+    first = cache.get_or_create(source, 'w256', '.png', render)
+    second = cache.get_or_create(source, 'w256', '.png', render)
+
+    assert first == second == cache.lookup(source, 'w256', '.png')
+    assert first.read_bytes() == b'image bytes'
+    assert render.calls == 1
+    assert cache.lookup(source, 'w512', '.png') is None
+
+
+def test_keys_follow_content_not_name(cache, source, tmp_path):
+    copy = tmp_path / 'renamed.png'
+    copy.write_bytes(source.read_bytes())
+    assert cache.key_for(copy, 'w256', '.png') == cache.key_for(source, 'w256', '.png')
+
+    before = cache.key_for(source, 'w256', '.png')
+    source.write_bytes(b'regenerated image')
+    assert cache.key_for(source, 'w256', '.png') != before
+
+
+def test_failed_render_raises_and_leaves_nothing(cache, source):
+    with pytest.raises(ProcessingError):
+        cache.get_or_create(source, 'w256', '.png', lambda src, dst: False)
+    assert list(cache.cache_dir.iterdir()) == []
+
+
+def test_concurrent_requests_render_once(cache, source):
+    render = CountingRenderer(delay=0.2)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_create(source, 'w256', '.png', render)))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert render.calls == 1
+    assert len(set(results)) == 1 and len(results) == 6
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = DerivativeCache(tmp_path / 'cache', 2500)
+    sources = []
+    for i in range(3):
+        path = tmp_path / f"s{i}.png"
+        path.write_bytes(f"source {i}".encode())
+        sources.append(path)
+
+    render = CountingRenderer(size=1000)
+    first, second = (cache.get_or_create(path, 'w256', '.png', render) for path in sources[:2])
+    # Use the first again so the second is the least recently used
+    os.utime(second, (1, 1))
+    cache.get_or_create(sources[0], 'w256', '.png', render)
+    third = cache.get_or_create(sources[2], 'w256', '.png', render)
+
+    assert not second.exists()
+    assert first.exists() and third.exists()
+    assert render.calls == 3
+
+
+def test_in_flight_temp_files_are_not_evicted(tmp_path):
+    cache = DerivativeCache(tmp_path / 'cache', 2500)
+    # A render in progress in another process (e.g. a job worker sharing the
+    # cache), older than anything the LRU order would otherwise keep
+    in_flight = cache.cache_dir / '.abc_mask.png.0123.tmp'
+    in_flight.write_bytes(b'\0' * 5000)
+    os.utime(in_flight, (1, 1))
+
+    for i in range(3):
+        path = tmp_path / f"s{i}.png"
+        path.write_bytes(f"source {i}".encode())
+        cache.get_or_create(path, 'w256', '.png', CountingRenderer(size=1000))
+
+    assert in_flight.exists()
+    # Only committed files count towards the budget
+    assert cache._budget.total_bytes <= 2500
+
+
+def test_stale_temp_files_are_removed_at_startup(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    stale = cache_dir / '.abc_w256.png.0123.tmp'
+    fresh = cache_dir / '.def_w256.png.4567.tmp'
+    stale.write_bytes(b'left by a crashed writer')
+    fresh.write_bytes(b'still being written')
+    old = time.time() - STALE_TMP_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    DerivativeCache(cache_dir, 10_000)
+
+    assert not stale.exists()
+    assert fresh.exists()
@@ -0,0 +1,128 @@
+"""
+Color-key background removal for flat backgrounds, and BackgroundRemover
+only running the model when the color key doesn't apply
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.src.processors.flat_background import flat_background_mask
+
+WHITE = 255
+
+
+def logo(edges: dict, size: int = 64) -> Image.Image:
+    """Black square on white, with one-pixel edges at given distances from white
+
+    *edges* maps 'left', 'right' and 'top' to a color distance; the edge
+    pixels are grey at ``255 - distance``.
+    """
+    arr = np.full((size, size, 3), WHITE, dtype=np.uint8)
+    arr[20:44, 20:44] = 0
+    arr[20:44, 19] = WHITE - edges['left']
+    arr[20:44, 44] = WHITE - edges['right']
+    arr[19, 20:44] = WHITE - edges['top']
+    return Image.fromarray(arr)
+
+
+def gradient(size: int = 64) -> Image.Image:
+    ramp = np.linspace(0, 255, size, dtype=np.uint8)
+    return Image.fromarray(np.repeat(np.repeat(ramp[None, :, None], size, axis=0), 3, axis=2))
+
+
+def noisy(amplitude: int, size: int = 64, seed: int = 7) -> Image.Image:
+    """The logo over a white background with uniform noise of +-amplitude"""
+    rng = np.random.default_rng(seed)
+    arr = np.asarray(logo({'left': 0, 'right': 0, 'top': 0}, size)).astype(np.int16)
+    arr += rng.integers(-amplitude, amplitude + 1, arr.shape, dtype=np.int16)
+    return Image.fromarray(arr.clip(0, 255).astype(np.uint8))
+
+
+def test_uniform_background_is_keyed_out():
+    mask = np.asarray(flat_background_mask(logo({'left': 0, 'right': 0, 'top': 0}), tolerance=24))
+
+    assert mask[:19].max() == 0 and mask[45:].max() == 0
+    assert mask[:, :19].max() == 0 and mask[:, 45:].max() == 0
+    assert mask[20:44, 20:44].min() == 255
+
+
+def test_anti_aliased_edges_follow_the_tolerance():
+    img = logo({'left': 10, 'right': 48, 'top': 90})
+
+    mask = np.asarray(flat_background_mask(img, tolerance=24))
+    # Within the tolerance: background
+    assert set(mask[20:44, 19]) == {0}
+    # Partial alpha ramps from the tolerance to opaque at three times it
+    assert set(mask[20:44, 44]) == {127}
+    assert set(mask[19, 20:44]) == {255}
+
+    mask = np.asarray(flat_background_mask(img, tolerance=8))
+    assert set(mask[20:44, 19]) == {31}
+    assert set(mask[20:44, 44]) == {255}
+
+
+def test_noise_within_the_tolerance_is_still_flat():
+    mask = flat_background_mask(noisy(6), tolerance=24)
+
+    assert mask is not None
+    assert np.asarray(mask)[:19].max() == 0
+
+
+@pytest.mark.parametrize('img', [gradient(), noisy(60)], ids=['gradient', 'noise'])
+def test_non_uniform_backgrounds_are_left_to_the_model(img):
+    assert flat_background_mask(img, tolerance=24) is None
+
+
+def test_images_without_a_subject_are_left_to_the_model():
+    blank = Image.new('RGB', (64, 64), (WHITE, WHITE, WHITE))
+    assert flat_background_mask(blank, tolerance=24) is None
+
+
+def test_existing_alpha_is_kept():
+    img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
+    img.paste((200, 30, 30, 255), (16, 16, 48, 48))
+
+    assert flat_background_mask(img).tobytes() == img.getchannel('A').tobytes()
+
+
+@pytest.fixture
+def remover(monkeypatch):
+    pytest.importorskip('rembg')
+    from backend.src.processors.background_remover import BackgroundRemover
+
+    remover = BackgroundRemover('u2net', flat_tolerance=24, lowres_size=0)
+    remover.model_calls = []
+
+    def predict_mask(img):
+        remover.model_calls.append(img.size)
+        return Image.new('L', img.size, 255)
+    monkeypatch.setattr(remover, 'predict_mask', predict_mask)
+    return remover
+
+
+def remove(remover, img: Image.Image, tmp_path) -> str:
+    source, output = tmp_path / 'source.png', tmp_path / 'output.png'
+    img.save(source)
+    return remover.remove_background(source, output)
+
+
+def test_flat_background_skips_the_model(remover, tmp_path):
+    assert remove(remover, logo({'left': 0, 'right': 0, 'top': 0}), tmp_path) == 'flat'
+    assert remover.model_calls == []
+
+    with Image.open(tmp_path / 'output.png') as cutout:
+        assert cutout.getpixel((2, 2))[3] == 0
+        assert cutout.getpixel((32, 32)) == (0, 0, 0, 255)
+    assert remover.method_counts == {'flat': 1}
+
+
+@pytest.mark.parametrize('img', [gradient(), noisy(60)], ids=['gradient', 'noise'])
+def test_other_backgrounds_fall_back_to_the_model(remover, tmp_path, img):
+    assert remove(remover, img, tmp_path) == 'model'
+    assert remover.model_calls == [(64, 64)]
+
+
+def test_zero_tolerance_disables_the_color_key(remover, tmp_path):
+    remover.flat_tolerance = 0
+    assert remove(remover, logo({'left': 0, 'right': 0, 'top': 0}), tmp_path) == 'model'
+    assert len(remover.model_calls) == 1
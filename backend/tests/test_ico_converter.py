@@ -0,0 +1,160 @@
+"""
+ICOConverter: ICO files and favicon bundles from square and non-square
+sources, and the BMP/PNG frame mix of write_ico round-tripped through
+read_ico_frames and Pillow's decoder
+"""
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.src.processors.ico_converter import ICOConverter, encode_ico_frame, read_ico_frames, write_ico
+
+RED = (200, 30, 30, 255)
+SIZES = [16, 32, 48, 64, 128, 256]
+
+
+@pytest.fixture
+def wide(tmp_path):
+    """2:1 opaque source"""
+    path = tmp_path / 'wide.png'
+    Image.new('RGBA', (600, 300), RED).save(path)
+    return path
+
+
+def ico_frame(path, size: int) -> Image.Image:
+    with Image.open(path) as ico:
+        return ico.ico.getimage((size, size)).convert('RGBA')
+
+
+def pattern(size: int) -> Image.Image:
+    """RGBA pattern with opaque, translucent and fully transparent pixels"""
+    y, x = np.mgrid[0:size, 0:size]
+    arr = np.stack([x * 255 // size, y * 255 // size, (x ^ y) % 256, np.full_like(x, 255)], axis=-1)
+    arr[:, :size // 4, 3] = 0
+    arr[:, :size // 4, :3] = 0
+    arr[:, size // 4:size // 2, 3] = 128
+    return Image.fromarray(arr.astype(np.uint8), 'RGBA')
+
+
+def test_ico_frames_of_a_non_square_source_are_padded(wide, tmp_path):
+    output = tmp_path / 'wide.ico'
+    assert ICOConverter(SIZES).convert_image(wide, output)
+
+    frames = read_ico_frames(output)
+    assert [(frame['width'], frame['height']) for frame in frames] == [(size, size) for size in reversed(SIZES)]
+    for size in SIZES:
+        alpha = np.asarray(ico_frame(output, size).getchannel('A'))
+        # The artwork fills the width and half the height, centered
+        rows = np.flatnonzero(alpha.max(axis=1))
+        assert alpha[0].max() == 0 and alpha[-1].max() == 0
+        assert abs(len(rows) - size / 2) <= 1
+        assert abs(rows[0] - (size - len(rows)) / 2) <= 1
+        assert alpha[size // 2].min() == 255
+
+
+def test_ico_frames_of_a_square_source_fill_the_frame(tmp_path):
+    source, output = tmp_path / 'square.png', tmp_path / 'square.ico'
+    Image.new('RGBA', (500, 500), RED).save(source)
+    assert ICOConverter([16, 256]).convert_image(source, output)
+
+    for size in (16, 256):
+        assert ico_frame(output, size).getextrema()[3] == (255, 255)
+
+
+@pytest.mark.parametrize('png_from, formats', [
+    (256, ['png', 'bmp', 'bmp', 'bmp']),
+    (48, ['png', 'png', 'bmp', 'bmp']),
+    (1, ['png', 'png', 'png', 'png']),
+    (1000, ['bmp', 'bmp', 'bmp', 'bmp']),
+])
+def test_frame_mix_round_trips(tmp_path, png_from, formats):
+    sizes = [256, 48, 32, 16]
+    frames = [pattern(size) for size in sizes]
+    path = tmp_path / 'mix.ico'
+    write_ico(path, frames, [encode_ico_frame(frame, png_from) for frame in frames])
+
+    parsed = read_ico_frames(path)
+    assert [frame['format'] for frame in parsed] == formats
+    assert [(frame['width'], frame['height'], frame['bit_depth']) for frame in parsed] == [
+        (size, size, 32) for size in sizes
+    ]
+    for size, frame in zip(sizes, frames):
+        assert np.array_equal(np.asarray(ico_frame(path, size)), np.asarray(frame))
+
+
+def test_bmp_frames_carry_the_and_mask(tmp_path):
+    frame = pattern(16)
+    path = tmp_path / 'bmp.ico'
+    write_ico(path, [frame], [encode_ico_frame(frame)])
+
+    [entry] = read_ico_frames(path)
+    data = path.read_bytes()[entry['offset']:entry['offset'] + entry['size_bytes']]
+    # 40-byte header, 16x16 BGRA, then 16 rows of 4 bytes (32-bit aligned) of mask bits
+    assert len(data) == 40 + 16 * 16 * 4 + 16 * 4
+    mask = np.unpackbits(np.frombuffer(data[-64:], dtype=np.uint8).reshape(16, 4), axis=1)[::-1, :16]
+    assert np.array_equal(mask.astype(bool), np.asarray(frame.getchannel('A')) == 0)
+
+
+@pytest.fixture
+def bundle(wide, tmp_path):
+    return ICOConverter(SIZES).create_favicon_bundle(wide, tmp_path / 'bundle', background=(10, 20, 30),
+                                                     app_name='Wide')
+
+
+def test_bundle_contents(bundle):
+    assert sorted(bundle) == sorted([
+        'favicon.ico', 'favicon-16x16.png', 'favicon-32x32.png', 'android-chrome-192x192.png',
+        'android-chrome-512x512.png', 'apple-touch-icon.png', 'maskable-192.png', 'maskable-512.png',
+        'site.webmanifest',
+    ])
+    assert all(path.exists() for path in bundle.values())
+
+    frames = read_ico_frames(bundle['favicon.ico'])
+    assert sorted(frame['width'] for frame in frames) == SIZES
+    assert [frame['format'] for frame in frames] == ['png'] + ['bmp'] * (len(SIZES) - 1)
+
+    manifest = json.loads(bundle['site.webmanifest'].read_text())
+    assert manifest['name'] == 'Wide'
+    assert manifest['background_color'] == '#0a141e'
+    assert [(icon['src'], icon.get('purpose')) for icon in manifest['icons']] == [
+        ('android-chrome-192x192.png', None), ('android-chrome-512x512.png', None),
+        ('maskable-192.png', 'maskable'), ('maskable-512.png', 'maskable'),
+    ]
+
+
+@pytest.mark.parametrize('name, edge', [(name, edge) for name, edge in ICOConverter.BUNDLE_PNGS.items()])
+def test_bundle_pngs_are_padded_squares(bundle, name, edge):
+    with Image.open(bundle[name]) as icon:
+        assert icon.size == (edge, edge)
+        alpha = np.asarray(icon.convert('RGBA').getchannel('A'))
+    assert alpha[0].max() == 0
+    assert alpha[edge // 2].min() == 255
+
+
+def test_apple_touch_icon_is_opaque_on_the_background(bundle):
+    with Image.open(bundle['apple-touch-icon.png']) as icon:
+        assert icon.mode == 'RGB'
+        assert icon.size == (180, 180)
+        assert icon.getpixel((0, 0)) == (10, 20, 30)
+        assert icon.getpixel((90, 90)) == RED[:3]
+
+
+@pytest.mark.parametrize('edge', ICOConverter.MASKABLE_SIZES)
+def test_maskable_icons_keep_the_artwork_in_the_safe_zone(bundle, edge):
+    with Image.open(bundle[f"maskable-{edge}.png"]) as icon:
+        arr = np.asarray(icon.convert('RGB'))
+    art = np.argwhere((arr == RED[:3]).all(axis=-1))
+    content = round(edge * ICOConverter.MASKABLE_CONTENT)
+
+    assert arr.shape[:2] == (edge, edge)
+    assert tuple(arr[0, 0]) == (10, 20, 30)
+    # Artwork spans the content width, centered, and half of it in height
+    assert abs((art[:, 1].max() - art[:, 1].min() + 1) - content) <= 1
+    assert abs(art[:, 1].min() - (edge - content) / 2) <= 1
+    assert abs((art[:, 0].max() - art[:, 0].min() + 1) - content / 2) <= 1
+
+
+def test_bundle_failure_returns_nothing(tmp_path):
+    assert ICOConverter().create_favicon_bundle(tmp_path / 'missing.png', tmp_path / 'bundle') == {}
@@ -0,0 +1,95 @@
+"""
+ICO header parsing (read_ico_frames) against files written by write_ico and Pillow
+"""
+import struct
+
+import pytest
+from PIL import Image
+
+from backend.src.processors.ico_converter import ICOConverter, encode_ico_frame, read_ico_frames, write_ico
+
+
+def write_test_ico(path, sizes):
+    frames = [Image.new('RGBA', (size, size), (10, 120, 200, 255)) for size in sizes]
+    write_ico(path, frames, [encode_ico_frame(frame) for frame in frames])
+    return path
+
+
+def test_frames_written_by_write_ico(tmp_path):
+    path = write_test_ico(tmp_path / 'icon.ico', [256, 48, 16])
+    frames = read_ico_frames(path)
+
+    assert [(frame['width'], frame['height']) for frame in frames] == [(256, 256), (48, 48), (16, 16)]
+    assert [frame['format'] for frame in frames] == ['png', 'bmp', 'bmp']
+    assert [frame['bit_depth'] for frame in frames] == [32, 32, 32]
+    # Frames are contiguous after the 6-byte header and 16-byte entries
+    assert frames[0]['offset'] == 6 + 16 * 3
+    for frame, following in zip(frames, frames[1:]):
+        assert following['offset'] == frame['offset'] + frame['size_bytes']
+    assert frames[-1]['offset'] + frames[-1]['size_bytes'] == path.stat().st_size
+
+
+def test_frames_written_by_pillow(tmp_path):
+    path = tmp_path / 'pillow.ico'
+    Image.new('RGBA', (64, 64), (255, 0, 0, 128)).save(path, sizes=[(16, 16), (32, 32), (64, 64)])
+    frames = read_ico_frames(path)
+
+    assert sorted(frame['width'] for frame in frames) == [16, 32, 64]
+    assert {frame['height'] for frame in frames} == {16, 32, 64}
+    assert all(frame['bit_depth'] == 32 for frame in frames)
+
+
+def test_png_frame_size_and_depth_come_from_ihdr(tmp_path):
+    # RGB PNG (3 x 8 bits), with a directory entry claiming 0x0 and no depth
+    frame = Image.new('RGB', (300, 200))
+    payload = encode_ico_frame(frame)
+    path = tmp_path / 'rgb.ico'
+    path.write_bytes(struct.pack('<HHH', 0, 1, 1)
+                     + struct.pack('<BBBBHHII', 0, 0, 0, 0, 1, 0, len(payload), 22)
+                     + payload)
+
+    [frame] = read_ico_frames(path)
+    assert (frame['width'], frame['height'], frame['format'], frame['bit_depth']) == (300, 200, 'png', 24)
+
+
+def test_bmp_depth_comes_from_dib_header_when_entry_omits_it(tmp_path):
+    payload = encode_ico_frame(Image.new('RGBA', (16, 16)))
+    path = tmp_path / 'nodepth.ico'
+    path.write_bytes(struct.pack('<HHH', 0, 1, 1)
+                     + struct.pack('<BBBBHHII', 16, 16, 0, 0, 1, 0, len(payload), 22)
+                     + payload)
+
+    [frame] = read_ico_frames(path)
+    assert (frame['format'], frame['bit_depth']) == ('bmp', 32)
+
+
+def test_ico_info_reads_headers(tmp_path):
+    path = write_test_ico(tmp_path / 'icon.ico', [32, 16])
+    info = ICOConverter().get_ico_info(path)
+
+    assert info['valid'] and info['format'] == 'ICO'
+    assert info['sizes'] == [(32, 32), (16, 16)]
+    assert ICOConverter().verify_ico(path)
+
+
+def corrupt(path, data: bytes):
+    path.write_bytes(data)
+    return path
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'\x89PNG\r\n\x1a\n' + b'\0' * 32, 'not an ICO file'),
+    (struct.pack('<HHH', 0, 2, 1) + b'\0' * 16, 'not an ICO file'),
+    (struct.pack('<HHH', 0, 1, 0), 'no frames'),
+    (struct.pack('<HHH', 0, 1, 2) + b'\0' * 16, 'truncated'),
+    (struct.pack('<HHH', 0, 1, 1) + struct.pack('<BBBBHHII', 16, 16, 0, 0, 1, 32, 0, 22), 'empty frame'),
+    (struct.pack('<HHH', 0, 1, 1) + struct.pack('<BBBBHHII', 16, 16, 0, 0, 1, 32, 100, 22) + b'\0' * 50,
+     'outside the file'),
+])
+def test_malformed_files_raise_value_error(tmp_path, data, message):
+    path = corrupt(tmp_path / 'bad.ico', data)
+
+    with pytest.raises(ValueError, match=message):
+        read_ico_frames(path)
+    assert not ICOConverter().verify_ico(path)
+    assert not ICOConverter().get_ico_info(path)['valid']
@@ -0,0 +1,183 @@
+"""
+GET /image/<name>: validators, 304s, Range, immutable versioned URLs, format
+negotiation and resized derivatives;
+POST /download/selected: reporting names that aren't in the catalog
+"""
+import io
+import json
+
+import pytest
+from PIL import Image, features
+
+from backend.src.core.config import Config
+
+NAME = 'orb_dalle3_20250610_050000.png'
+
+
+@pytest.fixture
+def image(services):
+    path = services.image_service.raw_dir / NAME
+    Image.new('RGB', (300, 200), (30, 60, 90)).save(path)
+    return path
+
+
+BROWSER_ACCEPT = 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8'
+
+
+@pytest.fixture
+def negotiation(monkeypatch):
+    monkeypatch.setattr(Config, 'IMAGE_NEGOTIATION', True)
+    if not (features.check('avif') and features.check('webp')):
+        pytest.skip("Pillow built without AVIF/WebP")
+
+
+def listed(client, name: str = NAME) -> dict:
+    return next(image for image in client.get('/api/v1/images').get_json() if image['filename'] == name)
+
+
+def test_original_is_served_with_a_content_etag(client, services, image):
+    response = client.get(f'/api/v1/image/{NAME}', headers={'Accept': '*/*'})
+
+    assert response.status_code == 200
+    assert response.data == image.read_bytes()
+    assert response.mimetype == 'image/png'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.get_etag() == (services.image_service.get_content_hash(image), False)
+    assert response.cache_control.no_cache
+
+
+def test_matching_etag_gets_304(client, image):
+    etag = client.get(f'/api/v1/image/{NAME}').get_etag()[0]
+    response = client.get(f'/api/v1/image/{NAME}', headers={'If-None-Match': f'"{etag}"'})
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Rewriting the file changes the content hash
+    Image.new('RGB', (300, 200), (90, 60, 30)).save(image)
+    response = client.get(f'/api/v1/image/{NAME}', headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+
+
+def test_range_requests(client, image):
+    data = image.read_bytes()
+    response = client.get(f'/api/v1/image/{NAME}', headers={'Range': 'bytes=10-99'})
+
+    assert response.status_code == 206
+    assert response.data == data[10:100]
+    assert response.headers['Content-Range'] == f'bytes 10-99/{len(data)}'
+
+    response = client.get(f'/api/v1/image/{NAME}', headers={'Range': f'bytes={len(data) + 10}-'})
+    assert response.status_code == 416
+
+    response = client.get(f'/api/v1/image/{NAME}/thumb', headers={'Range': 'bytes=999999-'})
+    assert response.status_code == 416
+
+
+def test_versioned_url_is_immutable(client, image):
+    response = client.get(listed(client)['url'])
+
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age > 0
+
+    # A stale version must be revalidated
+    response = client.get(f'/api/v1/image/{NAME}?v=00000000')
+    assert not response.cache_control.immutable
+    assert response.cache_control.no_cache
+
+
+def test_listed_url_is_the_original_whatever_the_accept_header(client, image, negotiation):
+    response = client.get(listed(client)['url'], headers={'Accept': BROWSER_ACCEPT})
+
+    assert response.mimetype == 'image/png'
+    assert response.data == image.read_bytes()
+    assert 'Accept' not in response.vary
+
+
+@pytest.mark.parametrize('accept, mimetype', [
+    (BROWSER_ACCEPT, 'image/avif'),
+    ('image/webp,*/*', 'image/webp'),
+    # Wildcards alone (fetch(), download tools) get the original
+    ('*/*', 'image/png'),
+])
+def test_display_url_is_negotiated(client, image, negotiation, accept, mimetype):
+    response = client.get(listed(client)['display_url'], headers={'Accept': accept})
+
+    assert response.status_code == 200
+    assert response.mimetype == mimetype
+    assert Image.open(io.BytesIO(response.data)).size == (300, 200)
+    assert 'Accept' in response.vary
+
+
+def test_negotiation_can_be_disabled(client, image, negotiation, monkeypatch):
+    monkeypatch.setattr(Config, 'IMAGE_NEGOTIATION', False)
+    response = client.get(f'/api/v1/image/{NAME}', headers={'Accept': BROWSER_ACCEPT})
+
+    assert response.mimetype == 'image/png'
+    assert response.data == image.read_bytes()
+
+
+@pytest.mark.parametrize('query, size', [
+    ('w=150', (150, 100)),
+    ('h=50&format=jpeg', (75, 50)),
+    ('w=100&h=100', (100, 67)),
+    ('w=100&h=100&fit=cover', (100, 100)),
+])
+def test_resized_derivatives(client, image, query, size):
+    response = client.get(f'/api/v1/image/{NAME}?{query}')
+
+    assert response.status_code == 200
+    assert Image.open(io.BytesIO(response.data)).size == size
+    # An explicit format (or none with negotiation off) doesn't vary by Accept
+    assert ('Accept' in response.vary) == ('format' not in query and Config.IMAGE_NEGOTIATION)
+
+
+@pytest.mark.parametrize('query', [
+    'format=gif',
+    'w=abc',
+    'w=0',
+    f'h={Config.DERIVATIVE_MAX_SIZE + 1}',
+    'w=100&fit=stretch',
+    'w=100&fit=cover',
+])
+def test_invalid_derivative_parameters_are_400(client, image, query):
+    response = client.get(f'/api/v1/image/{NAME}?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json()['error']
+
+
+def test_derivatives_are_encoded_once(client, services, image, monkeypatch):
+    optimizer = services.image_service.optimizer
+    calls = []
+    render = optimizer.render_derivative
+    monkeypatch.setattr(optimizer, 'render_derivative', lambda *args: calls.append(args) or render(*args))
+
+    first = client.get(f'/api/v1/image/{NAME}?w=120&format=webp')
+    second = client.get(f'/api/v1/image/{NAME}?w=120&format=webp')
+
+    assert len(calls) == 1
+    assert first.data == second.data
+    assert first.get_etag() == second.get_etag()
+    assert client.get(f'/api/v1/image/{NAME}?w=120&format=webp',
+                      headers={'If-None-Match': f'"{first.get_etag()[0]}"'}).status_code == 304
+
+
+def test_unknown_image_is_404(client):
+    assert client.get('/api/v1/image/missing.png').status_code == 404
+
+
+def test_download_reports_missing_names(client, image):
+    response = client.post('/api/v1/download/selected', json={'filenames': [NAME, 'gone.png']})
+    assert response.status_code == 200
+    response.get_data()
+    assert json.loads(response.headers['X-Missing-Files']) == ['gone.png']
+
+    response = client.post('/api/v1/download/selected', json={'filenames': [NAME]})
+    assert 'X-Missing-Files' not in response.headers
+
+    response = client.post('/api/v1/download/selected', json={'filenames': ['gone.png', 'lost.png']})
+    assert response.status_code == 404
+    assert response.get_json()['missing'] == ['gone.png', 'lost.png']
@@ -0,0 +1,191 @@
+"""
+JobManager: result accounting, back-pressure, failures and shutdown
+
+Tasks run in spawned worker processes, so the task functions live at module
+level where the workers can import them.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from backend.src.services.job_manager import JobManager
+
+
+def echo_task(name: str, delay: float = 0.0) -> dict:
+    time.sleep(delay)
+    return {'success': True, 'name': name}
+
+
+def batch_task(names: list) -> list:
+    return [{'success': not name.startswith('bad'), 'name': name} for name in names]
+
+
+def failing_task(name: str) -> dict:
+    raise ValueError(f"cannot process {name}")
+
+
+def crashing_task() -> dict:
+    os._exit(1)
+
+
+def record_worker(directory: str) -> None:
+    """Initializer leaving one file per started worker"""
+    (Path(directory) / str(os.getpid())).touch()
+
+
+def wait_finished(manager: JobManager, job_id: str, timeout: float = 60.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        snapshot = manager.snapshot(job_id, include_results=True)
+        if snapshot['status'] != 'running':
+            return snapshot
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish within {timeout}s")
+
+
+@pytest.fixture(scope='module')
+def manager():
+    # One pool for the module: spawning workers dominates the run time
+    manager = JobManager(max_workers=1, max_in_flight=2)
+    yield manager
+    manager.shutdown()
+
+
+def test_results_and_on_result(manager):
+    registered = []
+    job = manager.submit('echo', [(echo_task, (f"img{i}",)) for i in range(5)],
+                         on_result=registered.append)
+    snapshot = wait_finished(manager, job.id)
+
+    assert snapshot['status'] == 'complete'
+    assert (snapshot['total'], snapshot['completed'], snapshot['failed']) == (5, 5, 0)
+    assert snapshot['progress'] == 100.0
+    assert sorted(result['name'] for result in snapshot['results']) == [f"img{i}" for i in range(5)]
+    assert sorted(result['name'] for result in registered) == [f"img{i}" for i in range(5)]
+
+
+def test_multi_item_tasks_count_every_item(manager):
+    registered = []
+    tasks = [(batch_task, (['a', 'bad1', 'b'],), 3), (batch_task, (['c'],), 1)]
+    snapshot = wait_finished(manager, manager.submit('batch', tasks, on_result=registered.append).id)
+
+    assert (snapshot['total'], snapshot['completed'], snapshot['failed']) == (4, 4, 1)
+    assert snapshot['status'] == 'complete'
+    # on_result only sees successful items
+    assert sorted(result['name'] for result in registered) == ['a', 'b', 'c']
+
+
+def test_failed_tasks_are_recorded(manager):
+    tasks = [(failing_task, ('x',)), (batch_task, (['y', 'z'],), 2)]
+    snapshot = wait_finished(manager, manager.submit('mixed', tasks).id)
+
+    assert (snapshot['total'], snapshot['failed']) == (3, 1)
+    errors = [result['error'] for result in snapshot['results'] if not result['success']]
+    assert errors == ['cannot process x']
+
+    snapshot = wait_finished(manager, manager.submit('broken', [(failing_task, ('x',))]).id)
+    assert snapshot['status'] == 'failed'
+
+
+def test_failed_multi_item_task_fails_each_item(manager):
+    snapshot = wait_finished(manager, manager.submit('batch', [(failing_task, ('x',), 3)]).id)
+
+    assert (snapshot['total'], snapshot['completed'], snapshot['failed']) == (3, 3, 3)
+    assert len(snapshot['results']) == 3
+
+
+def test_result_handler_errors_do_not_stall_the_job(manager):
+    def handler(result):
+        raise RuntimeError("registration failed")
+
+    snapshot = wait_finished(manager, manager.submit('echo', [(echo_task, ('a',))], on_result=handler).id)
+    assert (snapshot['status'], snapshot['completed'], snapshot['failed']) == ('complete', 1, 0)
+
+
+def test_feeder_keeps_at_most_max_in_flight_tasks_on_the_pool(manager, monkeypatch):
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def finished(_future):
+        nonlocal in_flight
+        with lock:
+            in_flight -= 1
+
+    submit_task = manager._submit_task
+
+    def tracking_submit(fn, args):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        future = submit_task(fn, args)
+        # Registered before the feeder's callback, which frees the slot
+        future.add_done_callback(finished)
+        return future
+
+    monkeypatch.setattr(manager, '_submit_task', tracking_submit)
+    job = manager.submit('echo', [(echo_task, (f"img{i}", 0.05)) for i in range(8)])
+    snapshot = wait_finished(manager, job.id)
+
+    assert snapshot['completed'] == 8
+    assert peak == manager.max_in_flight == 2
+
+
+def test_empty_job_finishes_immediately():
+    manager = JobManager(max_workers=1)
+    job = manager.submit('noop', [])
+
+    assert manager.snapshot(job.id)['status'] == 'complete'
+    assert manager._executor is None
+    manager.shutdown()
+
+
+def test_history_drops_oldest_finished_jobs():
+    manager = JobManager(max_workers=1, history=2)
+    jobs = [manager.submit('noop', []) for _ in range(3)]
+
+    assert manager.get(jobs[0].id) is None
+    assert [manager.get(job.id) for job in jobs[1:]] == jobs[1:]
+    assert manager.snapshot('unknown') is None
+    manager.shutdown()
+
+
+def test_tasks_submitted_after_shutdown_fail():
+    manager = JobManager(max_workers=1)
+    manager.shutdown()
+    snapshot = wait_finished(manager, manager.submit('echo', [(echo_task, ('a',))]).id)
+
+    assert snapshot['status'] == 'failed'
+    assert snapshot['results'][0]['error'] == "Job manager is shut down"
+
+
+def test_pool_is_restarted_after_a_worker_dies():
+    manager = JobManager(max_workers=1)
+    try:
+        snapshot = wait_finished(manager, manager.submit('crash', [(crashing_task, ())]).id)
+        assert snapshot['status'] == 'failed'
+
+        snapshot = wait_finished(manager, manager.submit('echo', [(echo_task, ('a',))]).id)
+        assert snapshot['status'] == 'complete'
+    finally:
+        manager.shutdown()
+
+
+def test_warm_up_starts_every_worker_with_the_first_job(tmp_path):
+    manager = JobManager(max_workers=2, warm_up=True, initializer=record_worker, initargs=(str(tmp_path),))
+    try:
+        # Nothing is spawned while the app starts up
+        assert manager._executor is None
+
+        snapshot = wait_finished(manager, manager.submit('echo', [(echo_task, ('a',))]).id)
+        assert snapshot['status'] == 'complete'
+        deadline = time.monotonic() + 60
+        while len(list(tmp_path.iterdir())) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        # One task alone would only have started one of the two workers
+        assert len(list(tmp_path.iterdir())) == 2
+    finally:
+        manager.shutdown()
@@ -0,0 +1,132 @@
+"""
+Guided upsampling of masks predicted at low resolution, and when
+BackgroundRemover predicts at low resolution at all
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.src.processors.mask_refine import box_filter, guided_upsample
+
+EDGE = 301
+
+
+def edge_image(size=(1001, 667)) -> Image.Image:
+    """Dark left, light right, split at an x no reduction factor lines up with"""
+    width, height = size
+    arr = np.full((height, width, 3), 30, dtype=np.uint8)
+    arr[:, EDGE:] = 220
+    return Image.fromarray(arr)
+
+
+def true_mask(size=(1001, 667)) -> np.ndarray:
+    width, height = size
+    mask = np.zeros((height, width), dtype=np.uint8)
+    mask[:, EDGE:] = 255
+    return mask
+
+
+def test_box_filter_is_a_clipped_window_mean():
+    x = np.random.default_rng(3).random((13, 9)).astype(np.float32)
+    expected = np.array([[x[max(0, i - 2):i + 3, max(0, j - 2):j + 3].mean() for j in range(9)] for i in range(13)])
+
+    np.testing.assert_allclose(box_filter(x, 2), expected, rtol=1e-5)
+
+
+@pytest.mark.parametrize('size, factor', [((1001, 667), 2), ((1537, 1025), 3), ((333, 1111), 4)])
+def test_output_matches_odd_full_sizes(size, factor):
+    full = edge_image(size)
+    guide = full.reduce(factor)
+    mask = Image.fromarray(true_mask(size)).reduce(factor)
+
+    assert guided_upsample(mask, guide, full).size == size
+    # A mask at some other size is first brought to the guide's
+    assert guided_upsample(mask.resize((50, 40)), guide, full).size == size
+
+
+@pytest.mark.parametrize('factor', [2, 3, 4])
+def test_edges_snap_to_the_full_resolution_image(factor):
+    full = edge_image()
+    truth = true_mask().astype(int)
+    low = Image.fromarray(true_mask()).reduce(factor)
+
+    guided = np.asarray(guided_upsample(low, full.reduce(factor), full)).astype(int)
+    plain = np.asarray(low.resize(full.size, Image.Resampling.BILINEAR)).astype(int)
+
+    band = slice(EDGE - 8, EDGE + 8)
+    guided_error = np.abs(guided - truth)[:, band].mean()
+    plain_error = np.abs(plain - truth)[:, band].mean()
+    assert guided_error < 3
+    assert guided_error * 5 < plain_error
+    # Away from the edge both sides are solid
+    assert np.abs(guided - truth)[:, :EDGE - 8].max() <= 1
+    assert np.abs(guided - truth)[:, EDGE + 8:].max() <= 1
+
+
+def test_flat_tiles_are_filled_without_upsampling(monkeypatch):
+    full = Image.new('RGB', (1000, 1000), (90, 90, 90))
+    guide = full.reduce(2)  # several TILEs across
+    expanded = []
+    resize = Image.Image.resize
+    monkeypatch.setattr(Image.Image, 'resize', lambda self, *args, **kwargs: expanded.append(self.mode)
+                        or resize(self, *args, **kwargs))
+
+    out = guided_upsample(Image.new('L', guide.size, 255), guide, full)
+
+    assert np.asarray(out).min() == 255
+    # The coefficient images (mode F) were never expanded to full resolution
+    assert 'F' not in expanded
+
+
+@pytest.fixture
+def remover(monkeypatch):
+    pytest.importorskip('rembg')
+    from backend.src.processors import background_remover
+
+    remover = background_remover.BackgroundRemover('u2net', flat_tolerance=0, lowres_size=512)
+    remover.predicted_sizes = []
+
+    def predict_mask(img):
+        remover.predicted_sizes.append(img.size)
+        mask = np.zeros((img.size[1], img.size[0]), dtype=np.uint8)
+        mask[:, img.size[0] // 3:] = 255
+        return Image.fromarray(mask)
+    monkeypatch.setattr(remover, 'predict_mask', predict_mask)
+    remover.upsampled = []
+
+    def upsample(mask, guide, full):
+        remover.upsampled.append(guide.size)
+        return guided_upsample(mask, guide, full)
+    monkeypatch.setattr(background_remover, 'guided_upsample', upsample)
+    return remover
+
+
+@pytest.mark.parametrize('size, lowres', [((1023, 700), False), ((1024, 700), True), ((700, 2047), True)])
+def test_lowres_applies_from_twice_the_lowres_size(remover, size, lowres):
+    assert remover.uses_lowres(size) is lowres
+    assert remover.mask_variant(size) == ('mask-u2net-lr512' if lowres else 'mask-u2net')
+
+
+def test_low_resolution_prediction_is_upsampled_to_the_source(remover, tmp_path):
+    source, output = tmp_path / 'source.png', tmp_path / 'output.png'
+    edge_image((1537, 1025)).save(source)
+
+    assert remover.remove_background(source, output) == 'model'
+    assert remover.predicted_sizes == [(513, 342)]
+    assert remover.upsampled == [(513, 342)]
+    with Image.open(output) as cutout:
+        assert cutout.size == (1537, 1025)
+
+
+@pytest.mark.parametrize('lowres_size', [512, 1600, 0])
+def test_sources_below_the_lowres_size_are_predicted_directly(remover, tmp_path, lowres_size):
+    remover.lowres_size = lowres_size
+    source, output = tmp_path / 'source.png', tmp_path / 'output.png'
+    edge_image((1001, 667)).save(source)
+
+    assert remover.remove_background(source, output) == 'model'
+    assert remover.predicted_sizes == [(1001, 667)]
+    assert remover.upsampled == []
+    with Image.open(output) as cutout:
+        assert cutout.size == (1001, 667)
+        assert cutout.getpixel((0, 0))[3] == 0 and cutout.getpixel((1000, 0))[3] == 255
@@ -0,0 +1,133 @@
+"""
+ImagePyramid: exact output sizes, reduce + LANCZOS staying within a small
+tolerance of a direct LANCZOS resize, level reuse and mode handling
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.src.processors.pyramid import ImagePyramid
+
+SIZES = [(1000, 667), (500, 333), (256, 171), (64, 43), (33, 97), (16, 16), (7, 5)]
+
+
+@pytest.fixture(scope='module')
+def smooth_image():
+    """Odd-sized photo-like image: two ramps and a slow wave, nothing aliasing"""
+    y, x = np.mgrid[0:1025, 0:1537]
+    arr = np.stack([x * 255 / 1536, y * 255 / 1024, 127.5 + 100 * np.sin(x / 37) * np.cos(y / 53)], axis=-1)
+    return Image.fromarray(arr.round().astype(np.uint8), 'RGB')
+
+
+def test_sizes_are_exact_and_in_the_requested_order(smooth_image):
+    requested = [(64, 43), (1000, 667), (33, 97), (64, 43), (1537, 1025), (3000, 2000), (1, 1)]
+    outputs = ImagePyramid(smooth_image).sizes(requested)
+
+    assert [out.size for out in outputs] == requested
+    # The full size is the base itself; a repeated size is the same level
+    assert outputs[4] is smooth_image
+    assert outputs[0] is outputs[3]
+
+
+def lanczos_error(out: Image.Image, source: Image.Image) -> np.ndarray:
+    direct = source.resize(out.size, Image.Resampling.LANCZOS)
+    return np.abs(np.asarray(out).astype(int) - np.asarray(direct).astype(int))
+
+
+@pytest.mark.parametrize('size', [size for size in SIZES if size != (16, 16)])
+def test_reduce_then_lanczos_matches_a_direct_lanczos(smooth_image, size):
+    error = lanczos_error(ImagePyramid(smooth_image).resize(size), smooth_image)
+
+    assert error.mean() < 1
+    assert error.max() <= 4
+
+
+def test_uneven_reductions_stay_close_on_average(smooth_image):
+    # 96x across but 64x down: the box reduction is sized by the smaller ratio
+    error = lanczos_error(ImagePyramid(smooth_image).resize((16, 16)), smooth_image)
+    assert error.mean() < 1
+
+
+def test_sizes_built_from_previous_levels_match_too(smooth_image):
+    for out in ImagePyramid(smooth_image).sizes(SIZES):
+        error = lanczos_error(out, smooth_image)
+        assert error.mean() < 0.5
+        assert error.max() <= 2
+
+
+def test_each_size_is_derived_from_the_smallest_covering_level(smooth_image, monkeypatch):
+    sources = []
+    resize = Image.Image.resize
+    monkeypatch.setattr(Image.Image, 'resize', lambda self, size, *args, **kwargs: sources.append(
+        (self.size, size)) or resize(self, size, *args, **kwargs))
+
+    pyramid = ImagePyramid(smooth_image)
+    pyramid.sizes([(33, 22), (500, 333), (64, 43)])
+
+    assert sources == [((1537, 1025), (500, 333)), ((167, 111), (64, 43)), ((64, 43), (33, 22))]
+    # 500x333 -> 64x43 goes through a 3x box reduction first
+    assert [level.size for level in pyramid.levels] == [
+        (1537, 1025), (500, 333), (167, 111), (64, 43), (33, 22),
+    ]
+
+
+def test_upscaling_resizes_the_base():
+    pyramid = ImagePyramid(Image.new('RGB', (40, 30), (10, 20, 30)))
+    pyramid.resize((20, 15))
+
+    assert pyramid.resize((81, 61)).size == (81, 61)
+    assert pyramid.levels[-1].size == (81, 61)
+
+
+@pytest.mark.parametrize('source, box', [
+    ((1537, 1025), (256, 256)),
+    ((333, 1111), (128, 128)),
+    ((1001, 667), (97, 97)),
+    ((1000, 3), (100, 100)),
+    ((3, 1000), (100, 100)),
+    ((120, 80), (256, 256)),
+])
+def test_thumbnail_sizes_match_pillow(source, box):
+    img = Image.new('RGB', source)
+    pyramid = ImagePyramid(img)
+    expected = img.copy()
+    expected.thumbnail(box)
+
+    assert pyramid.fit_size(box) == expected.size
+    assert pyramid.thumbnail(box).size == expected.size
+
+
+@pytest.mark.parametrize('img, mode', [
+    (Image.new('P', (8, 8)), 'RGB'),
+    (Image.new('P', (8, 8), 3), 'RGB'),
+    (Image.new('CMYK', (8, 8)), 'RGB'),
+    (Image.new('I;16', (8, 8)), 'RGB'),
+    (Image.new('PA', (8, 8)), 'RGBA'),
+    (Image.new('L', (8, 8)), 'L'),
+    (Image.new('LA', (8, 8)), 'LA'),
+    (Image.new('RGBA', (8, 8)), 'RGBA'),
+])
+def test_modes_are_converted_only_when_needed(img, mode):
+    assert ImagePyramid(img).base.mode == mode
+
+
+def test_palette_transparency_becomes_alpha():
+    img = Image.new('P', (8, 8), 3)
+    img.info['transparency'] = 3
+    pyramid = ImagePyramid(img)
+
+    assert pyramid.base.mode == 'RGBA'
+    assert pyramid.resize((4, 4)).getextrema()[3] == (0, 0)
+
+
+def test_open_drafts_jpegs_down_to_the_largest_size(smooth_image, tmp_path):
+    path = tmp_path / 'photo.jpg'
+    smooth_image.save(path, quality=90)
+
+    pyramid = ImagePyramid.open(path, largest=(256, 171))
+    # The smallest DCT scale (1/4 here; 1/8 would be 193x129) still covering it
+    assert pyramid.size == (385, 257)
+    assert pyramid.resize((256, 171)).size == (256, 171)
+
+    assert ImagePyramid.open(path).size == (1537, 1025)
+    assert ImagePyramid.open(path, mode='L').base.mode == 'L'
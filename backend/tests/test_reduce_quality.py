@@ -0,0 +1,63 @@
+"""
+ImageOptimizer._reduce_quality: the highest JPEG quality that fits a size limit
+"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.src.processors.image_optimizer import ImageOptimizer
+
+
+@pytest.fixture(scope='module')
+def noisy_image():
+    # Photo-like detail: a color gradient with grain (pure noise overflows the
+    # w*h-byte buffer Pillow gives optimized JPEG encodes)
+    rng = np.random.default_rng(7)
+    y, x = np.mgrid[0:384, 0:384]
+    base = np.stack([x * 255 / 383, y * 255 / 383, (x + y) * 255 / 766], axis=-1)
+    grain = rng.normal(0, 24, base.shape)
+    return Image.fromarray(np.clip(base + grain, 0, 255).astype(np.uint8), 'RGB')
+
+
+@pytest.fixture
+def optimizer():
+    return ImageOptimizer()
+
+
+def encoded_sizes(image, qualities, subsampling=-1):
+    return {q: len(ImageOptimizer._encode_jpeg(image, q, subsampling)) for q in qualities}
+
+
+def test_initial_quality_is_used_when_it_fits(optimizer, noisy_image):
+    data = optimizer._reduce_quality(noisy_image, 10_000, 95)
+    assert data == ImageOptimizer._encode_jpeg(noisy_image, 95, -1)
+
+
+def test_picks_the_highest_quality_that_fits(optimizer, noisy_image):
+    sizes = encoded_sizes(noisy_image, range(85, 20, -10))
+    # A limit between the sizes at 55 and 65, so 55 is the best fit
+    limit_kb = (sizes[55] + sizes[65]) // 2 // 1024
+    assert sizes[55] <= limit_kb * 1024 < sizes[65]
+
+    data = optimizer._reduce_quality(noisy_image, limit_kb, 95)
+    assert data == ImageOptimizer._encode_jpeg(noisy_image, 55, -1)
+
+
+def test_falls_back_to_420_before_giving_up(optimizer, noisy_image):
+    full_chroma = encoded_sizes(noisy_image, [25], subsampling=0)[25]
+    subsampled = encoded_sizes(noisy_image, [25], subsampling=2)[25]
+    limit_kb = (full_chroma + subsampled) // 2 // 1024
+    assert subsampled <= limit_kb * 1024 < full_chroma
+
+    data = optimizer._reduce_quality(noisy_image, limit_kb, 95, subsampling=0)
+    assert len(data) <= limit_kb * 1024
+    with Image.open(io.BytesIO(data)) as decoded:
+        # 4:2:0 samples luma 2x2 per chroma sample (4:4:4 would be 1x1)
+        assert decoded.layer[0][1:3] == (2, 2)
+
+
+def test_smallest_encode_when_nothing_fits(optimizer, noisy_image):
+    data = optimizer._reduce_quality(noisy_image, 1, 95)
+    assert data == ImageOptimizer._encode_jpeg(noisy_image, 25, -1)
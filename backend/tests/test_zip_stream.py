@@ -0,0 +1,46 @@
+"""
+Streaming ZIP writer: archives must be readable by zipfile and built chunk by chunk
+"""
+import io
+import os
+import zipfile
+
+from PIL import Image
+
+from backend.src.utils.zip_stream import stream_zip
+
+
+def test_archive_round_trips(tmp_path):
+    png = tmp_path / 'a.png'
+    Image.new('RGB', (64, 64), (1, 2, 3)).save(png)
+    text = tmp_path / 'notes.txt'
+    text.write_text('caption ' * 1000)
+    blob = tmp_path / 'noise.bin'
+    blob.write_bytes(os.urandom(300 * 1024))
+    entries = [(png, 'a.png'), (text, 'notes.txt'), (blob, 'sub/noise.bin')]
+
+    with zipfile.ZipFile(io.BytesIO(b''.join(stream_zip(entries, chunk_size=16 * 1024)))) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ['a.png', 'notes.txt', 'sub/noise.bin']
+        for path, arcname in entries:
+            assert zf.read(arcname) == path.read_bytes()
+        # Already-compressed images are stored, everything else deflated
+        assert zf.getinfo('a.png').compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo('notes.txt').compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo('notes.txt').compress_size < zf.getinfo('notes.txt').file_size
+
+
+def test_large_files_are_streamed_in_chunks(tmp_path):
+    blob = tmp_path / 'big.png'
+    blob.write_bytes(os.urandom(1024 * 1024))
+
+    chunks = list(stream_zip([(blob, 'big.png')], chunk_size=64 * 1024))
+    assert len(chunks) > 10
+    assert max(len(chunk) for chunk in chunks) < 128 * 1024
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as zf:
+        assert zf.read('big.png') == blob.read_bytes()
+
+
+def test_empty_selection_is_a_valid_archive():
+    with zipfile.ZipFile(io.BytesIO(b''.join(stream_zip([])))) as zf:
+        assert zf.namelist() == []
@@ -283,7 +283,7 @@ export default function MiddlePanel() {
         <div className="relative w-full h-full">
           <ImageViewer 
             ref={imageViewerRef}
-            imageUrl={image.url} 
+            imageUrl={image.display_url ?? image.url} 
             alt={image.filename}
             onAnnotationsChange={handleAnnotationsChange}
             onTransformChange={handleTransformChange}
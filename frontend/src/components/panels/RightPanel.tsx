@@ -1,7 +1,7 @@
-import { useQuery } from '@tanstack/react-query';
-import { useEffect, useState } from 'react';
+import { useInfiniteQuery } from '@tanstack/react-query';
+import { useEffect, useMemo, useRef, useState } from 'react';
 import { useAppState } from '../../hooks/useAppState';
-import apiService, { ImageMeta } from '../../services/apiService';
+import apiService from '../../services/apiService';
 import ImageCard from '../ui/ImageCard';
 import LoadingSpinner from '../ui/LoadingSpinner';
 import Button from '../ui/Button';
@@ -20,17 +20,38 @@ export default function RightPanel() {
   } = useImageStore();
   const [isProcessing, setIsProcessing] = useState(false);
 
+  // Page through the catalog by cursor; further pages load as the grid scrolls
   const {
-    data: fetched = [],
+    data,
     isLoading,
     isError,
     refetch,
-  } = useQuery({
-    queryKey: ['images'],
-    queryFn: apiService.getImages,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
+    queryKey: ['images', 'pages'],
+    queryFn: ({ pageParam }) => apiService.getImagesPage({ after: pageParam }),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
     retry: false,
     staleTime: 60_000,
   });
+  const fetched = useMemo(() => data?.pages.flatMap((page) => page.images) ?? [], [data]);
+  const sentinelRef = useRef<HTMLDivElement>(null);
+
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !hasNextPage) return;
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries[0].isIntersecting && !isFetchingNextPage) fetchNextPage();
+      },
+      { rootMargin: '400px' },
+    );
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [hasNextPage, isFetchingNextPage, fetchNextPage]);
 
   // sync store when fetched size changes
   useEffect(() => {
@@ -188,7 +209,7 @@ export default function RightPanel() {
             {selectedCount === images.length ? 'Deselect All' : 'Select All'}
           </Button>
           <span className="text-xs text-[var(--text-secondary)]">
-            {images.length} image{images.length !== 1 ? 's' : ''}
+            {images.length}{hasNextPage ? '+' : ''} image{images.length !== 1 ? 's' : ''}
           </span>
         </div>
       </div>
@@ -208,6 +229,11 @@ export default function RightPanel() {
             onDoubleClick={() => handleDoubleClick(img.id)}
           />
         ))}
+        {hasNextPage && (
+          <div ref={sentinelRef} className="col-span-full flex items-center justify-center">
+            {isFetchingNextPage && <LoadingSpinner />}
+          </div>
+        )}
       </div>
       
 
@@ -8,7 +8,8 @@ import { immer } from 'zustand/middleware/immer';
 export interface ImageMeta {
   id: string;
   filename: string;
-  url: string;
+  url: string;          // original file
+  display_url?: string; // same image, in the smallest format the browser accepts
   thumbnail_url: string;
   prompt_id: string;
   model: string;
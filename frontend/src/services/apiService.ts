@@ -3,7 +3,8 @@ const BASE_URL = 'http://localhost:5000/api';
 export interface ImageMeta {
   id: string;
   filename: string;
-  url: string;
+  url: string;          // original file
+  display_url?: string; // same image, in the smallest format the browser accepts
   thumbnail_url: string;
   prompt_id: string;
   model: string;
@@ -14,6 +15,36 @@ export interface ImageMeta {
   status?: string;
 }
 
+export interface ImagePage {
+  images: ImageMeta[];
+  next_cursor: string | null;
+  count: number;
+}
+
+export interface ImageQuery {
+  limit?: number;
+  after?: string | null;
+  sort?: 'newest' | 'oldest' | 'name' | 'largest' | 'smallest';
+  provider?: string;
+  model?: string;
+  prompt_id?: string;
+  type?: 'raw' | 'processed' | 'icon';
+  date_from?: string;
+  date_to?: string;
+}
+
+export interface SearchPage extends ImagePage {
+  query: string;
+}
+
+export type CatalogEventType = 'add' | 'modify' | 'remove' | 'resync';
+
+export interface CatalogEvent {
+  id: number;
+  type: CatalogEventType;
+  image?: ImageMeta;
+}
+
 export interface StatsResponse {
   total_images: number;
   providers: Record<string, number>;
@@ -23,6 +54,38 @@ export interface StatsResponse {
   status: string;
 }
 
+export interface JobStatus {
+  job_id: string;
+  kind: string;
+  status: 'running' | 'complete' | 'failed';
+  total: number;
+  completed: number;
+  failed: number;
+  progress: number;
+  created_at: number;
+  finished_at: number | null;
+}
+
+export interface JobItemResult {
+  input: string;
+  output?: string;
+  url?: string;
+  success: boolean;
+  error?: string;
+}
+
+export interface JobResult extends JobStatus {
+  results?: JobItemResult[];
+}
+
+export interface JobStarted {
+  success: boolean;
+  job_id: string;
+  status_url: string;
+  result_url: string;
+  missing: string[];
+}
+
 export interface LogLine {
   time: string;
   status: string;
@@ -30,10 +93,30 @@ export interface LogLine {
 }
 
 export const apiService = {
-  getImages: async (): Promise<ImageMeta[]> => {
-    const res = await fetch(`${BASE_URL}/images`);
+  getImagesPage: async (query: ImageQuery = {}): Promise<ImagePage> => {
+    const params = new URLSearchParams({ limit: '100' });
+    Object.entries(query).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') params.set(key, String(value));
+    });
+    const res = await fetch(`${BASE_URL}/images?${params.toString()}`);
+    return res.json();
+  },
+  searchImages: async (q: string, query: ImageQuery = {}): Promise<SearchPage> => {
+    const params = new URLSearchParams({ q, limit: '100' });
+    Object.entries(query).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') params.set(key, String(value));
+    });
+    const res = await fetch(`${BASE_URL}/images/search?${params.toString()}`);
     return res.json();
   },
+  subscribeImageEvents: (onEvent: (event: CatalogEvent) => void): (() => void) => {
+    const source = new EventSource(`${BASE_URL}/images/stream`);
+    const types: CatalogEventType[] = ['add', 'modify', 'remove', 'resync'];
+    types.forEach((type) =>
+      source.addEventListener(type, (e) => onEvent(JSON.parse((e as MessageEvent).data))),
+    );
+    return () => source.close();
+  },
   uploadImage: async (file: File): Promise<{ success: boolean; filename: string }> => {
     const form = new FormData();
     form.append('file', file);
@@ -77,6 +160,22 @@ export const apiService = {
     const res = await fetch(`${BASE_URL}/progress`);
     return res.json();
   },
+  removeBackground: async (filenames: string[], model?: string): Promise<JobStarted> => {
+    const res = await fetch(`${BASE_URL}/process/remove-background`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ filenames, model }),
+    });
+    return res.json();
+  },
+  getJob: async (jobId: string): Promise<JobStatus> => {
+    const res = await fetch(`${BASE_URL}/jobs/${jobId}`);
+    return res.json();
+  },
+  getJobResult: async (jobId: string): Promise<JobResult> => {
+    const res = await fetch(`${BASE_URL}/jobs/${jobId}/result`);
+    return res.json();
+  },
 };
 
 export default apiService;
@@ -4,5 +4,9 @@ import react from '@vitejs/plugin-react'
 // https://vite.dev/config/
 export default defineConfig({
   plugins: [react()],
-  server: { open: true } 
+  server: {
+    open: true,
+    // Image metadata carries root-relative /api/v1/... URLs; forward them to Flask
+    proxy: { '/api': 'http://localhost:5000' },
+  },
 })